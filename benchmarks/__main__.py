@@ -0,0 +1,51 @@
+""" Benchmarks of the GUI hot paths, running under Qt's offscreen platform
+
+Usage:
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare baseline.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from benchmarks.harness import Timer, to_report, save_report, compare  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', '-o', help='Where to save the results, as JSON')
+    parser.add_argument('--compare', '-c', help='Baseline results to compare against')
+    parser.add_argument('--threshold', '-t', type=float, default=0.1,
+                        help='Slowdown ratio over the baseline flagged as a regression (default: 0.1, i.e. 10%%)')
+    parser.add_argument('--repeat', '-r', type=int, default=7, help='Timed runs per benchmark')
+    parser.add_argument('--filter', '-k', help='Only run benchmarks whose name contains this string')
+    args = parser.parse_args()
+
+    app = QApplication([])
+    from benchmarks.suite import run_all
+    timer = Timer(repeat=args.repeat, name_filter=args.filter)
+    run_all(timer)
+    report = to_report(timer)
+
+    if args.output:
+        with open(args.output, 'w') as fout:
+            save_report(report, fout)
+
+    if args.compare:
+        with open(args.compare) as fin:
+            baseline = json.load(fin)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s) over {args.threshold * 100:.0f}%')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import json
+import platform
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, TextIO
+
+
+class Timer:
+    """ Collects timings of the benchmarks, by name
+    """
+    def __init__(self, repeat: int = 7, name_filter: Optional[str] = None):
+        self.repeat = repeat
+        self.name_filter = name_filter
+        self.results: Dict[str, List[float]] = dict()
+
+    def wants(self, name: str) -> bool:
+        return self.name_filter is None or self.name_filter in name
+
+    def measure(self, name: str, fn: Callable[[], None], repeat: Optional[int] = None,
+                setup: Optional[Callable[[], None]] = None):
+        """ Time `fn` over `repeat` runs, after a warm up run. `setup` runs before every run and isn't timed
+        """
+        if not self.wants(name):
+            return
+        if setup is not None:
+            setup()
+        fn()
+        samples = []
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        self.results[name] = samples
+        print(f'{name}: {statistics.median(samples) * 1000:.3f} ms (min {min(samples) * 1000:.3f} ms)')
+
+    def add(self, name: str, samples: List[float]):
+        """ Record timings measured by the benchmark itself
+        """
+        self.results[name] = samples
+        print(f'{name}: {statistics.median(samples) * 1000:.3f} ms (min {min(samples) * 1000:.3f} ms)')
+
+
+def to_report(timer: Timer) -> dict:
+    from PyQt6.QtCore import QT_VERSION_STR
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'qt': QT_VERSION_STR,
+        },
+        'benchmarks': {
+            name: {'median': statistics.median(samples), 'min': min(samples), 'runs': len(samples)}
+            for name, samples in timer.results.items()
+        },
+    }
+
+
+def save_report(report: dict, fout: TextIO):
+    json.dump(report, fout, indent=2, sort_keys=True)
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """ Names of the benchmarks whose median got slower than the baseline's by more than `threshold` (e.g. 0.1 = 10%)
+    """
+    regressions = []
+    for name, result in sorted(current['benchmarks'].items()):
+        if name not in baseline['benchmarks']:
+            continue
+        baseline_median = baseline['benchmarks'][name]['median']
+        ratio = result['median'] / baseline_median if baseline_median > 0 else 1.0
+        status = 'REGRESSION' if ratio > 1 + threshold else 'ok'
+        print(f'{status:>10}  {name}: {baseline_median * 1000:.3f} ms -> {result["median"] * 1000:.3f} ms '
+              f'({(ratio - 1) * 100:+.1f}%)')
+        if status != 'ok':
+            regressions.append(name)
+    return regressions
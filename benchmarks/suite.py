@@ -0,0 +1,245 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+from PyQt6.QtWidgets import QApplication
+
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv_gui.controller import EzCVController
+from ezcv_gui.utils import img2QImage
+from ezcv_gui.widgets.media import MediaPanelWidget
+from ezcv_gui.widgets.pipeline import PipelineWidget
+from benchmarks.harness import Timer
+
+
+SIZES = {'vga': (480, 640), 'fhd': (1080, 1920), '12mp': (3000, 4000)}
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'ezcv-gui.py')
+
+_BENCHMARKS: List[Callable[[Timer], None]] = list()
+
+
+def benchmark(fn: Callable[[Timer], None]) -> Callable[[Timer], None]:
+    _BENCHMARKS.append(fn)
+    return fn
+
+
+def run_all(timer: Timer):
+    for fn in _BENCHMARKS:
+        fn(timer)
+
+
+def _random_image(shape, dtype=np.uint8) -> np.ndarray:
+    high = np.iinfo(dtype).max
+    return np.random.randint(0, high, size=shape, dtype=dtype)
+
+
+def _run_and_wait(controller: EzCVController):
+    controller.process_curr_media()
+    controller.wait_for_processing()
+    QApplication.processEvents()
+
+
+@benchmark
+def bench_img2qimage(timer: Timer):
+    for size_name, (height, width) in SIZES.items():
+        cases = {
+            'gray8': _random_image((height, width)),
+            'bgr8': _random_image((height, width, 3)),
+            'gray16': _random_image((height, width), np.uint16),
+            'bgr8_crop': _random_image((height + 2, width + 2, 3))[1:-1, 1:-1],
+        }
+        for case_name, img in cases.items():
+            try:
+                img2QImage(img)
+            except ValueError:
+                # Not an image as far as ezcv is concerned
+                continue
+            timer.measure(f'img2qimage/{size_name}/{case_name}', lambda: img2QImage(img))
+
+
+@benchmark
+def bench_show_media(timer: Timer):
+    controller = EzCVController()
+    panel = MediaPanelWidget(controller)
+    panel.resize(1280, 800)
+    panel.show()
+    QApplication.processEvents()
+    for size_name, (height, width) in SIZES.items():
+        img = _random_image((height, width, 3))
+
+        def show():
+            panel.on_show_media(img)
+            panel.media_display.viewport().repaint()
+
+        timer.measure(f'show_media/{size_name}', show)
+    panel.close()
+    controller.shutdown()
+
+
+@benchmark
+def bench_process_curr_media(timer: Timer):
+    img = _random_image(SIZES['fhd'] + (3,))
+    for stages in (1, 4, 8):
+        controller = EzCVController(stage_cache_bytes=0)
+        for _ in range(stages):
+            controller.add_operator(GaussianBlur)
+        controller.curr_media = img
+        controller.wait_for_processing()
+        timer.measure(f'process_curr_media/{stages}_stages/full', lambda: _run_and_wait(controller))
+        controller.shutdown()
+
+        controller = EzCVController(stage_cache_bytes=0)
+        controller.tiled_execution = True
+        for _ in range(stages):
+            controller.add_operator(GaussianBlur)
+        controller.curr_media = img
+        controller.wait_for_processing()
+        timer.measure(f'process_curr_media/{stages}_stages/tiled', lambda: _run_and_wait(controller))
+        controller.shutdown()
+
+        # Editing the last stage, with the prefix cache
+        controller = EzCVController()
+        for _ in range(stages):
+            controller.add_operator(GaussianBlur)
+        controller.curr_media = img
+        last_operator = list(controller.operators.values())[-1]
+        kernel_sizes = iter(range(1_000_000))
+
+        def edit_last_stage():
+            last_operator.kernel_size = 3 + 2 * (next(kernel_sizes) % 4)
+
+        timer.measure(f'process_curr_media/{stages}_stages/edit_last', lambda: _run_and_wait(controller),
+                      setup=edit_last_stage)
+        controller.shutdown()
+
+
+@benchmark
+def bench_rapid_edits(timer: Timer):
+    """ Time from an edit to its result being shown, when the edit lands while the previous one is still running
+    """
+    name = 'rapid_edits/8_stages/edit_to_display'
+    if not timer.wants(name):
+        return
+    controller = EzCVController(stage_cache_bytes=0)
+    for _ in range(8):
+        controller.add_operator(GaussianBlur)
+    controller.curr_media = _random_image(SIZES['fhd'] + (3,))
+    first_operator = list(controller.operators.values())[0]
+    controller.wait_for_processing()
+    start = time.perf_counter()
+    _run_and_wait(controller)
+    run_seconds = time.perf_counter() - start
+
+    shown = list()
+    controller.show_media.connect(lambda img: shown.append(time.perf_counter()))
+    samples = []
+    for i in range(timer.repeat):
+        first_operator.kernel_size = 3 + 2 * (i % 4)
+        controller.process_curr_media()
+        # Halfway through the previous run
+        time.sleep(run_seconds / 2)
+        first_operator.kernel_size = 5 + 2 * (i % 4)
+        edited_at = time.perf_counter()
+        controller.process_curr_media()
+        controller.wait_for_processing()
+        QApplication.processEvents()
+        samples.append(shown[-1] - edited_at)
+    timer.add(name, samples)
+    controller.shutdown()
+
+
+@benchmark
+def bench_tabs_refresh(timer: Timer):
+    for operators_count in (10, 50, 100):
+        controller = EzCVController()
+        pipeline_widget = PipelineWidget(controller)
+        pipeline_widget.show()
+        tabs = pipeline_widget.operators_tabs
+        for _ in range(operators_count):
+            controller.cvpipeline.add_operator(f'blur_{len(controller.operators)}', GaussianBlur())
+        tabs.refresh()
+
+        def add_operator():
+            controller.cvpipeline.add_operator(f'blur_{len(controller.operators)}', GaussianBlur())
+            tabs.refresh()
+            QApplication.processEvents()
+
+        def move_operator():
+            controller.cvpipeline.move_operator(0, len(controller.operators) - 1)
+            tabs.refresh()
+            QApplication.processEvents()
+
+        timer.measure(f'tabs_refresh/add_to_{operators_count}_operators', add_operator, repeat=3)
+        timer.measure(f'tabs_refresh/move_in_{operators_count}_operators', move_operator, repeat=3)
+        pipeline_widget.close()
+        controller.shutdown()
+
+
+@benchmark
+def bench_load_config(timer: Timer):
+    """ Loading a config, up to having its tabs ready. Should stay well under a second for big configs
+    """
+    for operators_count in (10, 100, 500):
+        controller = EzCVController()
+        for _ in range(operators_count):
+            controller.cvpipeline.add_operator(f'blur_{len(controller.operators)}', GaussianBlur())
+        pipeline_widget = PipelineWidget(controller)
+        pipeline_widget.show()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fname = os.path.join(tmp_dir, 'config.yaml')
+            controller.save_config(fname)
+
+            def load_config():
+                controller.load_config(fname)
+                controller.wait_for_loading()
+                QApplication.processEvents()
+
+            timer.measure(f'load_config/{operators_count}_operators', load_config, repeat=3)
+        pipeline_widget.close()
+        controller.shutdown()
+
+
+_STARTUP_CODE = '''
+import runpy, sys
+from PyQt6.QtWidgets import QApplication
+from ezcv_gui import tracing
+_finish_trace = tracing.finish_trace
+def _finish_and_quit():
+    trace = _finish_trace()
+    QApplication.quit()
+    return trace
+tracing.finish_trace = _finish_and_quit
+sys.argv = [sys.argv[1], '--trace-startup']
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+
+@benchmark
+def bench_startup(timer: Timer):
+    """ Whole app startup through the `ezcv_gui` command, in a fresh interpreter, until the deferred construction is
+    done. Also reports the time to first paint from the startup trace, which starts when the script does
+    """
+    if not timer.wants('startup/ezcv_gui') and not timer.wants('startup/first_paint'):
+        return
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    samples = []
+    first_paint_samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', _STARTUP_CODE, SCRIPT], env=env, check=True,
+                                stdout=subprocess.PIPE, text=True)
+        samples.append(time.perf_counter() - start)
+        first_paint_samples.append(_trace_start_seconds(result.stdout, 'first paint'))
+    timer.add('startup/ezcv_gui', samples)
+    timer.add('startup/first_paint', first_paint_samples)
+
+
+def _trace_start_seconds(trace_output: str, phase: str) -> float:
+    for line in trace_output.splitlines():
+        if line.strip().endswith(phase):
+            return float(line.split()[0]) / 1000
+    raise ValueError(f'Phase "{phase}" not found in the startup trace')
@@ -0,0 +1,234 @@
+import glob
+import io
+import json
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from multiprocessing.util import Finalize
+from typing import Iterable, Iterator, Tuple, Optional, Dict
+
+import cv2
+import numpy as np
+
+from ezcv import CompVizPipeline
+from ezcv_gui.cache import DiskCache, DEFAULT_DISK_CACHE_BYTES, content_digest
+from ezcv_gui.engine import run_stages
+from ezcv_gui.plugins import load_operators, load_includes
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+MANIFEST_NAME = '.ezcv-batch.jsonl'
+
+
+class BatchSummary:
+    def __init__(self):
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.elapsed = 0.0
+        self.latencies = array('d')
+
+    @property
+    def images_per_second(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        if not self.latencies:
+            return 0.0
+        return float(np.percentile(np.frombuffer(self.latencies, dtype=np.float64), percentile))
+
+    def __str__(self):
+        return (
+            f'Processed {self.processed} images ({self.skipped} skipped, {self.failed} failed) '
+            f'in {self.elapsed:.2f}s: {self.images_per_second:.2f} images/s, '
+            f'p50 {self.latency_percentile(50) * 1000:.1f}ms, p99 {self.latency_percentile(99) * 1000:.1f}ms per image'
+        )
+
+
+class BatchManifest:
+    """ Digest of the config each output of a directory was produced with, so that outputs of another config are never
+    taken as up to date
+
+    Entries are appended as outputs get written, so interrupted runs keep track of what they did. `close` compacts
+    them back to one line per output.
+    """
+    def __init__(self, output_dir: str):
+        self.fname = os.path.join(output_dir, MANIFEST_NAME)
+        self._digests: Dict[str, str] = dict()
+        self._fout = None
+        try:
+            with open(self.fname, 'r') as fin:
+                for line in fin:
+                    try:
+                        entry = json.loads(line)
+                        self._digests[entry['output']] = entry['config']
+                    except (ValueError, KeyError, TypeError):
+                        # Cut short by an interrupted run
+                        continue
+        except FileNotFoundError:
+            pass
+
+    def config_digest(self, relative_path: str) -> Optional[str]:
+        return self._digests.get(relative_path)
+
+    def record(self, relative_path: str, config_digest: str):
+        self._digests[relative_path] = config_digest
+        if self._fout is None:
+            os.makedirs(os.path.dirname(self.fname) or '.', exist_ok=True)
+            self._fout = open(self.fname, 'a')
+        self._fout.write(json.dumps({'output': relative_path, 'config': config_digest}) + '\n')
+        self._fout.flush()
+
+    def close(self):
+        if self._fout is None:
+            return
+        self._fout.close()
+        self._fout = None
+        tmp_fname = f'{self.fname}.partial'
+        with open(tmp_fname, 'w') as fout:
+            for relative_path, config_digest in self._digests.items():
+                fout.write(json.dumps({'output': relative_path, 'config': config_digest}) + '\n')
+        os.replace(tmp_fname, self.fname)
+
+
+def iter_inputs(inputs: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """ Image files from directories, glob patterns or file names, along with their path relative to the input
+    """
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            with os.scandir(input_path) as entries:
+                for entry in entries:
+                    if entry.is_file() and _is_image_file(entry.name):
+                        yield entry.path, entry.name
+        elif glob.has_magic(input_path):
+            root = _glob_root(input_path)
+            for path in glob.iglob(input_path, recursive=True):
+                if os.path.isfile(path) and _is_image_file(path):
+                    yield path, os.path.relpath(path, root)
+        else:
+            yield input_path, os.path.basename(input_path)
+
+
+def run_batch(config_fname: str, inputs: Iterable[str], output_dir: str, workers: Optional[int] = None,
+              includes: Iterable[str] = (), resume: bool = True, disk_cache_dir: Optional[str] = None,
+              disk_cache_bytes: int = DEFAULT_DISK_CACHE_BYTES) -> BatchSummary:
+    """ Run a pipeline config over many images, in parallel
+
+    Every worker process loads the operators libraries and its own copy of the pipeline once. Inputs are listed and
+    submitted lazily, with a bounded number of images in flight, so memory doesn't grow with the number of files.
+    When resuming, images whose output is already there, newer than the input and produced by the same config, as
+    recorded in the output directory `BatchManifest`, are skipped.
+
+    With a `disk_cache_dir`, stages outputs are looked up in and stored to the same cache the GUI uses, so images
+    that went through the same stages before, in the GUI or in another batch, only run the stages after those. The
+    worker processes share its `disk_cache_bytes` budget.
+    """
+    with open(config_fname, 'r') as fin:
+        config = fin.read()
+    config_digest = content_digest(config)
+    includes = tuple(includes)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+
+    summary = BatchSummary()
+    manifest = BatchManifest(output_dir)
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(config, includes, disk_cache_dir, disk_cache_bytes)) as executor:
+            # Output paths, relative to the output directory, of the images being processed
+            in_flight: Dict[Future, str] = dict()
+            for input_path, relative_path in iter_inputs(inputs):
+                output_path = os.path.join(output_dir, relative_path)
+                if (resume and manifest.config_digest(relative_path) == config_digest
+                        and _is_up_to_date(input_path, output_path)):
+                    summary.skipped += 1
+                    continue
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    _collect(done, in_flight, summary, manifest, config_digest)
+                in_flight[executor.submit(_process_image, input_path, output_path)] = relative_path
+            _collect(wait(in_flight).done, in_flight, summary, manifest, config_digest)
+    finally:
+        manifest.close()
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+_worker_pipeline: Optional[CompVizPipeline] = None
+_worker_disk_cache: Optional[DiskCache] = None
+
+
+def _init_worker(config: str, includes: Tuple[str, ...], disk_cache_dir: Optional[str] = None,
+                 disk_cache_bytes: int = DEFAULT_DISK_CACHE_BYTES):
+    global _worker_pipeline, _worker_disk_cache
+    load_operators()
+    load_includes(includes)
+    _worker_pipeline = CompVizPipeline.load(io.StringIO(config))
+    if disk_cache_dir is not None:
+        _worker_disk_cache = DiskCache(disk_cache_dir, disk_cache_bytes)
+        # Workers exit without running atexit handlers, the pending writes would be lost otherwise
+        Finalize(_worker_disk_cache, _worker_disk_cache.close, exitpriority=0)
+
+
+def _process_image(input_path: str, output_path: str) -> Tuple[str, float, Optional[str]]:
+    start = time.perf_counter()
+    try:
+        img = cv2.imread(input_path)
+        if img is None:
+            raise ValueError("Couldn't open image located at %s" % input_path)
+        if _worker_disk_cache is not None:
+            result_img = run_stages(list(_worker_pipeline.operators.items()), img, disk_cache=_worker_disk_cache,
+                                    media_digest=content_digest(img))
+        else:
+            result_img, _ = _worker_pipeline.run(img)
+        _write_atomically(output_path, result_img)
+    except Exception as e:
+        return input_path, time.perf_counter() - start, f'{type(e).__name__}: {e}'
+    return input_path, time.perf_counter() - start, None
+
+
+def _write_atomically(output_path: str, img: np.ndarray):
+    """ Write to a temporary file first, so interrupted runs never leave partial outputs behind
+    """
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    base, ext = os.path.splitext(output_path)
+    tmp_path = f'{base}.partial{ext}'
+    if not cv2.imwrite(tmp_path, img):
+        raise ValueError("Couldn't write image to %s" % output_path)
+    os.replace(tmp_path, output_path)
+
+
+def _collect(done: Iterable[Future], in_flight: Dict[Future, str], summary: BatchSummary, manifest: BatchManifest,
+             config_digest: str):
+    for future in done:
+        relative_path = in_flight.pop(future)
+        input_path, latency, error = future.result()
+        if error is None:
+            summary.processed += 1
+            summary.latencies.append(latency)
+            manifest.record(relative_path, config_digest)
+        else:
+            summary.failed += 1
+            print(f'Failed processing "{input_path}": {error}')
+
+
+def _is_up_to_date(input_path: str, output_path: str) -> bool:
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    except OSError:
+        return False
+
+
+def _is_image_file(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def _glob_root(pattern: str) -> str:
+    parts = []
+    for part in pattern.split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or '.'
@@ -0,0 +1,334 @@
+import contextlib
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Set
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, where processes sharing a disk cache may evict the same entries at once
+    fcntl = None
+
+
+DEFAULT_DISK_CACHE_BYTES = 4 * 1024 * 1024 * 1024
+DEFAULT_DISK_CACHE_PENDING_BYTES = 512 * 1024 * 1024
+LOCK_NAME = '.lock'
+# Share of the budget each process stores before scanning the directory for what the others stored
+_SCAN_FRACTION = 16
+
+
+def default_disk_cache_dir() -> str:
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_dir, 'ezcv-gui', 'results')
+
+
+def _nbytes(value: Any) -> int:
+    return value.nbytes if isinstance(value, np.ndarray) else 0
+
+
+class LRUCache:
+    """ Thread safe LRU cache bounded by the total size of its values, in bytes
+
+    Values bigger than the whole budget are never stored.
+    """
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = _nbytes):
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._sizeof = sizeof
+        self._max_bytes = max_bytes
+        self._nbytes = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        with self._lock:
+            self._max_bytes = value
+            self._evict()
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any):
+        size = self._sizeof(value)
+        with self._lock:
+            self._pop(key)
+            if size > self._max_bytes:
+                return
+            self._entries[key] = value
+            self._nbytes += size
+            self._evict()
+
+    def discard(self, predicate: Callable[[Hashable], bool]):
+        """ Remove every entry whose key matches the predicate
+        """
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _pop(self, key: Hashable):
+        if key in self._entries:
+            self._nbytes -= self._sizeof(self._entries.pop(key))
+
+    def _evict(self):
+        while self._nbytes > self._max_bytes and self._entries:
+            _, value = self._entries.popitem(last=False)
+            self._nbytes -= self._sizeof(value)
+
+
+class DiskCache:
+    """ Arrays stored as .npy files in a directory, bounded by their total size in bytes, least recently used first out
+
+    It outlives the process, so keys must be derived from content (see `content_digest`) rather than from anything
+    that only means something in one session. Hits are memory mapped, so they don't get copied into memory up front,
+    and come back read-only. Every file carries the CRC32 of its data in its name, checked on the first hit of the
+    session: entries that don't match, e.g. from a disk that went bad, are dropped.
+
+    Arrays are written by a background thread, so `put` doesn't wait for the disk. They're copied first, unless they're
+    read-only already, and served from memory until written. Once `max_pending_bytes` of them are waiting, new ones are
+    dropped rather than queued. `flush` waits for the pending writes, and `close` must be called before exiting.
+
+    Several processes may share the same directory, since files are written to a temporary name first. They also share
+    its size budget: before evicting, and after storing a sixteenth of the budget, the directory is scanned again under
+    a lock file, so the entries other processes stored count too.
+    """
+    def __init__(self, dirname: str, max_bytes: int = DEFAULT_DISK_CACHE_BYTES,
+                 max_pending_bytes: int = DEFAULT_DISK_CACHE_PENDING_BYTES):
+        self.dirname = dirname
+        self.max_pending_bytes = max_pending_bytes
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self._nbytes = 0
+        # Key to file name and size, least recently used first
+        self._entries: 'OrderedDict[str, Tuple[str, int]]' = OrderedDict()
+        # Files whose CRC32 was checked already
+        self._verified: Set[str] = set()
+        # Arrays waiting to be written, by key
+        self._pending: Dict[str, np.ndarray] = dict()
+        self._pending_bytes = 0
+        # Bytes this process stored since the directory was last scanned
+        self._stored_bytes = 0
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ezcv-disk-cache')
+        os.makedirs(dirname, exist_ok=True)
+        self._scan()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        self._max_bytes = value
+        self._writer.submit(self._scan)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                return pending
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        fname, _ = entry
+        path = os.path.join(self.dirname, fname)
+        try:
+            arr = np.load(path, mmap_mode='r', allow_pickle=False).view(np.ndarray)
+            if fname not in self._verified:
+                if zlib.crc32(arr.data) != _entry_crc(fname):
+                    raise ValueError(f'Corrupted cache entry {path}')
+                self._verified.add(fname)
+            # Keeps track of the use across sessions and processes
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self._pop(key)
+            return None
+        return arr
+
+    def put(self, key: str, arr: np.ndarray):
+        if not isinstance(arr, np.ndarray) or arr.dtype.hasobject:
+            return
+        size = arr.nbytes
+        if size > self._max_bytes or self._pending_bytes + size > self.max_pending_bytes:
+            return
+        if arr.flags.writeable or arr.base is not None or not arr.flags.c_contiguous:
+            # The caller is free to change it while it waits to be written
+            arr = np.array(arr, order='C', copy=True)
+            arr.flags.writeable = False
+        with self._lock:
+            previous = self._pending.pop(key, None)
+            if previous is not None:
+                self._pending_bytes -= previous.nbytes
+            self._pending[key] = arr
+            self._pending_bytes += size
+        self._writer.submit(self._store, key, arr, time.time())
+
+    def flush(self):
+        """ Wait for the pending writes
+        """
+        self._writer.submit(lambda: None).result()
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._pending_bytes = 0
+        self.flush()
+        with self._lock:
+            for key in list(self._entries):
+                self._pop(key)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending or key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._pending)
+
+    def _store(self, key: str, arr: np.ndarray, put_at: float):
+        with self._lock:
+            if self._pending.get(key) is not arr:
+                # Put again or cleared since
+                return
+        fname = f'{key}-{zlib.crc32(arr.data):08x}.npy'
+        path = os.path.join(self.dirname, fname)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.partial'
+        try:
+            with open(tmp_path, 'wb') as fout:
+                np.save(fout, arr, allow_pickle=False)
+            os.replace(tmp_path, path)
+            # Entries are ordered by when they were put, not written, as the ones hit in between are more recent
+            os.utime(path, (put_at, put_at))
+            size = os.path.getsize(path)
+        except OSError:
+            _remove(tmp_path)
+            size = None
+        with self._lock:
+            if self._pending.get(key) is arr:
+                del self._pending[key]
+                self._pending_bytes -= arr.nbytes
+            if size is None:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[1]
+                if previous[0] != fname:
+                    _remove(os.path.join(self.dirname, previous[0]))
+            self._entries[key] = (fname, size)
+            self._verified.add(fname)
+            self._nbytes += size
+            self._stored_bytes += size
+            must_scan = self._nbytes > self._max_bytes or self._stored_bytes > self._max_bytes // _SCAN_FRACTION
+        if must_scan:
+            self._scan()
+
+    def _scan(self):
+        """ Index the directory entries again, least recently used first, and evict the ones over budget
+        """
+        with self._locked_dir():
+            entries = list()
+            with os.scandir(self.dirname) as it:
+                for entry in it:
+                    key, ext = os.path.splitext(entry.name)
+                    if ext != '.npy' or '-' not in key:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, key.rsplit('-', 1)[0], entry.name, stat.st_size))
+            with self._lock:
+                self._entries.clear()
+                self._nbytes = 0
+                self._stored_bytes = 0
+                for _, key, fname, size in sorted(entries):
+                    self._entries[key] = (fname, size)
+                    self._nbytes += size
+                self._verified.intersection_update(fname for fname, _ in self._entries.values())
+                self._evict()
+
+    @contextlib.contextmanager
+    def _locked_dir(self):
+        """ Keeps other processes sharing the directory from evicting at the same time
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.dirname, LOCK_NAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _pop(self, key: str):
+        if key in self._entries:
+            fname, size = self._entries.pop(key)
+            self._nbytes -= size
+            self._verified.discard(fname)
+            _remove(os.path.join(self.dirname, fname))
+
+    def _evict(self):
+        while self._nbytes > self._max_bytes and self._entries:
+            self._pop(next(iter(self._entries)))
+
+
+def content_digest(*parts: Any) -> str:
+    """ Hex digest of arrays, strings and bytes, meant as a key that stays the same across sessions
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f'{part.dtype.str}{part.shape}'.encode())
+            digest.update(np.ascontiguousarray(part).data)
+        elif isinstance(part, str):
+            digest.update(part.encode())
+        else:
+            digest.update(part)
+        # Parts boundaries, so ('ab', 'c') and ('a', 'bc') don't collide
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _entry_crc(fname: str) -> int:
+    return int(os.path.splitext(fname)[0].rsplit('-', 1)[1], 16)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,215 @@
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Type, Iterable, Any
+
+import importlib_metadata
+
+from ezcv.operator import Operator, get_available_operators
+from ezcv_gui import tracing
+
+
+OPERATORS_ENTRY_POINTS_GROUP = 'ezcv_operators'
+CATALOG_FORMAT_VERSION = 1
+_IMPLEMENTATION_PATTERN = re.compile(r'implementation\s*:\s*["\']?([\w.]+)')
+# Parameter spec attributes worth keeping in the catalog, when a spec has them
+_PARAMETER_ATTRIBUTES = ('default', 'lower', 'upper', 'step_size', 'possible_values')
+
+
+class OperatorEntry:
+    """ An operator known to the catalog, which may not be imported yet
+
+    `load` imports the operators library that owns it, if needed, and returns the operator class.
+    """
+    def __init__(self, name: str, module: str, qualname: str, entry_point: Optional[str],
+                 parameters: Dict[str, Dict[str, Any]], operator_cls: Optional[Type[Operator]] = None):
+        self.name = name
+        self.module = module
+        self.qualname = qualname
+        self.entry_point = entry_point
+        self.parameters = parameters
+        self._operator_cls = operator_cls
+
+    @classmethod
+    def from_class(cls, operator_cls: Type[Operator], entry_point: Optional[str] = None) -> 'OperatorEntry':
+        parameters = {
+            param_name: _describe_parameter(param)
+            for param_name, param in operator_cls.get_parameters_specs().items()
+        }
+        return cls(operator_cls.__name__, operator_cls.__module__, operator_cls.__qualname__, entry_point, parameters,
+                   operator_cls=operator_cls)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'OperatorEntry':
+        return cls(d['name'], d['module'], d['qualname'], d['entry_point'], d['parameters'])
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'module': self.module,
+            'qualname': self.qualname,
+            'entry_point': self.entry_point,
+            'parameters': self.parameters,
+        }
+
+    @property
+    def implementation(self) -> str:
+        return f'{self.module}.{self.qualname}'
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._operator_cls is not None
+
+    def load(self) -> Type[Operator]:
+        if self._operator_cls is None:
+            if self.entry_point is not None:
+                _load_entry_point(self.entry_point)
+            obj = importlib.import_module(self.module)
+            for attr in self.qualname.split('.'):
+                obj = getattr(obj, attr)
+            self._operator_cls = obj
+        return self._operator_cls
+
+
+class OperatorCatalog:
+    """ Operators provided by the installed operators libraries, persisted so startup doesn't have to import them
+
+    The cache is keyed by a fingerprint of the `ezcv_operators` entry points and of the distributions providing them,
+    so installing, removing or upgrading a library rebuilds it. Libraries are then only imported when one of their
+    operators is added or a config using them is loaded.
+    """
+    def __init__(self, entries: Iterable[OperatorEntry] = ()):
+        self._entries: Dict[str, OperatorEntry] = {entry.name: entry for entry in entries}
+
+    @classmethod
+    def load(cls, cache_fname: Optional[str] = None, rebuild: bool = False) -> 'OperatorCatalog':
+        """ Catalog from the cache file if it's up to date, otherwise imports every operators library and rebuilds it
+        """
+        cache_fname = cache_fname or default_cache_fname()
+        with tracing.phase('operators catalog'):
+            entry_points = list(importlib_metadata.entry_points(group=OPERATORS_ENTRY_POINTS_GROUP))
+            fingerprint = _fingerprint(entry_points)
+            catalog = None if rebuild else cls._read_cache(cache_fname, fingerprint)
+            if catalog is None:
+                catalog = cls.build(entry_points)
+                catalog._write_cache(cache_fname, fingerprint)
+        return catalog
+
+    @classmethod
+    def build(cls, entry_points: Iterable[importlib_metadata.EntryPoint]) -> 'OperatorCatalog':
+        entries = list()
+        for entry_point in entry_points:
+            before = set(get_available_operators())
+            _load_entry_point(entry_point.name, entry_point)
+            entries.extend(
+                OperatorEntry.from_class(operator_cls, entry_point.name)
+                for operator_cls in get_available_operators()
+                if operator_cls not in before
+            )
+        return cls(entries)
+
+    def available_operators(self) -> Dict[str, OperatorEntry]:
+        """ Operators from the catalog, along with the ones already imported (e.g. built-in or included ones)
+        """
+        operators = dict(self._entries)
+        for operator_cls in get_available_operators():
+            entry = operators.get(operator_cls.__name__)
+            if entry is None or entry.implementation != f'{operator_cls.__module__}.{operator_cls.__qualname__}':
+                operators[operator_cls.__name__] = OperatorEntry.from_class(operator_cls)
+        return operators
+
+    def load_config_operators(self, config: str):
+        """ Import the operators libraries a config uses, so the config can be loaded
+        """
+        implementations = set(_IMPLEMENTATION_PATTERN.findall(config))
+        for entry in self._entries.values():
+            if not entry.is_loaded and (entry.implementation in implementations or entry.name in implementations):
+                entry.load()
+
+    @property
+    def entries(self) -> List[OperatorEntry]:
+        return list(self._entries.values())
+
+    @classmethod
+    def _read_cache(cls, cache_fname: str, fingerprint: str) -> Optional['OperatorCatalog']:
+        try:
+            with open(cache_fname, 'r') as fin:
+                cache = json.load(fin)
+            if cache.get('fingerprint') != fingerprint:
+                return None
+            return cls(OperatorEntry.from_dict(d) for d in cache['operators'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cache(self, cache_fname: str, fingerprint: str):
+        cache = {'fingerprint': fingerprint, 'operators': [entry.to_dict() for entry in self._entries.values()]}
+        try:
+            os.makedirs(os.path.dirname(cache_fname), exist_ok=True)
+            tmp_fname = cache_fname + '.partial'
+            with open(tmp_fname, 'w') as fout:
+                json.dump(cache, fout, default=str)
+            os.replace(tmp_fname, cache_fname)
+        except OSError as e:
+            print(f"Couldn't write the operators catalog to {cache_fname}: {e}")
+
+
+def default_cache_fname() -> str:
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_dir, 'ezcv-gui', 'operators_catalog.json')
+
+
+def _load_entry_point(name: str, entry_point: Optional[importlib_metadata.EntryPoint] = None):
+    if entry_point is None:
+        entry_points = importlib_metadata.entry_points(group=OPERATORS_ENTRY_POINTS_GROUP, name=name)
+        entry_point = next(iter(entry_points), None)
+        if entry_point is None:
+            raise ValueError(f'Operators library "{name}" is not installed')
+    print(f'Loading operators library "{entry_point.name}"')
+    with tracing.phase(f'operators library "{entry_point.name}"'):
+        entry_point.load()
+
+
+def _fingerprint(entry_points: Iterable[importlib_metadata.EntryPoint]) -> str:
+    items: List[Any] = [CATALOG_FORMAT_VERSION, sys.version, _distribution_version('ezcv')]
+    for entry_point in sorted(entry_points, key=lambda ep: (ep.name, ep.value)):
+        dist = entry_point.dist
+        items.append([
+            entry_point.name,
+            entry_point.value,
+            dist.name if dist is not None else None,
+            dist.version if dist is not None else None,
+            _module_mtime(entry_point.module),
+        ])
+    return hashlib.sha1(json.dumps(items).encode()).hexdigest()
+
+
+def _distribution_version(name: str) -> Optional[str]:
+    try:
+        return importlib_metadata.version(name)
+    except importlib_metadata.PackageNotFoundError:
+        return None
+
+
+def _module_mtime(module: str) -> Optional[float]:
+    """ Modification time of the module's top level package, found without importing it
+    """
+    try:
+        spec = importlib.util.find_spec(module.split('.')[0])
+    except (ImportError, ValueError):
+        return None
+    if spec is None or spec.origin is None or not os.path.exists(spec.origin):
+        return None
+    return os.path.getmtime(spec.origin)
+
+
+def _describe_parameter(param) -> Dict[str, Any]:
+    description = {'type': type(param).__name__}
+    for attr in _PARAMETER_ATTRIBUTES:
+        if hasattr(param, attr):
+            value = getattr(param, attr)
+            description[attr] = list(value) if isinstance(value, (tuple, set, frozenset)) else value
+    return description
@@ -1,31 +1,146 @@
+import contextlib
+import io
+import itertools
+import os
 import traceback
-from typing import Type, Dict, Optional, Any
+from typing import Type, Dict, Optional, Any, List, Sequence, Hashable
 
-import cv2
-from PyQt6.QtCore import pyqtSignal, QObject
+from PyQt6.QtCore import pyqtSignal, QObject, Qt, QTimer
 
 from ezcv import CompVizPipeline
 from ezcv.operator import Operator
 from ezcv.exceptions import OperatorFailedError, ConfigParsingError
 from ezcv.typing import Image
+from ezcv_gui.batch import IMAGE_EXTENSIONS
+from ezcv_gui.cache import LRUCache, DiskCache
+from ezcv_gui.catalog import OperatorCatalog, OperatorEntry
+from ezcv_gui.engine import PipelineEngine, RunResult, StageOutput, stages_signatures, first_changed_stage
+from ezcv_gui.loading import BackgroundLoader, LoadResult, MediaCache, MediaCacheStats, TestSetImages, MEDIA, \
+    CONFIG, TEST_SET, DEFAULT_MEDIA_CACHE_BYTES
+from ezcv_gui.preview import DEFAULT_PREVIEW_PIXELS, make_proxy, supports_preview
+from ezcv_gui.roi import RegionOfInterest, Rect, is_worth_a_roi
+from ezcv_gui.server import ConfigPusher
+from ezcv_gui.stats import PipelineStats
+from ezcv_gui.sources import MediaSource, FrameGrabber, VideoCaptureSource, RateMeter, StreamStats, \
+    VIDEO_EXTENSIONS
+from ezcv_gui.sweep import ParameterSweep, SweepResult, sweep_values
+from ezcv_gui.testset import TestSetRunner, TestSetResult
+from ezcv_gui.tiling import TiledExecutor, pipeline_footprint
+
+
+DEFAULT_STAGE_CACHE_BYTES = 1024 * 1024 * 1024
+DEFAULT_STAGE_CAPTURE_BYTES = 512 * 1024 * 1024
+DEFAULT_ROI_CACHE_BYTES = 64 * 1024 * 1024
+PREVIEW_SETTLE_MS = 500
+FULL_FRAME_IDLE_MS = 1000
+REGION_SETTLE_MS = 100
+STREAM_POLL_MS = 5
+STREAM_STATS_MS = 1000
+# How many files on each side of the current one get prefetched when browsing a folder
+PREFETCH_NEIGHBOURS = 2
 
 
 class EzCVController(QObject):
 
     show_media = pyqtSignal(Image)
+    # Output over a region of interest, to be drawn over the shown media at the given position
+    show_patch = pyqtSignal(Image, int, int)
+    # Size of the image the shown result was computed from, and whether it was a downscaled preview
+    shown_resolution = pyqtSignal(int, int, bool)
     operators_list_updated = pyqtSignal()
-    operator_parameter_updated = pyqtSignal()
+    operator_parameter_updated = pyqtSignal(bool)
     operator_failed = pyqtSignal(OperatorFailedError)
     loading_failed = pyqtSignal(ConfigParsingError)
     error = pyqtSignal(Exception)
+    stream_stats = pyqtSignal(StreamStats)
+    stats_updated = pyqtSignal(PipelineStats)
+    # Outputs of every stage of the latest shown run, as a list of StageOutput
+    stages_captured = pyqtSignal(list)
+    # Message and percentage done of the media or config being loaded, -1 when it can't be told
+    loading_progress = pyqtSignal(str, int)
+    loading_finished = pyqtSignal()
+    media_loaded = pyqtSignal(str)
+    media_cache_stats = pyqtSignal(MediaCacheStats)
+    # File names of the test set images, in order
+    test_set_loaded = pyqtSignal(list)
+    test_set_result = pyqtSignal(TestSetResult)
+    # Operator name, parameter name and the values being swept
+    sweep_started = pyqtSignal(str, str, list)
+    sweep_result = pyqtSignal(SweepResult)
+    # None once the server got the current config, otherwise the error pushing it failed with
+    config_pushed = pyqtSignal(object)
 
-    def __init__(self):
+    def __init__(self, stage_cache_bytes: int = DEFAULT_STAGE_CACHE_BYTES, catalog: Optional[OperatorCatalog] = None,
+                 stage_capture_bytes: int = DEFAULT_STAGE_CAPTURE_BYTES,
+                 media_cache_bytes: int = DEFAULT_MEDIA_CACHE_BYTES, disk_cache: Optional[DiskCache] = None):
         super().__init__()
 
         self.cvpipeline = CompVizPipeline()
-        self.curr_media: Optional[Image] = None
+        self.catalog = catalog if catalog is not None else OperatorCatalog()
+        self._curr_media: Optional[Image] = None
+        self._media_keys = itertools.count()
+        self._media_key = next(self._media_keys)
         self._names_generator = _OperatorNameGenerator()
+        self._stage_cache = LRUCache(stage_cache_bytes)
+        # Stages run over regions of interest, kept apart so panning around doesn't evict the whole media's
+        self._roi_cache = LRUCache(DEFAULT_ROI_CACHE_BYTES)
+        self._engine = PipelineEngine(cache=self._stage_cache, parent=self, capture_bytes=stage_capture_bytes,
+                                      disk_cache=disk_cache, roi_cache=self._roi_cache)
+        self._shown_generation = 0
+        self.stats = PipelineStats()
+        self.stage_outputs: List[StageOutput] = list()
+        self._selected_stage: Optional[str] = None
+        self._result_image: Optional[Image] = None
+        # Stages signatures of the pipeline last processed, see `pipeline_change`
+        self._processed_signatures: Optional[List[Hashable]] = None
+        self._batch_depth = 0
+        self._batch_changed = False
+        self.test_set = TestSetRunner(parent=self)
+        self._sweep = ParameterSweep(parent=self)
+        self.media_cache = MediaCache(media_cache_bytes)
+        self._loader = BackgroundLoader(parent=self, media_cache=self.media_cache)
+        self.folder_files: List[str] = list()
+        self._folder_index: Optional[int] = None
+        self._config_pusher: Optional[ConfigPusher] = None
+
+        self._preview_pixels = DEFAULT_PREVIEW_PIXELS
+        self._proxy_media: Optional[Image] = None
+        self._proxy_key: Optional[int] = None
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(PREVIEW_SETTLE_MS)
+        self._settle_timer.timeout.connect(self.process_curr_media)
 
+        self._roi_enabled = False
+        self._visible_region: Optional[Rect] = None
+        self._full_resolution_shown = False
+        self._full_frame_stale = False
+        self._full_frame_timer = QTimer(self)
+        self._full_frame_timer.setSingleShot(True)
+        self._full_frame_timer.setInterval(FULL_FRAME_IDLE_MS)
+        self._full_frame_timer.timeout.connect(self.process_full_frame)
+        # Scrolling and zooming move the visible region many times in a row, only where it settles is run
+        self._region_timer = QTimer(self)
+        self._region_timer.setSingleShot(True)
+        self._region_timer.setInterval(REGION_SETTLE_MS)
+        self._region_timer.timeout.connect(self._on_region_settled)
+
+        self._grabber: Optional[FrameGrabber] = None
+        self._processing_rate = RateMeter()
+        self._stream_timer = QTimer(self)
+        self._stream_timer.setInterval(STREAM_POLL_MS)
+        self._stream_timer.timeout.connect(self._on_stream_tick)
+        self._stream_stats_timer = QTimer(self)
+        self._stream_stats_timer.setInterval(STREAM_STATS_MS)
+        self._stream_stats_timer.timeout.connect(self._emit_stream_stats)
+
+        self._engine.run_finished.connect(self._on_run_finished, Qt.ConnectionType.QueuedConnection)
+        self._engine.run_cancelled.connect(self._on_run_cancelled, Qt.ConnectionType.QueuedConnection)
+        self.test_set.image_finished.connect(self._on_test_set_image_finished, Qt.ConnectionType.QueuedConnection)
+        self._sweep.value_finished.connect(self._on_sweep_value_finished, Qt.ConnectionType.QueuedConnection)
+        self._loader.progress.connect(self._on_loading_progress, Qt.ConnectionType.QueuedConnection)
+        self._loader.loaded.connect(self._on_loaded, Qt.ConnectionType.QueuedConnection)
+        self._loader.prefetched.connect(self._emit_media_cache_stats, Qt.ConnectionType.QueuedConnection)
         self.operators_list_updated.connect(self._on_operators_list_updated)
         self.operator_parameter_updated.connect(self._on_operator_parameter_updated)
 
@@ -35,6 +150,17 @@ class EzCVController(QObject):
         self.cvpipeline.add_operator(operator_name, operator)
         self.operators_list_updated.emit()
 
+    def add_catalog_operator(self, entry: OperatorEntry):
+        """ Add an operator from the catalog, importing its library first if needed
+        """
+        try:
+            operator_cls = entry.load()
+        except Exception as e:
+            print(traceback.format_exc())
+            self.error.emit(e)
+            return
+        self.add_operator(operator_cls)
+
     def remove_operator(self, index: int):
         try:
             self.cvpipeline.remove_operator(index)
@@ -67,34 +193,241 @@ class EzCVController(QObject):
             print(traceback.format_exc())
             self.error.emit(e)
 
-    def process_curr_media(self):
-        if self.curr_media is not None:
-            try:
-                result_img, ctx = self.cvpipeline.run(self.curr_media)
-                self.show_media.emit(result_img)
-            except OperatorFailedError as e:
-                print(traceback.format_exc())
-                self.operator_failed.emit(e)
-                self.show_media.emit(self.curr_media)
+    def process_curr_media(self, interactive: bool = False):
+        """ Run the pipeline over the current media
+
+        Interactive runs go over a downscaled proxy of big media, when the pipeline allows it. A full resolution run
+        follows once no interactive run was requested for a while.
+
+        With region of interest execution on, runs only go over the visible part of the media while the display is
+        zoomed in, see `process_region`.
+
+        The test set, when there's one, is run over again too.
+        """
+        self._processed_signatures = stages_signatures(list(self.operators.items()))
+        self._push_config()
+        if len(self.test_set) > 0 and not self.is_streaming:
+            self.test_set.submit(self.cvpipeline)
+        if self.curr_media is None:
+            return
+        if self.is_streaming:
+            # Frames are processed once each, caching and previews would only slow them down
+            self._engine.submit(self.cvpipeline, self.curr_media)
+            return
+        roi = self._get_roi()
+        if roi is not None:
+            self.process_region(roi)
+            return
+        if interactive and supports_preview(self.operators.values()):
+            proxy_key = self._get_proxy_key()
+            if proxy_key is not None:
+                self._engine.submit(self.cvpipeline, self._proxy_media, media_key=proxy_key, preview=True,
+                                    capture=True)
+                self._settle_timer.start()
+                return
+        self.process_full_frame()
+
+    def process_region(self, roi: RegionOfInterest):
+        """ Run the pipeline over a crop of the current media, to be shown over the latest full resolution output
+
+        The whole media is run over again once no other run was requested for a while.
+        """
+        self._settle_timer.stop()
+        self._region_timer.stop()
+        self._engine.submit(self.cvpipeline, roi.crop_media(self.curr_media), media_key=(self._media_key, roi.crop),
+                            roi=roi)
+        self._full_frame_stale = True
+        self._full_frame_timer.start()
+
+    def process_full_frame(self):
+        """ Run the pipeline over the whole current media, at full resolution
+        """
+        self._settle_timer.stop()
+        self._full_frame_timer.stop()
+        self._region_timer.stop()
+        if self.curr_media is None or self.is_streaming:
+            return
+        self._full_frame_stale = False
+        self._engine.submit(self.cvpipeline, self.curr_media, media_key=self._media_key, capture=True)
+
+    @contextlib.contextmanager
+    def batch_changes(self):
+        """ Make several changes to the pipeline, e.g. applying a preset, with a single run once they're all done
+
+        Nothing runs while in the block, and nothing runs after it either if the changes cancelled each other out.
+        Blocks can be nested, only the outermost one runs the pipeline.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_changed:
+                self._batch_changed = False
+                self._process_changes()
+
+    def pipeline_change(self) -> Optional[int]:
+        """ Index of the first stage whose output changed since the pipeline was last processed, or None if its output
+        can't have changed, e.g. after renaming operators or loading the same config again
+        """
+        return first_changed_stage(self._processed_signatures, stages_signatures(list(self.operators.items())))
+
+    @property
+    def run_count(self) -> int:
+        """ How many runs were requested so far, including the ones that got superseded before they were done
+        """
+        return self._engine.generation
+
+    def wait_for_processing(self, timeout: Optional[float] = None) -> bool:
+        """ Block until the pipeline worker is done with every submitted run
+
+        Results are still delivered through the event loop, so the caller must process events to receive them.
+        """
+        return self._engine.wait_idle(timeout)
+
+    def wait_for_loading(self, timeout: Optional[float] = None) -> bool:
+        """ Block until the loader is done with every requested load
+
+        Like runs, loaded media and configs are delivered through the event loop.
+        """
+        return self._loader.wait_idle(timeout)
+
+    def shutdown(self):
+        self._loader.shutdown()
+        self.close_source()
+        self._engine.shutdown()
+        if self._engine.tiler is not None:
+            self._engine.tiler.shutdown()
+        if self._config_pusher is not None:
+            self._config_pusher.shutdown()
+        self.test_set.shutdown()
+        self._sweep.shutdown()
+
+    def update_operator_parameter(self, name: str, param_name: str, param_value: Any, interactive: bool = False):
+        """ Set a parameter value
 
-    def update_operator_parameter(self, name: str, param_name: str, param_value: Any):
+        `interactive` tells the value is an intermediate one, sent while the user is still changing it. A final update
+        always follows.
+        """
         setattr(self.operators[name], param_name, param_value)
-        self.operator_parameter_updated.emit()
+        self.operator_parameter_updated.emit(interactive)
 
     def load_media(self, fname: str):
-        img = cv2.imread(fname)
-        if img is None:
-            raise ValueError("Couldn't open image located at %s" % fname)
-        self.curr_media = img
-        self.process_curr_media()
+        """ Decode an image on the background, or open a video file
 
-    def load_config(self, fname: str):
-        with open(fname, 'r') as fin:
+        Big JPEG images get a downscaled first look, shown while the full image is still being decoded. Decoded images
+        are kept in `media_cache`, so going back to an image doesn't decode it again.
+        """
+        if os.path.splitext(fname)[1].lower() in VIDEO_EXTENSIONS:
             try:
-                self.cvpipeline = CompVizPipeline.load(fin)
-                self.operators_list_updated.emit()
-            except ConfigParsingError as e:
-                self.loading_failed.emit(e)
+                self.open_source(VideoCaptureSource(fname))
+            except ValueError as e:
+                print(traceback.format_exc())
+                self.error.emit(e)
+                return
+            self.media_loaded.emit(fname)
+            return
+        self.close_source()
+        self._loader.load_media(fname)
+        if fname in self.folder_files:
+            self._folder_index = self.folder_files.index(fname)
+            self._prefetch_neighbours()
+
+    def open_folder(self, dirname: str):
+        """ Browse the images in a folder, starting from the first one
+
+        `next_media` and `previous_media` go through them in name order, while the ones next to the current image get
+        decoded on the background.
+        """
+        fnames = sorted(
+            os.path.join(dirname, name) for name in os.listdir(dirname)
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS and os.path.isfile(os.path.join(dirname, name))
+        )
+        if not fnames:
+            self.error.emit(ValueError(f'There are no images in {dirname}'))
+            return
+        self.folder_files = fnames
+        self.load_media(fnames[0])
+
+    def next_media(self):
+        self._step_folder(1)
+
+    def previous_media(self):
+        self._step_folder(-1)
+
+    def load_test_set(self, fnames: Sequence[str]):
+        """ Run the pipeline over every image in `fnames` along with the current media, to tune it against all of them
+
+        Images are decoded on the background, `test_set_loaded` is emitted once they all are.
+        """
+        self._loader.load_test_set(fnames)
+
+    def clear_test_set(self):
+        self._loader.cancel(TEST_SET)
+        self.test_set.clear()
+        self.test_set_loaded.emit([])
+
+    def sweep_parameter(self, operator_name: str, param_name: str, values: Optional[Sequence[Any]] = None):
+        """ Run the pipeline over the current media once for every value of a parameter, by default all the values
+        its spec allows
+
+        Runs go over the same downscaled proxy interactive previews use, when the pipeline allows it.
+        """
+        if self.curr_media is None or self.is_streaming:
+            return
+        try:
+            operator = self.operators[operator_name]
+            if values is None:
+                values = sweep_values(operator.get_parameters_specs()[param_name])
+            values = list(values)
+            media, media_key = self.curr_media, self._media_key
+            if supports_preview(self.operators.values()) and self._get_proxy_key() is not None:
+                media, media_key = self._proxy_media, self._proxy_key
+            self._sweep.submit(self.cvpipeline, operator_name, param_name, values, media, cache=self._stage_cache,
+                               media_key=media_key)
+        except (KeyError, ValueError) as e:
+            print(traceback.format_exc())
+            self.error.emit(e)
+            return
+        self.sweep_started.emit(operator_name, param_name, values)
+
+    def open_source(self, source: MediaSource):
+        """ Process frames from a video source, always the newest one, dropping those the pipeline can't keep up with
+        """
+        self.close_source()
+        self.curr_media = None
+        self._grabber = FrameGrabber(source)
+        self._grabber.start()
+        self._stream_timer.start()
+        self._stream_stats_timer.start()
+
+    def open_camera(self, device: int = 0):
+        try:
+            self.open_source(VideoCaptureSource(device))
+        except ValueError as e:
+            print(traceback.format_exc())
+            self.error.emit(e)
+
+    def close_source(self):
+        if self._grabber is None:
+            return
+        self._stream_timer.stop()
+        self._stream_stats_timer.stop()
+        self._grabber.stop()
+        self._grabber = None
+
+    @property
+    def is_streaming(self) -> bool:
+        return self._grabber is not None
+
+    def load_config(self, fname: str):
+        """ Load a pipeline config on the background, importing the operators libraries it needs first
+        """
+        self._loader.load_config(fname, self.catalog)
+
+    def cancel_loading(self):
+        self._loader.cancel()
+        self.loading_finished.emit()
 
     def save_config(self, fname: str):
         with open(fname, 'w') as fout:
@@ -104,15 +437,362 @@ class EzCVController(QObject):
                 print(traceback.format_exc())
                 self.error.emit(e)
 
+    def export_stats(self, fname: str):
+        try:
+            self.stats.export(fname)
+        except (OSError, ValueError) as e:
+            print(traceback.format_exc())
+            self.error.emit(e)
+
     @property
     def operators(self):
         return self.cvpipeline.operators
 
+    @property
+    def curr_media(self) -> Optional[Image]:
+        return self._curr_media
+
+    @curr_media.setter
+    def curr_media(self, img: Optional[Image]):
+        self._curr_media = img
+        # Stages computed over the previous media can't be reused anymore
+        self._stage_cache.clear()
+        self._roi_cache.clear()
+        self._media_key = next(self._media_keys)
+        self._processed_signatures = None
+        self._invalidate_proxy()
+        self._full_resolution_shown = False
+
+    @property
+    def preview_pixels(self) -> int:
+        """ Pixel budget for interactive previews. Zero disables them
+        """
+        return self._preview_pixels
+
+    @preview_pixels.setter
+    def preview_pixels(self, value: int):
+        if value != self._preview_pixels:
+            self._preview_pixels = value
+            self._invalidate_proxy()
+
+    def set_preview_target_size(self, width: int, height: int):
+        """ Size previews for a display of the given size, in device pixels
+        """
+        self.preview_pixels = max(width * height, DEFAULT_PREVIEW_PIXELS // 16)
+
+    @property
+    def tiled_execution(self) -> bool:
+        """ Whether tile safe operators run over tiles of big media in parallel. Other operators always run over the
+        whole media
+        """
+        return self._engine.tiler is not None
+
+    @tiled_execution.setter
+    def tiled_execution(self, value: bool):
+        if value != self.tiled_execution:
+            # A run may still be using the previous tiler, its threads go away along with it
+            self._engine.tiler = TiledExecutor() if value else None
+
+    @property
+    def server_address(self) -> Optional[str]:
+        """ Address of a pipeline server to push the config to whenever it changes, see `ezcv_gui.server`. None to
+        stop pushing
+        """
+        return self._config_pusher.address if self._config_pusher is not None else None
+
+    @server_address.setter
+    def server_address(self, value: Optional[str]):
+        if value == self.server_address:
+            return
+        if self._config_pusher is not None:
+            self._config_pusher.shutdown()
+            self._config_pusher = None
+        if value is not None:
+            self._config_pusher = ConfigPusher(value, parent=self)
+            self._config_pusher.pushed.connect(self.config_pushed, Qt.ConnectionType.QueuedConnection)
+            self._push_config()
+
+    @property
+    def roi_enabled(self) -> bool:
+        """ Whether runs are restricted to the visible region of the media while the display is zoomed in
+        """
+        return self._roi_enabled
+
+    @roi_enabled.setter
+    def roi_enabled(self, value: bool):
+        self._roi_enabled = value
+        if not value and self._full_frame_stale:
+            self.process_full_frame()
+
+    def set_visible_region(self, x: int, y: int, width: int, height: int):
+        """ Part of the media that's visible on the display, in media pixels
+        """
+        self._visible_region = (x, y, width, height)
+        if self._full_frame_stale:
+            # Only the previously visible region is up to date
+            self._region_timer.start()
+
+    def select_stage(self, name: Optional[str]):
+        """ Show the output of the stage named `name` instead of the pipeline's, from the latest run's captured outputs
+
+        It's kept through the next runs, until a stage with that name is gone. None goes back to the pipeline output.
+        """
+        self._selected_stage = name
+        if self._result_image is not None:
+            self.show_media.emit(self._selected_image(self._result_image))
+
+    @property
+    def selected_stage(self) -> Optional[str]:
+        return self._selected_stage
+
+    @property
+    def stage_capture_bytes(self) -> int:
+        return self._engine.capture_bytes
+
+    @stage_capture_bytes.setter
+    def stage_capture_bytes(self, value: int):
+        self._engine.capture_bytes = value
+
+    @property
+    def media_cache_bytes(self) -> int:
+        return self.media_cache.max_bytes
+
+    @media_cache_bytes.setter
+    def media_cache_bytes(self, value: int):
+        self.media_cache.max_bytes = value
+        self._emit_media_cache_stats()
+
+    @property
+    def stage_cache_bytes(self) -> int:
+        return self._stage_cache.max_bytes
+
+    @stage_cache_bytes.setter
+    def stage_cache_bytes(self, value: int):
+        self._stage_cache.max_bytes = value
+
     def _on_operators_list_updated(self):
-        self.process_curr_media()
+        if self._selected_stage not in self.operators:
+            self._selected_stage = None
+        self._process_changes()
+
+    def _on_operator_parameter_updated(self, interactive: bool):
+        if self._batch_depth > 0:
+            self._batch_changed = True
+            return
+        # Interactive runs may have been previews, so the final value gets processed even if it's the same
+        self.process_curr_media(interactive=interactive)
+
+    def _process_changes(self):
+        if self._batch_depth > 0:
+            self._batch_changed = True
+            return
+        if self.pipeline_change() is not None:
+            self.process_curr_media()
+            return
+        # Renames still change the config
+        self._push_config()
+        if self.stage_outputs:
+            # Same outputs, maybe under other names
+            names = list(self.operators)
+            self.stage_outputs = [StageOutput(name, stage.thumbnail, stage.image)
+                                  for name, stage in zip(names, self.stage_outputs)]
+            self.stages_captured.emit(self.stage_outputs)
+
+    def _push_config(self):
+        if self._config_pusher is None:
+            return
+        try:
+            with io.StringIO() as fout:
+                self.cvpipeline.save(fout)
+                config = fout.getvalue()
+        except Exception as e:
+            print(traceback.format_exc())
+            self.config_pushed.emit(e)
+            return
+        self._config_pusher.push(config)
+
+    def _on_run_finished(self, result: RunResult):
+        # Runs finish in order, but a result may still be queued when a newer one was already shown
+        if result.generation <= self._shown_generation:
+            return
+        self._shown_generation = result.generation
+        if self.is_streaming:
+            self._processing_rate.tick()
+        if result.timing is not None:
+            self.stats.add_run(result.timing)
+            self.stats_updated.emit(self.stats)
+        if result.roi is not None:
+            self._on_region_run_finished(result)
+            return
+        if result.stages is not None or self.stage_outputs:
+            # Streamed frames aren't captured, stale stages from before must not be shown for them
+            self.stage_outputs = result.stages if result.stages is not None else list()
+            self.stages_captured.emit(self.stage_outputs)
+        if result.error is None:
+            self._result_image = result.image
+            self._full_resolution_shown = not result.preview and not self.is_streaming
+            self.show_media.emit(self._selected_image(result.image))
+        elif isinstance(result.error, OperatorFailedError):
+            self.operator_failed.emit(result.error)
+            self.show_media.emit(result.media)
+        else:
+            self.error.emit(result.error)
+            return
+        height, width = result.media.shape[:2]
+        self.shown_resolution.emit(width, height, result.preview)
+
+    def _on_run_cancelled(self, generation: int):
+        self.stats.add_cancelled_run()
+
+    def _on_loading_progress(self, message: str, percent: int):
+        self.loading_progress.emit(message, percent)
+
+    def _on_loaded(self, result: LoadResult):
+        if result.generation != self._loader.generation(result.kind):
+            return
+        if not result.reduced:
+            self.loading_finished.emit()
+        if result.error is not None:
+            if isinstance(result.error, ConfigParsingError):
+                self.loading_failed.emit(result.error)
+            else:
+                self.error.emit(result.error)
+        elif result.kind == CONFIG:
+            self.cvpipeline = result.value
+            self.operators_list_updated.emit()
+        elif result.kind == TEST_SET:
+            self._on_test_set_images(result.value)
+        elif result.reduced:
+            self._show_first_look(result.value)
+        elif result.kind == MEDIA:
+            self.curr_media = result.value
+            self.process_curr_media()
+            self.media_loaded.emit(result.fname)
+        if result.kind == MEDIA and not result.reduced:
+            self._emit_media_cache_stats()
+
+    def _on_test_set_images(self, loaded: TestSetImages):
+        self.test_set.set_images(loaded.fnames, loaded.images)
+        self.test_set_loaded.emit(list(self.test_set.fnames))
+        if loaded.failed:
+            self.error.emit(ValueError("Couldn't open images located at " + ', '.join(loaded.failed)))
+        if len(self.test_set) > 0 and not self.is_streaming:
+            self.test_set.submit(self.cvpipeline)
+
+    def _show_first_look(self, img: Image):
+        """ Show a downscaled version of media that's still being decoded, through the pipeline if it allows it
+        """
+        if self.is_streaming:
+            return
+        if supports_preview(self.operators.values()):
+            self._engine.submit(self.cvpipeline, img, preview=True)
+        else:
+            self.show_media.emit(img)
+
+    def _step_folder(self, step: int):
+        if self._folder_index is None:
+            return
+        index = self._folder_index + step
+        if 0 <= index < len(self.folder_files):
+            self.load_media(self.folder_files[index])
+
+    def _prefetch_neighbours(self):
+        # Closest first, the next files before the previous ones at the same distance
+        indexes = [self._folder_index + sign * distance
+                   for distance in range(1, PREFETCH_NEIGHBOURS + 1) for sign in (1, -1)]
+        self._loader.prefetch(self.folder_files[i] for i in indexes if 0 <= i < len(self.folder_files))
+
+    def _emit_media_cache_stats(self, *args):
+        self.media_cache_stats.emit(self.media_cache.stats())
+
+    def _on_test_set_image_finished(self, result: TestSetResult):
+        if result.generation == self.test_set.generation:
+            self.test_set_result.emit(result)
+
+    def _on_sweep_value_finished(self, result: SweepResult):
+        if result.generation == self._sweep.generation:
+            self.sweep_result.emit(result)
+
+    def _on_region_run_finished(self, result: RunResult):
+        if result.error is None:
+            patch = result.roi.extract(result.image)
+            if patch is None:
+                # The pipeline changes the image geometry, so only whole outputs can be shown
+                self.process_full_frame()
+                return
+            x, y, _, _ = result.roi.region
+            self.show_patch.emit(patch, x, y)
+        elif isinstance(result.error, OperatorFailedError):
+            self.operator_failed.emit(result.error)
+        else:
+            self.error.emit(result.error)
+
+    def _on_region_settled(self):
+        if self._full_frame_stale:
+            self.process_curr_media(interactive=True)
+
+    def _get_roi(self) -> Optional[RegionOfInterest]:
+        """ Region of interest to restrict the next run to, if any
+
+        Patches are drawn over the latest output, so there must be a full resolution one shown, of the pipeline output
+        rather than of a single stage. The region is grown by the pipeline footprint, and pipelines with operators
+        that aren't known to be tile safe, which may depend on the whole media, always run over all of it.
+        """
+        if not self._roi_enabled or self._visible_region is None or not self._full_resolution_shown:
+            return None
+        if self._selected_stage is not None:
+            return None
+        height, width = self.curr_media.shape[:2]
+        if not is_worth_a_roi(self._visible_region, width, height):
+            return None
+        halo = pipeline_footprint(self.operators.values())
+        if halo is None:
+            return None
+        return RegionOfInterest.around(self._visible_region, halo, width, height)
+
+    def _selected_image(self, result_image: Image) -> Image:
+        if self._selected_stage is None:
+            return result_image
+        stage = next((stage for stage in self.stage_outputs if stage.name == self._selected_stage), None)
+        if stage is None:
+            return result_image
+        return stage.image if stage.image is not None else stage.thumbnail
+
+    def _on_stream_tick(self):
+        if not self._engine.is_idle():
+            return
+        frame = self._grabber.latest_frame()
+        if frame is not None:
+            self._curr_media = frame
+            self.process_curr_media()
+        elif self._grabber.finished:
+            self._stream_timer.stop()
+
+    def _emit_stream_stats(self):
+        if self._grabber is None:
+            return
+        stats = StreamStats(self._grabber.decode_rate.rate(), self._processing_rate.rate(),
+                            self._grabber.dropped_frames)
+        self.stream_stats.emit(stats)
+        if self._grabber.finished and stats.processing_fps == 0:
+            self._stream_stats_timer.stop()
+
+    def _invalidate_proxy(self):
+        if self._proxy_key is not None:
+            proxy_key = self._proxy_key
+            self._stage_cache.discard(lambda key: key[0] == proxy_key)
+        self._proxy_media = None
+        self._proxy_key = None
 
-    def _on_operator_parameter_updated(self):
-        self.process_curr_media()
+    def _get_proxy_key(self) -> Optional[int]:
+        """ Cache key of the downscaled current media, computing it on first use. None when media is small enough
+        """
+        if self._proxy_key is None:
+            self._proxy_media = make_proxy(self.curr_media, self._preview_pixels)
+            if self._proxy_media is None:
+                return None
+            self._proxy_key = next(self._media_keys)
+        return self._proxy_key
 
 
 class _OperatorNameGenerator:
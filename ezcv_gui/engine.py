@@ -0,0 +1,460 @@
+import contextlib
+import copy
+import io
+import threading
+import time
+import traceback
+from typing import Optional, List, Tuple, Hashable, Any, Callable
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ezcv import CompVizPipeline
+from ezcv.exceptions import OperatorFailedError
+from ezcv.operator import Operator
+from ezcv.typing import Image
+from ezcv_gui.cache import LRUCache, DiskCache, content_digest
+from ezcv_gui.preview import make_thumbnail, DEFAULT_THUMBNAIL_PIXELS
+from ezcv_gui.roi import RegionOfInterest
+from ezcv_gui.stats import StageTiming, RunTiming
+from ezcv_gui.tiling import TiledExecutor, tile_footprint
+
+
+Stage = Tuple[str, Operator]
+
+
+class RunCancelled(Exception):
+    pass
+
+
+class StageOutput:
+    """ Output of a pipeline stage, captured for inspection
+
+    `image` is the full resolution output, when it fit in the capture budget, otherwise only the thumbnail is kept.
+    Both are read-only.
+    """
+    def __init__(self, name: str, thumbnail: Image, image: Optional[Image] = None):
+        self.name = name
+        self.thumbnail = thumbnail
+        self.image = image
+
+
+class RunResult:
+    def __init__(self, generation: int, media: Image, image: Optional[Image] = None,
+                 error: Optional[Exception] = None, preview: bool = False, timing: Optional[RunTiming] = None,
+                 stages: Optional[List[StageOutput]] = None, roi: Optional[RegionOfInterest] = None):
+        self.generation = generation
+        self.media = media
+        self.image = image
+        self.error = error
+        self.preview = preview
+        self.timing = timing
+        self.stages = stages
+        self.roi = roi
+
+
+class _Job:
+    def __init__(self, generation: int, stages: List[Stage], media: Image, media_key: Optional[Hashable],
+                 preview: bool, capture: bool, roi: Optional[RegionOfInterest]):
+        self.generation = generation
+        self.stages = stages
+        self.media = media
+        self.media_key = media_key
+        self.preview = preview
+        self.capture = capture
+        self.roi = roi
+
+
+class _StagesKeys:
+    """ Cache keys of the stages outputs of a pipeline over some media
+
+    Content keys, for caches that outlive the session, chain the digest of the media pixels with the config of every
+    stage, one stage at a time.
+    """
+    def __init__(self, stages: List[Stage], media_key: Hashable, media_digest: Optional[str] = None):
+        self._stages = stages
+        self._media_key = media_key
+        self._signatures = stages_signatures(stages)
+        self._content_keys = [media_digest]
+
+    def output(self, stages_count: int) -> Hashable:
+        """ Key for the output of the first `stages_count` stages
+        """
+        return self._media_key, tuple(self._signatures[:stages_count])
+
+    def thumbnail(self, stages_count: int) -> Hashable:
+        return self.output(stages_count) + ('thumbnail',)
+
+    def content(self, stages_count: int) -> str:
+        while len(self._content_keys) <= stages_count:
+            _, operator = self._stages[len(self._content_keys) - 1]
+            self._content_keys.append(content_digest(self._content_keys[-1], stage_config(operator)))
+        return self._content_keys[stages_count]
+
+
+class PipelineEngine(QObject):
+    """ Runs pipelines on a background worker thread
+
+    At most one job is running and at most one is waiting at any given time. Submitting a job while another one is
+    still waiting replaces the waiting one, so only the newest pipeline state gets computed. Every job gets a
+    generation number, which is increasing, so receivers can ignore results that arrive late.
+
+    When a cache is given, the output of every stage is stored in it, keyed by the media key and the parameters of
+    all the operators up to that stage. Runs then resume from the longest cached prefix of the pipeline. Full
+    resolution runs also go through `disk_cache`, when given, which outlives the session. Runs restricted to a region of
+    interest go through `roi_cache` instead, so that crops, which are seldom run again once the view moved, don't evict
+    the stages of whole media. They aren't cached without one.
+
+    Runs submitted with `capture` also hand back every stage's output, as a thumbnail of at most `thumbnail_pixels`
+    pixels, along with the full resolution outputs that fit in `capture_bytes`.
+
+    A running job is abandoned before its next stage as soon as a newer one is submitted, and `run_cancelled` is
+    emitted in place of `run_finished`. The stages it already ran stay cached, for the newer job to resume from.
+
+    With a `tiler`, tile safe operators run over tiles of big images in parallel, see `run_stages`.
+    """
+    run_finished = pyqtSignal(object)
+    # Generation of the abandoned job
+    run_cancelled = pyqtSignal(int)
+
+    def __init__(self, cache: Optional[LRUCache] = None, parent=None, capture_bytes: int = 0,
+                 thumbnail_pixels: int = DEFAULT_THUMBNAIL_PIXELS, disk_cache: Optional[DiskCache] = None,
+                 tiler: Optional[TiledExecutor] = None, roi_cache: Optional[LRUCache] = None):
+        super().__init__(parent)
+        self.cache = cache
+        self.roi_cache = roi_cache
+        self.disk_cache = disk_cache
+        self.tiler = tiler
+        # Digest of the last media that went through the disk cache, as hashing big images isn't free
+        self._media_digest: Tuple[Optional[Hashable], Optional[str]] = (None, None)
+        self.capture_bytes = capture_bytes
+        self.thumbnail_pixels = thumbnail_pixels
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._pending: Optional[_Job] = None
+        self._running: Optional[_Job] = None
+        self._cancelled_runs = 0
+        self._shutdown = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, pipeline: CompVizPipeline, media: Image, media_key: Optional[Hashable] = None,
+               preview: bool = False, capture: bool = False, roi: Optional[RegionOfInterest] = None) -> int:
+        """ Queue a run of `pipeline` over `media`
+
+        `media_key` identifies the media for caching purposes. Runs without a key aren't cached. `preview` and `roi`
+        are handed back untouched in the run result. `capture` hands back the stages outputs too.
+        """
+        stages = snapshot_stages(pipeline)
+        with self._cond:
+            self._generation += 1
+            self._pending = _Job(self._generation, stages, media, media_key, preview, capture, roi)
+            self._ensure_thread()
+            self._cond.notify_all()
+            return self._generation
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def cancelled_runs(self) -> int:
+        return self._cancelled_runs
+
+    def is_idle(self) -> bool:
+        with self._cond:
+            return self._pending is None and self._running is None
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and self._running is None, timeout)
+
+    def shutdown(self):
+        with self._cond:
+            self._shutdown = True
+            self._pending = None
+            self._cond.notify_all()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker_loop, name='ezcv-pipeline-engine', daemon=True)
+            self._thread.start()
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._shutdown)
+                if self._shutdown:
+                    return
+                job = self._running = self._pending
+                self._pending = None
+
+            result = self._run_job(job)
+
+            with self._cond:
+                self._running = None
+                if result is None:
+                    self._cancelled_runs += 1
+                self._cond.notify_all()
+                # Emitting under the lock makes sure nothing is emitted once `shutdown` returns, as the engine may be
+                # deleted right after
+                if self._shutdown:
+                    return
+                try:
+                    if result is None:
+                        self.run_cancelled.emit(job.generation)
+                    else:
+                        self.run_finished.emit(result)
+                except RuntimeError:
+                    # The engine was deleted while the job was running
+                    return
+
+    def _run_job(self, job: _Job) -> Optional[RunResult]:
+        """ Run a job, or return None if it was abandoned for a newer one
+        """
+        timings: List[StageTiming] = []
+        capture = _StagesCapture(self.capture_bytes, self.thumbnail_pixels) if job.capture else None
+        stages = capture.outputs if capture is not None else None
+        start = time.perf_counter()
+        try:
+            img = self._run_stages(job, timings, capture)
+            timing = RunTiming(timings, time.perf_counter() - start)
+            return RunResult(job.generation, job.media, image=img, preview=job.preview, timing=timing, stages=stages,
+                             roi=job.roi)
+        except RunCancelled:
+            return None
+        except Exception as e:
+            print(traceback.format_exc())
+            return RunResult(job.generation, job.media, error=e, preview=job.preview, stages=stages, roi=job.roi)
+
+    def _run_stages(self, job: _Job, timings: List[StageTiming], capture: Optional['_StagesCapture']) -> Image:
+        cache = None
+        if job.media_key is not None:
+            cache = self.roi_cache if job.roi is not None else self.cache
+        disk_cache, media_digest = None, None
+        # Previews and regions of interest are only good for the current session
+        if self.disk_cache is not None and job.media_key is not None and not job.preview and job.roi is None:
+            disk_cache, media_digest = self.disk_cache, self._get_media_digest(job)
+        return run_stages(job.stages, job.media, cache, job.media_key, timings, capture, disk_cache, media_digest,
+                          should_cancel=self._is_superseded, tiler=self.tiler)
+
+    def _is_superseded(self) -> bool:
+        return self._pending is not None or self._shutdown
+
+    def _get_media_digest(self, job: _Job) -> str:
+        media_key, digest = self._media_digest
+        if media_key != job.media_key:
+            digest = content_digest(job.media)
+            self._media_digest = (job.media_key, digest)
+        return digest
+
+
+class _StagesCapture:
+    """ Stages outputs of a run, keeping full resolution copies of the outputs until the budget runs out
+    """
+    def __init__(self, max_bytes: int, thumbnail_pixels: int):
+        self.outputs: List[StageOutput] = list()
+        self._remaining_bytes = max_bytes
+        self._thumbnail_pixels = thumbnail_pixels
+
+    def add(self, name: str, img: Image, cache: Optional[LRUCache], thumbnail_key: Hashable, frozen: bool = True):
+        thumbnail = cache.get(thumbnail_key) if cache is not None else None
+        if thumbnail is None:
+            thumbnail = _frozen_copy(make_thumbnail(img, self._thumbnail_pixels))
+            if cache is not None:
+                cache.put(thumbnail_key, thumbnail)
+        full_img = None
+        if img.nbytes <= self._remaining_bytes:
+            self._remaining_bytes -= img.nbytes
+            full_img = img if frozen else _frozen_copy(img)
+        self.outputs.append(StageOutput(name, thumbnail, full_img))
+
+
+def run_stages(stages: List[Stage], media: Image, cache: Optional[LRUCache] = None,
+               media_key: Optional[Hashable] = None, timings: Optional[List[StageTiming]] = None,
+               capture: Optional['_StagesCapture'] = None, disk_cache: Optional[DiskCache] = None,
+               media_digest: Optional[str] = None, should_cancel: Optional[Callable[[], bool]] = None,
+               tiler: Optional[TiledExecutor] = None, ctx: Any = None) -> Image:
+    """ Run the stages over `media`, resuming from the longest prefix of them whose output is in `cache`, or else in
+    `disk_cache`
+
+    Stages outputs are only cached in `cache` when a `media_key` is given, and in `disk_cache` when a `media_digest`
+    (see `content_digest`) is given. `should_cancel` is checked before every stage that has to run, raising
+    `RunCancelled` when it returns True.
+
+    With a `tiler`, each tile safe stage runs over tiles of the image in parallel, with a halo as big as its footprint,
+    and the other stages run over the whole image.
+
+    Every stage runs within the same pipeline context, as they would in `CompVizPipeline.run`. It's made for `media`,
+    unless a `ctx` is given, e.g. when `media` is the output of earlier stages run separately.
+    """
+    timings = timings if timings is not None else list()
+    if media_key is None:
+        cache = None
+    if media_digest is None:
+        disk_cache = None
+    keys = _StagesKeys(stages, media_key, media_digest)
+    img = media
+    start, cached_img = 0, None
+    if cache is not None:
+        start, cached_img = _find_cached_prefix(cache, keys, len(stages))
+    if disk_cache is not None and start < len(stages):
+        disk_start, disk_img = _find_disk_cached_prefix(disk_cache, keys, start, len(stages))
+        if disk_img is not None:
+            start, cached_img = disk_start, disk_img
+            if cache is not None:
+                cache.put(keys.output(start), disk_img)
+    if start > 0:
+        for i, (operator_name, _) in enumerate(stages[:start]):
+            # Without an in-memory cache, only the stage the run resumes from is known
+            stage_img = cache.get(keys.output(i + 1)) if cache is not None else None
+            if stage_img is None and i + 1 == start:
+                stage_img = cached_img
+            if stage_img is not None:
+                timings.append(_stage_timing(operator_name, 0.0, stage_img, cached=True))
+                if capture is not None:
+                    capture.add(operator_name, stage_img, cache, keys.thumbnail(i + 1))
+        if start == len(stages):
+            return cached_img
+        # Cached arrays are read-only, and operators are free to work in place
+        img = cached_img.copy()
+
+    if ctx is None and start < len(stages):
+        ctx = pipeline_context(media)
+    for i in range(start, len(stages)):
+        if should_cancel is not None and should_cancel():
+            raise RunCancelled()
+        operator_name, operator = stages[i]
+        stage_start = time.perf_counter()
+        img = _run_stage(operator_name, operator, img, ctx, media, tiler)
+        timings.append(_stage_timing(operator_name, time.perf_counter() - stage_start, img))
+        frozen_img = None
+        if cache is not None:
+            frozen_img = _frozen_copy(img)
+            cache.put(keys.output(i + 1), frozen_img)
+        if disk_cache is not None:
+            # Written in the background, which needs no copy of read-only arrays
+            disk_cache.put(keys.content(i + 1), frozen_img if frozen_img is not None else img)
+        if capture is not None:
+            # The next operator may change its input in place, so the capture needs a copy of it
+            capture.add(operator_name, frozen_img if frozen_img is not None else img, cache,
+                        keys.thumbnail(i + 1), frozen=frozen_img is not None)
+    return img
+
+
+def _find_cached_prefix(cache: LRUCache, keys: _StagesKeys, stages_count: int) -> Tuple[int, Optional[Image]]:
+    for count in range(stages_count, 0, -1):
+        cached_img = cache.get(keys.output(count))
+        if cached_img is not None:
+            return count, cached_img
+    return 0, None
+
+
+def _find_disk_cached_prefix(disk_cache: DiskCache, keys: _StagesKeys, min_count: int,
+                             stages_count: int) -> Tuple[int, Optional[Image]]:
+    for count in range(stages_count, min_count, -1):
+        cached_img = disk_cache.get(keys.content(count))
+        if cached_img is not None:
+            return count, cached_img
+    return min_count, None
+
+
+def pipeline_context(media: Image) -> Any:
+    """ The context `CompVizPipeline.run` gives its operators when run over `media`
+    """
+    _, ctx = CompVizPipeline().run(media)
+    return ctx
+
+
+def run_operator(operator_name: str, operator: Operator, img: Image, ctx: Any = None) -> Image:
+    """ Run a single operator within `ctx`, the context of the run it's part of (see `pipeline_context`), with the
+    same error handling `CompVizPipeline.run` gives it. Without a `ctx`, `img` is taken as the run's media
+    """
+    if ctx is None:
+        ctx = pipeline_context(img)
+    scope = getattr(ctx, 'scope', None)
+    with scope(operator_name) if scope is not None else contextlib.nullcontext():
+        try:
+            return operator.run(img, ctx)
+        except Exception as e:
+            raise OperatorFailedError(f'Operator "{operator_name}" failed: {type(e).__name__}: {e}') from e
+
+
+def _run_stage(operator_name: str, operator: Operator, img: Image, ctx: Any, media: Image,
+               tiler: Optional[TiledExecutor]) -> Image:
+    halo = tile_footprint(operator) if tiler is not None else None
+    # Tiles get the context of the same tile of the media, which only lines up while the geometry didn't change
+    if halo is not None and tiler.is_worth_tiling(img) and img.shape[:2] == media.shape[:2]:
+        # Every tile gets its own copy, as operators aren't meant to be shared between threads
+        tiled_img = tiler.map_tiles(
+            lambda tile_img, tile: run_operator(operator_name, copy.deepcopy(operator), tile_img,
+                                                pipeline_context(tile.crop_media(media))),
+            img, halo
+        )
+        if tiled_img is not None:
+            return tiled_img
+    return run_operator(operator_name, operator, img, ctx)
+
+
+def snapshot_stages(pipeline: CompVizPipeline) -> List[Stage]:
+    """ Copy the pipeline operators so they can run on another thread while the original ones keep being edited
+    """
+    return [(operator_name, copy.deepcopy(operator)) for operator_name, operator in pipeline.operators.items()]
+
+
+def stages_signatures(stages: List[Stage]) -> List[Hashable]:
+    return [operator_signature(operator) for _, operator in stages]
+
+
+def first_changed_stage(old_signatures: Optional[List[Hashable]], new_signatures: List[Hashable]) -> Optional[int]:
+    """ Index of the first stage whose output differs between two pipelines, given their stages signatures, or None
+    when both pipelines have the same output. Stages are compared by what they do, regardless of their names
+
+    When the old pipeline isn't known, everything changed.
+    """
+    if old_signatures is None:
+        return 0
+    for i, (old, new) in enumerate(zip(old_signatures, new_signatures)):
+        if old != new:
+            return i
+    if len(old_signatures) != len(new_signatures):
+        return min(len(old_signatures), len(new_signatures))
+    return None
+
+
+def stage_config(operator: Operator) -> str:
+    """ The config `CompVizPipeline.save` writes for an operator, regardless of the name it goes by in the pipeline
+    """
+    pipeline = CompVizPipeline()
+    pipeline.add_operator('stage', operator)
+    with io.StringIO() as fout:
+        pipeline.save(fout)
+        return fout.getvalue()
+
+
+def operator_signature(operator: Operator) -> Hashable:
+    """ Everything about an operator that affects its output: its implementation and its parameters' values
+    """
+    params = tuple(
+        (param_name, _freeze(getattr(operator, param_name)))
+        for param_name in operator.get_parameters_specs()
+    )
+    operator_cls = type(operator)
+    return operator_cls.__module__, operator_cls.__qualname__, params
+
+
+def _freeze(value: Any) -> Hashable:
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def _stage_timing(operator_name: str, seconds: float, img: Image, cached: bool = False) -> StageTiming:
+    return StageTiming(operator_name, seconds, tuple(img.shape), str(img.dtype), int(img.nbytes), cached=cached)
+
+
+def _frozen_copy(img: Image) -> Image:
+    img = np.array(img, copy=True)
+    img.flags.writeable = False
+    return img
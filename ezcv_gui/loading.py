@@ -0,0 +1,328 @@
+import io
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError, TimeoutError
+from typing import Optional, Any, Dict, List, Hashable, Iterable, Sequence
+
+import cv2
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ezcv import CompVizPipeline
+from ezcv.typing import Image
+from ezcv_gui.cache import LRUCache
+from ezcv_gui.catalog import OperatorCatalog
+
+
+MEDIA = 'media'
+CONFIG = 'config'
+TEST_SET = 'test_set'
+
+READ_CHUNK_BYTES = 1024 * 1024
+# Files smaller than this decode fast enough as they are
+REDUCED_DECODE_MIN_BYTES = 2 * 1024 * 1024
+# Only JPEG decoders actually skip work for reduced decodes (through DCT scaling), other formats are decoded in full
+# and downscaled afterwards
+REDUCED_DECODE_EXTENSIONS = ('.jpg', '.jpeg', '.jpe')
+REDUCED_DECODE_FACTOR = 4
+DEFAULT_MEDIA_CACHE_BYTES = 512 * 1024 * 1024
+_REDUCED_DECODE_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class MediaCacheStats:
+    def __init__(self, hits: int, misses: int, nbytes: int, max_bytes: int):
+        self.hits = hits
+        self.misses = misses
+        self.nbytes = nbytes
+        self.max_bytes = max_bytes
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def __str__(self):
+        return (
+            f'Media cache: {self.hit_rate * 100:.0f}% hits, '
+            f'{self.nbytes / 2 ** 20:.0f}/{self.max_bytes / 2 ** 20:.0f} MB'
+        )
+
+
+class MediaCache:
+    """ Decoded images, keyed by their path along with their modification time and size, so edited files are decoded
+    again. Images are stored read-only
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MEDIA_CACHE_BYTES):
+        self._images = LRUCache(max_bytes)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def key(fname: str) -> Hashable:
+        stat = os.stat(fname)
+        return os.path.abspath(fname), stat.st_mtime_ns, stat.st_size
+
+    def get(self, key: Hashable) -> Optional[Image]:
+        img = self._images.get(key)
+        with self._lock:
+            if img is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return img
+
+    def put(self, key: Hashable, img: Image) -> Image:
+        """ Store a read-only copy of `img`, and return it
+        """
+        img = np.array(img, copy=True)
+        img.flags.writeable = False
+        self._images.put(key, img)
+        return img
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._images
+
+    @property
+    def max_bytes(self) -> int:
+        return self._images.max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        self._images.max_bytes = value
+
+    def stats(self) -> MediaCacheStats:
+        return MediaCacheStats(self._hits, self._misses, self._images.nbytes, self._images.max_bytes)
+
+
+class TestSetImages:
+    """ Decoded test set images, along with the files that couldn't be decoded
+    """
+    # Not a pytest test class, despite the name
+    __test__ = False
+
+    def __init__(self, fnames: List[str], images: List[Image], failed: List[str]):
+        self.fnames = fnames
+        self.images = images
+        self.failed = failed
+
+
+class LoadResult:
+    """ Outcome of a load: the decoded image, loaded pipeline or `TestSetImages`, or the error it failed with
+
+    Media loads may hand back a `reduced` first look at the image before the full resolution one. Test set loads have
+    the list of files as their `fname`.
+    """
+    def __init__(self, kind: str, generation: int, fname: str, value: Optional[Any] = None,
+                 error: Optional[Exception] = None, reduced: bool = False):
+        self.kind = kind
+        self.generation = generation
+        self.fname = fname
+        self.value = value
+        self.error = error
+        self.reduced = reduced
+
+
+class BackgroundLoader(QObject):
+    """ Decodes media and loads configs on background threads
+
+    A media load supersedes the previous media load, a config load the previous config load and a test set load the
+    previous test set load: whatever is left of the superseded one is cancelled and its results are never emitted.
+    Files are read in chunks, which is where `progress` comes from and where cancellations are noticed.
+
+    Decoded images are kept in `media_cache`, which `prefetch` can fill ahead of time on a thread of its own. Loaded
+    images are writable copies of the cached ones.
+    """
+    # Message and percentage done, -1 when it can't be told
+    progress = pyqtSignal(str, int)
+    loaded = pyqtSignal(object)
+    prefetched = pyqtSignal(str)
+
+    def __init__(self, parent=None, media_cache: Optional[MediaCache] = None):
+        super().__init__(parent)
+        self.media_cache = media_cache if media_cache is not None else MediaCache()
+        # Two threads, so a big image doesn't hold a config back
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ezcv-loader')
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ezcv-prefetch')
+        self._lock = threading.RLock()
+        self._generations: Dict[str, int] = {MEDIA: 0, CONFIG: 0, TEST_SET: 0}
+        self._prefetch_generation = 0
+        self._futures: List[Future] = list()
+
+    def load_media(self, fname: str) -> int:
+        return self._submit(MEDIA, self._load_media, fname)
+
+    def load_config(self, fname: str, catalog: OperatorCatalog) -> int:
+        return self._submit(CONFIG, self._load_config, fname, catalog)
+
+    def load_test_set(self, fnames: Sequence[str]) -> int:
+        return self._submit(TEST_SET, self._load_test_set, list(fnames))
+
+    def prefetch(self, fnames: Iterable[str]):
+        """ Decode images into the media cache, in order, dropping the ones from the previous call that weren't yet
+        """
+        with self._lock:
+            self._prefetch_generation += 1
+            generation = self._prefetch_generation
+        for fname in fnames:
+            self._prefetch_executor.submit(self._prefetch, generation, fname)
+
+    def cancel(self, kind: Optional[str] = None):
+        with self._lock:
+            for k in ([kind] if kind is not None else list(self._generations)):
+                self._generations[k] += 1
+
+    def generation(self, kind: str) -> int:
+        return self._generations[kind]
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            futures = list(self._futures)
+        try:
+            for future in futures:
+                future.exception(timeout)
+        except TimeoutError:
+            return False
+        except CancelledError:
+            pass
+        return True
+
+    def shutdown(self):
+        self.cancel()
+        with self._lock:
+            self._prefetch_generation += 1
+        self._executor.shutdown(wait=False)
+        self._prefetch_executor.shutdown(wait=False)
+
+    def _submit(self, kind: str, fn, *args) -> int:
+        with self._lock:
+            self._generations[kind] += 1
+            generation = self._generations[kind]
+            self._futures = [future for future in self._futures if not future.done()]
+            self._futures.append(self._executor.submit(self._run, kind, generation, fn, *args))
+        return generation
+
+    def _run(self, kind: str, generation: int, fn, fname: str, *args):
+        try:
+            self._check(kind, generation)
+            fn(kind, generation, fname, *args)
+        except LoadCancelled:
+            return
+        except Exception as e:
+            print(traceback.format_exc())
+            try:
+                self._emit(kind, generation, self.loaded, LoadResult(kind, generation, fname, error=e))
+            except LoadCancelled:
+                pass
+
+    def _load_media(self, kind: str, generation: int, fname: str):
+        cache_key = self.media_cache.key(fname)
+        img = self.media_cache.get(cache_key)
+        if img is not None:
+            self._emit(kind, generation, self.loaded, LoadResult(kind, generation, fname, img.copy()))
+            return
+        data = self._read(kind, generation, fname)
+        buf = np.frombuffer(data, dtype=np.uint8)
+        basename = os.path.basename(fname)
+        if os.path.splitext(fname)[1].lower() in REDUCED_DECODE_EXTENSIONS and len(data) >= REDUCED_DECODE_MIN_BYTES:
+            self._emit(kind, generation, self.progress, f'Decoding a preview of {basename}', -1)
+            reduced = cv2.imdecode(buf, _REDUCED_DECODE_FLAGS[REDUCED_DECODE_FACTOR])
+            if reduced is not None:
+                self._emit(kind, generation, self.loaded, LoadResult(kind, generation, fname, reduced, reduced=True))
+            self._check(kind, generation)
+        self._emit(kind, generation, self.progress, f'Decoding {basename}', -1)
+        img = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Couldn't open image located at %s" % fname)
+        self.media_cache.put(cache_key, img)
+        self._emit(kind, generation, self.loaded, LoadResult(kind, generation, fname, img))
+
+    def _load_test_set(self, kind: str, generation: int, fnames: List[str]):
+        loaded = TestSetImages([], [], [])
+        for i, fname in enumerate(fnames):
+            self._emit(kind, generation, self.progress, f'Decoding {os.path.basename(fname)}', i * 100 // len(fnames))
+            try:
+                cache_key = self.media_cache.key(fname)
+            except OSError:
+                loaded.failed.append(fname)
+                continue
+            img = self.media_cache.get(cache_key)
+            if img is not None:
+                img = img.copy()
+            else:
+                img = cv2.imread(fname)
+                if img is None:
+                    loaded.failed.append(fname)
+                    continue
+                self.media_cache.put(cache_key, img)
+            loaded.fnames.append(fname)
+            loaded.images.append(img)
+        self._emit(kind, generation, self.loaded, LoadResult(kind, generation, fnames, loaded))
+
+    def _prefetch(self, generation: int, fname: str):
+        if generation != self._prefetch_generation:
+            return
+        try:
+            cache_key = self.media_cache.key(fname)
+            if cache_key in self.media_cache:
+                return
+            img = cv2.imread(fname)
+        except Exception:
+            # Prefetching is only a hint, the actual load reports the errors
+            return
+        if img is None:
+            return
+        self.media_cache.put(cache_key, img)
+        with self._lock:
+            if generation != self._prefetch_generation:
+                return
+            try:
+                self.prefetched.emit(fname)
+            except RuntimeError:
+                # The loader was deleted while prefetching
+                pass
+
+    def _load_config(self, kind: str, generation: int, fname: str, catalog: OperatorCatalog):
+        config = self._read(kind, generation, fname).decode()
+        self._emit(kind, generation, self.progress, f'Loading {os.path.basename(fname)}', -1)
+        catalog.load_config_operators(config)
+        self._check(kind, generation)
+        with io.StringIO(config) as fin:
+            pipeline = CompVizPipeline.load(fin)
+        self._emit(kind, generation, self.loaded, LoadResult(kind, generation, fname, pipeline))
+
+    def _read(self, kind: str, generation: int, fname: str) -> bytearray:
+        size = os.path.getsize(fname)
+        message = f'Reading {os.path.basename(fname)}'
+        data = bytearray(size)
+        view = memoryview(data)
+        read = 0
+        with open(fname, 'rb') as fin:
+            while read < size:
+                self._check(kind, generation)
+                chunk_size = fin.readinto(view[read:read + READ_CHUNK_BYTES])
+                if not chunk_size:
+                    break
+                read += chunk_size
+                self._emit(kind, generation, self.progress, message, int(read * 100 / size))
+        view.release()
+        return data if read == size else data[:read]
+
+    def _check(self, kind: str, generation: int):
+        if generation != self._generations[kind]:
+            raise LoadCancelled()
+
+    def _emit(self, kind: str, generation: int, signal, *args):
+        with self._lock:
+            # Checked under the lock, so nothing is emitted once the load was superseded or `shutdown` returned
+            self._check(kind, generation)
+            try:
+                signal.emit(*args)
+            except RuntimeError:
+                # The loader was deleted while loading
+                raise LoadCancelled()
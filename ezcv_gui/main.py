@@ -1,26 +1,89 @@
-from PyQt6.QtWidgets import QMainWindow, QMessageBox, QFileDialog
-from PyQt6.QtGui import QAction
+from typing import Optional, Callable
 
+from PyQt6.QtWidgets import QMainWindow, QMessageBox, QFileDialog, QLabel, QDockWidget, QProgressBar, QToolButton, \
+    QMenu, QInputDialog
+from PyQt6.QtCore import QEvent, QTimer, Qt, QSettings
+from PyQt6.QtGui import QAction, QCloseEvent
+
+from ezcv_gui import tracing
+from ezcv_gui.cache import DiskCache
+from ezcv_gui.catalog import OperatorCatalog
 from ezcv_gui.controller import EzCVController
+from ezcv_gui.loading import MediaCacheStats
+from ezcv_gui.recent import RecentFiles
+from ezcv_gui.server import default_server_address
+from ezcv_gui.stats import PipelineStats
 from ezcv_gui.widgets.central import CentralWidget
+from ezcv_gui.widgets.sweep import SweepWidget
+from ezcv_gui.widgets.testset import TestSetWidget
 
 
 class EzCV(QMainWindow):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, catalog_loader: Optional[Callable[[], OperatorCatalog]] = None,
+                 settings: Optional[QSettings] = None, disk_cache: Optional[DiskCache] = None):
+        """ Only what's needed for the first paint is built here, the rest (e.g. the operators catalog, which
+        `catalog_loader` returns) is built on the event loop right after it
+
+        Full resolution stages outputs are kept across sessions in `disk_cache`, when given.
+        """
         super().__init__(parent=parent)
-        self._controller = EzCVController()
+        self._catalog_loader = catalog_loader
+        self._painted = False
+        self.recent_files = RecentFiles(settings if settings is not None else QSettings('ezcv', 'ezcv-gui'))
+
+        with tracing.phase('controller'):
+            self._controller = EzCVController(disk_cache=disk_cache)
+        with tracing.phase('central widget'):
+            self.central = CentralWidget(self._controller, parent=self)
+        self.latency_label = QLabel(self)
+        self.media_cache_label = QLabel(self)
+        self.loading_bar = QProgressBar(self)
+        self.cancel_loading_button = QToolButton(self)
+        self.test_set = TestSetWidget(self._controller, parent=self)
+        self.test_set_dock = QDockWidget('Test Set', self)
+        self.sweep = SweepWidget(self._controller, parent=self)
+        self.sweep_dock = QDockWidget('Parameter Sweep', self)
+
+        with tracing.phase('main window'):
+            self.init_ui()
+            self.init_menu_bar()
+            self.init_signals()
 
-        self.central = CentralWidget(self._controller, parent=self)
+    def event(self, event: QEvent) -> bool:
+        handled = super().event(event)
+        # Update requests are what top level windows get painted on
+        if event.type() == QEvent.Type.UpdateRequest and not self._painted:
+            self._painted = True
+            tracing.mark('first paint')
+            QTimer.singleShot(0, self.init_deferred)
+        return handled
 
-        self.init_ui()
-        self.init_menu_bar()
-        self.init_signals()
+    def init_deferred(self):
+        with tracing.phase('deferred construction'):
+            if self._catalog_loader is not None:
+                self._controller.catalog = self._catalog_loader()
+            self.central.pipeline.init_add_operator_popup()
+        tracing.finish_trace()
 
     def init_ui(self):
-        self.statusBar()
+        self.statusBar().addPermanentWidget(self.media_cache_label)
+        self.statusBar().addPermanentWidget(self.latency_label)
+        self.loading_bar.setMaximumWidth(200)
+        self.loading_bar.hide()
+        self.statusBar().addPermanentWidget(self.loading_bar)
+        self.cancel_loading_button.setText('Cancel')
+        self.cancel_loading_button.hide()
+        self.statusBar().addPermanentWidget(self.cancel_loading_button)
         self.setWindowTitle('EzCV')
 
         self.setCentralWidget(self.central)
+        self.test_set_dock.setWidget(self.test_set)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.test_set_dock)
+        self.test_set_dock.hide()
+        self.sweep_dock.setWidget(self.sweep)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.sweep_dock)
+        self.tabifyDockWidget(self.test_set_dock, self.sweep_dock)
+        self.sweep_dock.hide()
         self.showMaximized()
 
     def init_menu_bar(self):
@@ -32,22 +95,110 @@ class EzCV(QMainWindow):
         save_action.setShortcut('Ctrl+S')
         save_action.triggered.connect(self.on_save_action)
 
+        open_folder_action = QAction('Open &Folder', self)
+        open_folder_action.triggered.connect(self.on_open_folder_action)
+
+        self.recent_menu = QMenu('Open &Recent', self)
+        self.recent_menu.aboutToShow.connect(self.update_recent_menu)
+
+        next_media_action = QAction('&Next Image', self)
+        next_media_action.setShortcut('Ctrl+Right')
+        next_media_action.triggered.connect(lambda: self._controller.next_media())
+
+        previous_media_action = QAction('&Previous Image', self)
+        previous_media_action.setShortcut('Ctrl+Left')
+        previous_media_action.triggered.connect(lambda: self._controller.previous_media())
+
+        camera_action = QAction('Open &Camera', self)
+        camera_action.triggered.connect(lambda: self._controller.open_camera())
+
+        test_set_action = QAction('Open &Test Set', self)
+        test_set_action.triggered.connect(self.test_set.pick_files_popup)
+
+        export_stats_action = QAction('&Export Timings', self)
+        export_stats_action.triggered.connect(self.on_export_stats_action)
+
+        roi_action = QAction('&Region of Interest Execution', self)
+        roi_action.setCheckable(True)
+        roi_action.setChecked(self._controller.roi_enabled)
+        roi_action.toggled.connect(self.on_roi_toggled)
+
+        tiled_action = QAction('&Tiled Execution', self)
+        tiled_action.setCheckable(True)
+        tiled_action.setChecked(self._controller.tiled_execution)
+        tiled_action.toggled.connect(self.on_tiled_toggled)
+
+        self.push_config_action = QAction('Push Config to &Server', self)
+        self.push_config_action.setCheckable(True)
+        self.push_config_action.toggled.connect(self.on_push_config_toggled)
+
+        full_frame_action = QAction('Run &Full Frame', self)
+        full_frame_action.setShortcut('Ctrl+R')
+        full_frame_action.triggered.connect(lambda: self._controller.process_full_frame())
+
         menubar = self.menuBar()
         menubar.setNativeMenuBar(False)
         file_menu = menubar.addMenu('&File')
         file_menu.addAction(load_action)
         file_menu.addAction(save_action)
+        file_menu.addSeparator()
+        file_menu.addAction(open_folder_action)
+        file_menu.addMenu(self.recent_menu)
+        file_menu.addAction(next_media_action)
+        file_menu.addAction(previous_media_action)
+        file_menu.addSeparator()
+        file_menu.addAction(camera_action)
+        file_menu.addAction(test_set_action)
+        file_menu.addAction(export_stats_action)
+        run_menu = menubar.addMenu('&Run')
+        run_menu.addAction(roi_action)
+        run_menu.addAction(tiled_action)
+        run_menu.addAction(full_frame_action)
+        run_menu.addSeparator()
+        run_menu.addAction(self.push_config_action)
 
     def init_signals(self):
         self._controller.operator_failed.connect(self.on_operator_failed)
         self._controller.loading_failed.connect(self.on_loading_failed)
         self._controller.error.connect(self.on_unexpected_error)
+        self._controller.shown_resolution.connect(self.on_shown_resolution)
+        self._controller.stream_stats.connect(self.on_stream_stats)
+        self._controller.stats_updated.connect(self.on_stats_updated)
+        self._controller.test_set_loaded.connect(self.on_test_set_loaded)
+        self._controller.sweep_started.connect(self.on_sweep_started)
+        self._controller.loading_progress.connect(self.on_loading_progress)
+        self._controller.loading_finished.connect(self.on_loading_finished)
+        self._controller.media_loaded.connect(self.recent_files.add)
+        self._controller.media_cache_stats.connect(self.on_media_cache_stats)
+        self._controller.config_pushed.connect(self.on_config_pushed)
+        self.cancel_loading_button.clicked.connect(self._controller.cancel_loading)
+
+    def closeEvent(self, event: QCloseEvent):
+        self._controller.shutdown()
+        super().closeEvent(event)
 
     def on_load_action(self):
         fname, _ = QFileDialog.getOpenFileName(self, 'Pick Config File', 'config.yaml', 'YAML Files(*.yaml *.yml)')
-        if fname is not None:
+        if fname:
             self._controller.load_config(fname)
 
+    def on_open_folder_action(self):
+        dirname = QFileDialog.getExistingDirectory(self, 'Pick Images Folder', '~')
+        if dirname:
+            self._controller.open_folder(dirname)
+
+    def update_recent_menu(self):
+        self.recent_menu.clear()
+        for fname in self.recent_files.files():
+            action = self.recent_menu.addAction(fname)
+            action.triggered.connect(lambda checked, f=fname: self._controller.load_media(f))
+        self.recent_menu.addSeparator()
+        clear_action = self.recent_menu.addAction('Clear')
+        clear_action.triggered.connect(self.recent_files.clear)
+
+    def on_media_cache_stats(self, stats: MediaCacheStats):
+        self.media_cache_label.setText(str(stats))
+
     def on_operator_failed(self, exception: Exception):
         QMessageBox.critical(self, "Operator Error", str(exception))
 
@@ -59,6 +210,70 @@ class EzCV(QMainWindow):
         msgs = [str(a) for a in exception.args]
         QMessageBox.critical(self, 'Unexpected Error', '\n'.join(msgs))
 
+    def on_shown_resolution(self, width: int, height: int, preview: bool):
+        kind = 'Preview' if preview else 'Full resolution'
+        self.statusBar().showMessage(f'{kind}: {width}x{height}')
+
+    def on_stream_stats(self, stats):
+        self.statusBar().showMessage(str(stats))
+
+    def on_stats_updated(self, stats: PipelineStats):
+        text = f'Pipeline: {stats.last_run.total_seconds * 1000:.1f} ms'
+        if stats.cancelled_runs:
+            text += f' ({stats.cancelled_runs} abandoned for newer edits)'
+        self.latency_label.setText(text)
+
+    def on_test_set_loaded(self, fnames):
+        self.test_set_dock.setVisible(len(fnames) > 0)
+
+    def on_loading_progress(self, message: str, percent: int):
+        self.statusBar().showMessage(message)
+        # A busy indicator when the progress can't be told
+        self.loading_bar.setRange(0, 100 if percent >= 0 else 0)
+        self.loading_bar.setValue(max(percent, 0))
+        self.loading_bar.show()
+        self.cancel_loading_button.show()
+
+    def on_loading_finished(self):
+        self.statusBar().clearMessage()
+        self.loading_bar.hide()
+        self.cancel_loading_button.hide()
+
+    def on_sweep_started(self, *args):
+        self.sweep_dock.show()
+        self.sweep_dock.raise_()
+
+    def on_roi_toggled(self, checked: bool):
+        self._controller.roi_enabled = checked
+
+    def on_tiled_toggled(self, checked: bool):
+        self._controller.tiled_execution = checked
+
+    def on_push_config_toggled(self, checked: bool):
+        if not checked:
+            self._controller.server_address = None
+            return
+        address, ok = QInputDialog.getText(self, 'Push Config to Server', 'Server address (host:port or unix:path):',
+                                           text=default_server_address())
+        if not ok or not address:
+            self.push_config_action.setChecked(False)
+            return
+        self._controller.server_address = address
+
+    def on_config_pushed(self, error: Optional[Exception]):
+        address = self._controller.server_address
+        if address is None:
+            return
+        if error is None:
+            self.statusBar().showMessage(f'Config pushed to {address}', 3000)
+        else:
+            self.statusBar().showMessage(f"Couldn't push the config to {address}: {error}")
+
+    def on_export_stats_action(self):
+        fname, _ = QFileDialog.getSaveFileName(self, 'Export Timings', 'timings.json', 'Timings (*.json *.csv)')
+        if fname:
+            self._controller.export_stats(fname)
+
     def on_save_action(self):
         fname, _ = QFileDialog.getSaveFileName(self, 'Choose File Name', 'config.yaml', 'YAML Files(*.yaml *.yml)')
         if fname is not None:
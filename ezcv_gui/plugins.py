@@ -0,0 +1,17 @@
+import importlib
+from typing import Iterable
+
+import importlib_metadata
+
+
+def load_operators():
+    entry_points = importlib_metadata.entry_points(group='ezcv_operators')
+    for entry_point in entry_points:
+        print(f'Loading operators library "{entry_point.name}"')
+        entry_point.load()
+
+
+def load_includes(includes: Iterable[str]):
+    for include in includes:
+        print(f'Loading module "{include}"')
+        importlib.import_module(include)
@@ -0,0 +1,58 @@
+import math
+from typing import Iterable, Optional, Set, Type
+
+import cv2
+
+from ezcv.operator import Operator
+from ezcv.typing import Image
+
+
+DEFAULT_PREVIEW_PIXELS = 2 * 1024 * 1024
+DEFAULT_THUMBNAIL_PIXELS = 160 * 120
+
+_FULL_RESOLUTION_OPERATORS: Set[Type[Operator]] = set()
+
+
+def full_resolution_only(operator_cls: Type[Operator]) -> Type[Operator]:
+    """ Decorator for marking operators whose result depends on the image scale (e.g. fixed kernel sizes)
+
+    Pipelines holding any of those operators never run on a downscaled preview. Operator libraries that don't depend
+    on ezcv_gui can set a `full_resolution_only = True` class attribute instead.
+    """
+    _FULL_RESOLUTION_OPERATORS.add(operator_cls)
+    return operator_cls
+
+
+def is_full_resolution_only(operator: Operator) -> bool:
+    operator_cls = type(operator)
+    return operator_cls in _FULL_RESOLUTION_OPERATORS or getattr(operator_cls, 'full_resolution_only', False)
+
+
+def supports_preview(operators: Iterable[Operator]) -> bool:
+    return not any(is_full_resolution_only(operator) for operator in operators)
+
+
+def make_proxy(img: Image, max_pixels: int) -> Optional[Image]:
+    """ Downscale `img` so it has at most `max_pixels` pixels, keeping its aspect ratio
+
+    Returns None when the image is already within budget.
+    """
+    height, width = img.shape[:2]
+    if max_pixels <= 0 or height * width <= max_pixels:
+        return None
+    scale = math.sqrt(max_pixels / (height * width))
+    size = (max(int(width * scale), 1), max(int(height * scale), 1))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+
+def make_thumbnail(img: Image, max_pixels: int) -> Image:
+    """ Downscaled copy of `img` with at most `max_pixels` pixels, for any image dtype
+    """
+    try:
+        thumbnail = make_proxy(img, max_pixels)
+    except cv2.error:
+        # Not every dtype can be resized by OpenCV (e.g. bool or int64), pick every n-th pixel instead
+        height, width = img.shape[:2]
+        step = max(math.ceil(math.sqrt(height * width / max(max_pixels, 1))), 1)
+        thumbnail = img[::step, ::step]
+    return thumbnail if thumbnail is not None else img
@@ -0,0 +1,32 @@
+from typing import List
+
+from PyQt6.QtCore import QSettings
+
+
+DEFAULT_MAX_RECENT_FILES = 10
+
+
+class RecentFiles:
+    """ Most recently opened files first, persisted in `settings` across sessions
+    """
+    def __init__(self, settings: QSettings, key: str = 'recent_files', max_files: int = DEFAULT_MAX_RECENT_FILES):
+        self._settings = settings
+        self._key = key
+        self.max_files = max_files
+
+    def files(self) -> List[str]:
+        fnames = self._settings.value(self._key, [])
+        # Single values come back as plain strings from some settings formats
+        if isinstance(fnames, str):
+            fnames = [fnames]
+        return list(fnames or [])
+
+    def add(self, fname: str):
+        fnames = [fname] + [f for f in self.files() if f != fname]
+        self._settings.setValue(self._key, fnames[:self.max_files])
+
+    def remove(self, fname: str):
+        self._settings.setValue(self._key, [f for f in self.files() if f != fname])
+
+    def clear(self):
+        self._settings.remove(self._key)
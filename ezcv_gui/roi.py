@@ -0,0 +1,59 @@
+from typing import Tuple, Optional
+
+from ezcv.typing import Image
+
+
+# x, y, width and height, in media pixels
+Rect = Tuple[int, int, int, int]
+
+# Regions covering more of the media than this aren't worth a run of their own
+ROI_MAX_FRACTION = 0.5
+
+
+class RegionOfInterest:
+    """ Part of the media a run is restricted to
+
+    `region` is what gets shown, `crop` is what the pipeline runs on: the region grown by a halo, so operators looking
+    at pixels neighborhoods (e.g. blurs or morphology) still get the right values on the region's borders. The halo
+    must be at least the pipeline footprint, see `ezcv_gui.tiling.pipeline_footprint`.
+    """
+    def __init__(self, region: Rect, crop: Rect):
+        self.region = region
+        self.crop = crop
+
+    @classmethod
+    def around(cls, region: Rect, halo: int, width: int, height: int) -> 'RegionOfInterest':
+        """ Region clamped to the media size, with a halo of `halo` pixels around it wherever the media allows it
+        """
+        region = _clamp(region, width, height)
+        x, y, w, h = region
+        crop = _clamp((x - halo, y - halo, w + 2 * halo, h + 2 * halo), width, height)
+        return cls(region, crop)
+
+    def crop_media(self, img: Image) -> Image:
+        """ Copy of the crop, as operators are free to change their input in place
+        """
+        x, y, w, h = self.crop
+        return img[y:y + h, x:x + w].copy()
+
+    def extract(self, crop_result: Image) -> Optional[Image]:
+        """ The region out of the pipeline output over the crop. None when the pipeline changed the image geometry,
+        as its output can't be put back in place then
+        """
+        crop_x, crop_y, crop_w, crop_h = self.crop
+        if crop_result.shape[:2] != (crop_h, crop_w):
+            return None
+        x, y, w, h = self.region
+        return crop_result[y - crop_y:y - crop_y + h, x - crop_x:x - crop_x + w]
+
+
+def is_worth_a_roi(region: Rect, width: int, height: int) -> bool:
+    _, _, w, h = _clamp(region, width, height)
+    return 0 < w * h <= width * height * ROI_MAX_FRACTION
+
+
+def _clamp(rect: Rect, width: int, height: int) -> Rect:
+    x, y, w, h = rect
+    left, top = max(x, 0), max(y, 0)
+    right, bottom = min(x + w, width), min(y + h, height)
+    return left, top, max(right - left, 0), max(bottom - top, 0)
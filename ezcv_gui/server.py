@@ -0,0 +1,611 @@
+import http.client
+import http.server
+import io
+import ipaddress
+import itertools
+import json
+import os
+import re
+import secrets
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, Union, Dict, Any, Iterator
+
+import numpy as np
+import yaml
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ezcv import CompVizPipeline
+from ezcv.exceptions import OperatorFailedError, ConfigParsingError
+from ezcv.operator import Operator
+from ezcv.typing import Image
+from ezcv_gui.engine import run_stages
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    # Python < 3.8, images can only be sent in the requests bodies
+    shared_memory = None
+
+
+DEFAULT_TCP_ADDRESS = 'localhost:8765'
+# Idle time after which kept alive connections are closed, so they don't hold on to a worker forever
+KEEP_ALIVE_SECONDS = 5
+
+SHAPE_HEADER = 'X-Shape'
+DTYPE_HEADER = 'X-Dtype'
+INPUT_SHM_HEADER = 'X-Input-Shm'
+OUTPUT_SHM_HEADER = 'X-Output-Shm'
+TIMING_HEADER = 'X-Timing'
+CONFIG_VERSION_HEADER = 'X-Config-Version'
+
+# Shared memory blocks the server reads and writes must be named after a client token, so it can't be made to touch
+# the other blocks of its user
+SHM_PREFIX = 'ezcv_'
+_SHM_NAME_PATTERN = re.compile(r'/?ezcv_[0-9a-f]{16}_\d+')
+
+Address = Union[str, Tuple[str, int]]
+
+
+def default_server_address() -> str:
+    """ A Unix socket in the user's runtime directory, or a localhost port where there are no Unix sockets
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return DEFAULT_TCP_ADDRESS
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir:
+        # Private to the user, as the socket lets anyone who can reach it run the loaded operators
+        runtime_dir = os.path.join(tempfile.gettempdir(), f'ezcv-gui-{os.getuid()}')
+        os.makedirs(runtime_dir, mode=0o700, exist_ok=True)
+        dir_stat = os.lstat(runtime_dir)
+        if dir_stat.st_uid != os.getuid() or dir_stat.st_mode & 0o077 or not stat.S_ISDIR(dir_stat.st_mode):
+            raise PermissionError(f'{runtime_dir} is accessible to other users')
+    return f'unix:{os.path.join(runtime_dir, "ezcv-gui.sock")}'
+
+
+class ServerError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f'{status}: {message}')
+        self.status = status
+        self.message = message
+
+
+def parse_address(address: str) -> Address:
+    """ `unix:PATH` for a Unix socket, or `host:port` for TCP
+    """
+    if address.startswith('unix:'):
+        return address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+def format_address(address: Address) -> str:
+    if isinstance(address, str):
+        return f'unix:{address}'
+    host, port = address[:2]
+    return f'{host}:{port}'
+
+
+class PipelineServer:
+    """ Runs a pipeline over images sent by other processes on the same machine, over HTTP on a local TCP port or a
+    Unix socket
+
+    `POST /process` takes the raw pixels of an image, either as the request body or in a shared memory block named by
+    the `X-Input-Shm` header, with their `X-Shape` and `X-Dtype`. The output comes back the same way: in the response
+    body, or in the shared memory block named by `X-Output-Shm` when it's big enough. Every response carries the
+    timings of its run in `X-Timing`, as JSON.
+
+    `PUT /config` replaces the pipeline and `GET /config` returns it. Requests are served by a pool of `workers`
+    threads, each one with its own copy of the pipeline, loaded again only when the config changes.
+
+    There's no authentication, so the server only listens on loopback addresses or on Unix sockets only its user can
+    connect to. Pushed configs may only use operators from the libraries that were already imported, and shared memory
+    blocks must be named after a client token (see `PipelineClient`).
+    """
+    def __init__(self, address: Optional[str] = None, config: Optional[str] = None,
+                 workers: Optional[int] = None):
+        self._lock = threading.Lock()
+        self._config = ''
+        self._version = 0
+        self._local = threading.local()
+        self.set_config(config if config is not None else _empty_config())
+
+        self._executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                            thread_name_prefix='ezcv-server')
+        bind_address = parse_address(address if address is not None else default_server_address())
+        if isinstance(bind_address, str):
+            _remove_stale_socket(bind_address)
+            server_cls = _UnixServer
+        else:
+            _check_loopback(bind_address[0])
+            server_cls = _TCPServer
+        self._server = server_cls(bind_address, _RequestHandler, self)
+
+    @property
+    def address(self) -> str:
+        return format_address(self._server.server_address)
+
+    @property
+    def config(self) -> str:
+        return self._config
+
+    @property
+    def config_version(self) -> int:
+        return self._version
+
+    def set_config(self, config: str):
+        """ Replace the pipeline. Raises `ConfigParsingError` when the config can't be loaded
+        """
+        CompVizPipeline.load(io.StringIO(config))
+        with self._lock:
+            self._config = config
+            self._version += 1
+
+    def process(self, img: Image) -> Tuple[Image, Dict[str, Any]]:
+        """ Run the pipeline over `img`, returning its output along with the timings of the run
+        """
+        start = time.perf_counter()
+        timings = list()
+        img = run_stages(list(self._worker_pipeline().operators.items()), img, timings=timings)
+        return img, _timing_dict(timings, time.perf_counter() - start)
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """ Stop `serve_forever`, from another thread, and release the address
+        """
+        self._server.shutdown()
+        self.close()
+
+    def close(self):
+        self._server.server_close()
+        self._executor.shutdown(wait=False)
+        if isinstance(self._server.server_address, str):
+            _remove_stale_socket(self._server.server_address, check_alive=False)
+
+    def _worker_pipeline(self) -> CompVizPipeline:
+        """ This thread's own copy of the pipeline, for the current config
+        """
+        local = self._local
+        with self._lock:
+            config, version = self._config, self._version
+        if getattr(local, 'version', None) != version:
+            local.pipeline = CompVizPipeline.load(io.StringIO(config))
+            local.version = version
+        return local.pipeline
+
+
+class _PooledMixIn:
+    """ Serves every connection on the pipeline server's worker pool
+    """
+    def __init__(self, server_address: Address, handler_cls, pipeline_server: PipelineServer):
+        self.pipeline_server = pipeline_server
+        super().__init__(server_address, handler_cls)
+
+    def process_request(self, request, client_address):
+        self.pipeline_server._executor.submit(self._process_request_in_pool, request, client_address)
+
+    def _process_request_in_pool(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except ConnectionError:
+            # Clients are free to go away at any time
+            pass
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class _TCPServer(_PooledMixIn, http.server.HTTPServer):
+    allow_reuse_address = True
+
+
+class _UnixServer(_PooledMixIn, socketserver.UnixStreamServer):
+    def server_bind(self):
+        super().server_bind()
+        os.chmod(self.server_address, 0o600)
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_SECONDS
+    server: _PooledMixIn
+
+    def do_GET(self):
+        if self.path != '/config':
+            self._send_error(404, f'Unknown path {self.path}')
+            return
+        pipeline_server = self.server.pipeline_server
+        self._send(200, pipeline_server.config.encode(),
+                   {CONFIG_VERSION_HEADER: str(pipeline_server.config_version)})
+
+    def do_PUT(self):
+        if self.path != '/config':
+            self._send_error(404, f'Unknown path {self.path}')
+            return
+        pipeline_server = self.server.pipeline_server
+        try:
+            config = self._read_body().decode()
+            check_imported_operators(config)
+            pipeline_server.set_config(config)
+        except ConfigParsingError as e:
+            self._send_error(400, '\n'.join(str(a) for a in e.args))
+            return
+        except Exception as e:
+            # Malformed YAML and the likes
+            self._send_error(400, f'{type(e).__name__}: {e}')
+            return
+        self._send(200, b'', {CONFIG_VERSION_HEADER: str(pipeline_server.config_version)})
+
+    def do_POST(self):
+        if self.path != '/process':
+            self._send_error(404, f'Unknown path {self.path}')
+            return
+        body = self._read_body()
+        output_shm = self.headers.get(OUTPUT_SHM_HEADER)
+        try:
+            if output_shm:
+                _check_shared_name(output_shm)
+            img = self._read_image(body)
+        except (KeyError, ValueError, TypeError, FileNotFoundError) as e:
+            self._send_error(400, f"Couldn't read the image: {e}")
+            return
+        pipeline_server = self.server.pipeline_server
+        version = pipeline_server.config_version
+        try:
+            result, timing = pipeline_server.process(img)
+        except OperatorFailedError as e:
+            self._send_error(422, str(e))
+            return
+        except Exception as e:
+            print(traceback.format_exc())
+            self._send_error(500, f'{type(e).__name__}: {e}')
+            return
+        result = np.ascontiguousarray(result)
+        headers = {
+            SHAPE_HEADER: ','.join(str(d) for d in result.shape),
+            DTYPE_HEADER: result.dtype.str,
+            TIMING_HEADER: json.dumps(timing),
+            CONFIG_VERSION_HEADER: str(version),
+        }
+        if output_shm and _write_shared(output_shm, result):
+            headers[OUTPUT_SHM_HEADER] = output_shm
+            self._send(200, b'', headers)
+        else:
+            self._send(200, result.data, headers)
+
+    def log_message(self, format, *args):
+        # One line per frame would only be noise
+        pass
+
+    def _read_image(self, body: bytearray) -> Image:
+        shape = tuple(int(d) for d in self.headers[SHAPE_HEADER].split(','))
+        dtype = np.dtype(self.headers[DTYPE_HEADER])
+        if dtype.hasobject:
+            raise TypeError(f'{dtype} images are not supported')
+        input_shm = self.headers.get(INPUT_SHM_HEADER)
+        if input_shm:
+            _check_shared_name(input_shm)
+            return _read_shared(input_shm, shape, dtype)
+        # The pipeline is free to work in place, so the image can't be a read-only view over the body
+        return np.frombuffer(body, dtype=dtype).reshape(shape)
+
+    def _read_body(self) -> bytearray:
+        length = int(self.headers.get('Content-Length', 0))
+        body = bytearray(length)
+        if length:
+            self.rfile.readinto(body)
+        return body
+
+    def _send(self, status: int, body, headers: Dict[str, str]):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        nbytes = len(body) if isinstance(body, bytes) else body.nbytes
+        self.send_header('Content-Length', str(nbytes))
+        self.end_headers()
+        if nbytes:
+            self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str):
+        self._send(status, message.encode(), {'Content-Type': 'text/plain; charset=utf-8'})
+
+
+class PipelineClient:
+    """ Talks to a `PipelineServer`, over a single connection, kept alive between requests. Not thread safe: use one
+    client per thread
+
+    With `use_shared_memory`, images go through shared memory blocks rather than through the socket. The blocks are
+    kept between requests and grown as needed, and are named after a random token of the client.
+    """
+    def __init__(self, address: Optional[str] = None, use_shared_memory: bool = False,
+                 timeout: Optional[float] = None):
+        if use_shared_memory and shared_memory is None:
+            raise ValueError('Shared memory needs Python 3.8 or newer')
+        self.address = address if address is not None else default_server_address()
+        self.use_shared_memory = use_shared_memory
+        self._timeout = timeout
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._input_shm = None
+        self._output_shm = None
+        token = secrets.token_hex(8)
+        self._shm_names = (f'{SHM_PREFIX}{token}_{i}' for i in itertools.count())
+
+    def process(self, img: Image) -> Tuple[Image, Dict[str, Any]]:
+        """ The pipeline output over `img`, along with the timings of the run
+        """
+        img = np.ascontiguousarray(img)
+        headers = {SHAPE_HEADER: ','.join(str(d) for d in img.shape), DTYPE_HEADER: img.dtype.str}
+        body = img.data
+        if self.use_shared_memory:
+            self._input_shm = _ensure_shared(self._input_shm, img.nbytes, self._shm_names)
+            np.ndarray(img.shape, img.dtype, buffer=self._input_shm.buf)[...] = img
+            # Outputs are often about as big as inputs, the ones that aren't come back in the response body
+            self._output_shm = _ensure_shared(self._output_shm, img.nbytes, self._shm_names)
+            headers[INPUT_SHM_HEADER] = self._input_shm.name
+            headers[OUTPUT_SHM_HEADER] = self._output_shm.name
+            body = b''
+        response, data = self._request('POST', '/process', body, headers)
+        shape = tuple(int(d) for d in response.getheader(SHAPE_HEADER).split(',') if d)
+        dtype = np.dtype(response.getheader(DTYPE_HEADER))
+        timing = json.loads(response.getheader(TIMING_HEADER))
+        if response.getheader(OUTPUT_SHM_HEADER):
+            result = np.ndarray(shape, dtype, buffer=self._output_shm.buf).copy()
+        else:
+            result = np.frombuffer(data, dtype=dtype).reshape(shape)
+        return result, timing
+
+    def push_config(self, config: str) -> int:
+        """ Replace the server's pipeline, returning the new config version
+        """
+        response, _ = self._request('PUT', '/config', config.encode(), {})
+        return int(response.getheader(CONFIG_VERSION_HEADER))
+
+    def get_config(self) -> str:
+        _, data = self._request('GET', '/config', None, {})
+        return data.decode()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        for shm in (self._input_shm, self._output_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._input_shm = self._output_shm = None
+
+    def _request(self, method: str, path: str, body, headers: Dict[str, str]):
+        # A kept alive connection may have been closed by the server since, so requests are retried once
+        for attempt in range(2):
+            connection = self._get_connection()
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                self._connection.close()
+                self._connection = None
+                if attempt > 0:
+                    raise
+        if response.status != 200:
+            raise ServerError(response.status, data.decode(errors='replace'))
+        return response, data
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            address = parse_address(self.address)
+            if isinstance(address, str):
+                self._connection = _UnixHTTPConnection(address, timeout=self._timeout)
+            else:
+                self._connection = http.client.HTTPConnection(*address, timeout=self._timeout)
+        return self._connection
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class ConfigPusher(QObject):
+    """ Pushes pipeline configs to a server on a background thread, so the GUI doesn't wait on it
+
+    Only the newest config matters: configs pushed while another one is still on its way replace each other, and
+    pushing the config the server already has does nothing.
+    """
+    # None on success, otherwise the error
+    pushed = pyqtSignal(object)
+
+    def __init__(self, address: str, parent=None):
+        super().__init__(parent)
+        self.address = address
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ezcv-config-push')
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._config: Optional[str] = None
+        self._shutdown = False
+
+    def push(self, config: str):
+        with self._lock:
+            if config == self._config:
+                return
+            self._config = config
+            self._generation += 1
+            generation = self._generation
+        self._executor.submit(self._push, generation, config)
+
+    def shutdown(self):
+        with self._lock:
+            self._shutdown = True
+        self._executor.shutdown(wait=False)
+
+    def _push(self, generation: int, config: str):
+        if generation != self._generation:
+            return
+        client = PipelineClient(self.address, timeout=KEEP_ALIVE_SECONDS)
+        error = None
+        try:
+            client.push_config(config)
+        except (OSError, ServerError, http.client.HTTPException) as e:
+            error = e
+            with self._lock:
+                # Pushed again on the next change
+                if generation == self._generation:
+                    self._config = None
+        finally:
+            client.close()
+        with self._lock:
+            if self._shutdown:
+                return
+            try:
+                self.pushed.emit(error)
+            except RuntimeError:
+                # The pusher was deleted while pushing
+                pass
+
+
+def _empty_config() -> str:
+    with io.StringIO() as fout:
+        CompVizPipeline().save(fout)
+        return fout.getvalue()
+
+
+def _timing_dict(timings, total_seconds: float) -> Dict[str, Any]:
+    return {'total_seconds': total_seconds, 'stages': [timing.to_dict() for timing in timings]}
+
+
+def _check_loopback(host: str):
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)}
+    except socket.gaierror as e:
+        raise ValueError(f"Couldn't resolve {host}: {e}")
+    for address in addresses:
+        # Scoped IPv6 addresses come with a %interface suffix
+        if not ipaddress.ip_address(address.split('%')[0]).is_loopback:
+            raise ValueError(f"{host} isn't a loopback address, the server can't be reached from other machines")
+
+
+def _remove_stale_socket(path: str, check_alive: bool = True):
+    """ Remove a socket left behind by a server that didn't shut down cleanly. Anything else at `path` is an error
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} already exists and isn't a socket")
+    if check_alive:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(path)
+            except OSError:
+                pass
+            else:
+                raise OSError(f'Another server is already listening on {path}')
+    os.remove(path)
+
+
+def check_imported_operators(config: str):
+    """ Raise `ConfigParsingError` unless every operator of the config is an `Operator` from an already imported
+    module. Loading a config imports its operators modules and instantiates them, which mustn't be left to whoever
+    can push one
+    """
+    try:
+        data = yaml.safe_load(config)
+    except yaml.YAMLError as e:
+        raise ConfigParsingError(str(e))
+    for implementation in _find_values(data, 'implementation'):
+        module_name, _, cls_name = str(implementation).rpartition('.')
+        if not module_name:
+            # Operators referred to by name are looked up among the ones ezcv knows, without importing anything
+            continue
+        module = sys.modules.get(module_name)
+        operator_cls = getattr(module, cls_name, None) if module is not None else None
+        if module is None:
+            raise ConfigParsingError(f'{implementation} is from a library the server did not load. Pass it with '
+                                     f'--include when starting the server')
+        if not (isinstance(operator_cls, type) and issubclass(operator_cls, Operator)):
+            raise ConfigParsingError(f"{implementation} isn't an operator")
+
+
+def _find_values(data, key: str) -> Iterator[Any]:
+    if isinstance(data, dict):
+        for k, v in data.items():
+            if k == key:
+                yield v
+            else:
+                yield from _find_values(v, key)
+    elif isinstance(data, list):
+        for item in data:
+            yield from _find_values(item, key)
+
+
+def _check_shared_name(name: str):
+    if not _SHM_NAME_PATTERN.fullmatch(name):
+        raise ValueError(f'Shared memory block names must look like {SHM_PREFIX}<16 hex digits token>_<number>')
+
+
+def _attach_shared(name: str):
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        # Attaching registers the block with this process' resource tracker, which would unlink it on exit, while
+        # it belongs to the client
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _read_shared(name: str, shape: Tuple[int, ...], dtype: np.dtype) -> Image:
+    if shared_memory is None:
+        raise ValueError('Shared memory needs Python 3.8 or newer')
+    shm = _attach_shared(name)
+    try:
+        if int(np.prod(shape)) * dtype.itemsize > shm.size:
+            raise ValueError(f'Shared memory block {name} is smaller than a {shape} {dtype} image')
+        # Copied, as the pipeline is free to work in place and the block is the client's
+        return np.ndarray(shape, dtype, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+
+def _write_shared(name: str, img: Image) -> bool:
+    """ Copy `img` into a shared memory block. False when the block isn't big enough
+    """
+    if shared_memory is None:
+        return False
+    try:
+        shm = _attach_shared(name)
+    except (FileNotFoundError, ValueError):
+        return False
+    try:
+        if img.nbytes > shm.size:
+            return False
+        np.ndarray(img.shape, img.dtype, buffer=shm.buf)[...] = img
+        return True
+    finally:
+        shm.close()
+
+
+def _ensure_shared(shm, nbytes: int, names: Iterator[str]):
+    if shm is not None and shm.size >= nbytes:
+        return shm
+    if shm is not None:
+        shm.close()
+        shm.unlink()
+    return shared_memory.SharedMemory(name=next(names), create=True, size=max(nbytes, 1))
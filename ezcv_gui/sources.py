@@ -0,0 +1,165 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Optional, Union
+
+import cv2
+import numpy as np
+
+from ezcv.typing import Image
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.mpg', '.mpeg')
+
+
+class MediaSource:
+    """ Stream of frames, read in order until it's exhausted
+    """
+    # Frames per second the source should be consumed at. None means as fast as they come
+    fps: Optional[float] = None
+
+    def read(self) -> Optional[Image]:
+        """ Next frame, or None when there are no frames left
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class VideoCaptureSource(MediaSource):
+    """ Video file or capture device (e.g. a V4L2 camera index) opened through `cv2.VideoCapture`
+    """
+    def __init__(self, source: Union[str, int]):
+        self._capture = cv2.VideoCapture(source)
+        if not self._capture.isOpened():
+            raise ValueError(f"Couldn't open video source {source}")
+        # Live devices pace themselves, files have to be paced at their own rate
+        fps = self._capture.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if isinstance(source, str) and fps > 0 else None
+
+    def read(self) -> Optional[Image]:
+        ok, frame = self._capture.read()
+        return frame if ok else None
+
+    def close(self):
+        self._capture.release()
+
+
+class SyntheticSource(MediaSource):
+    """ Generated frames, for testing without any video file or device
+
+    Frames show a gradient moving one pixel per frame, and their top left pixel holds the frame index (mod 256).
+    """
+    def __init__(self, width: int = 640, height: int = 480, frames_count: Optional[int] = None,
+                 fps: Optional[float] = None):
+        self.fps = fps
+        self._frames_count = frames_count
+        self._index = 0
+        self._gradient = np.tile(np.arange(width, dtype=np.uint16), (height, 1))
+
+    def read(self) -> Optional[Image]:
+        if self._frames_count is not None and self._index >= self._frames_count:
+            return None
+        channel = ((self._gradient + self._index) % 256).astype(np.uint8)
+        frame = np.dstack([channel, channel[::-1], 255 - channel])
+        frame[0, 0] = self._index % 256
+        self._index += 1
+        return frame
+
+
+class RateMeter:
+    """ Events per second over a sliding window
+    """
+    def __init__(self, window: float = 1.0):
+        self._window = window
+        self._timestamps = deque()
+        self._lock = threading.Lock()
+
+    def tick(self):
+        now = time.perf_counter()
+        with self._lock:
+            self._timestamps.append(now)
+            self._trim(now)
+
+    def rate(self) -> float:
+        with self._lock:
+            self._trim(time.perf_counter())
+            return len(self._timestamps) / self._window
+
+    def _trim(self, now: float):
+        while self._timestamps and now - self._timestamps[0] > self._window:
+            self._timestamps.popleft()
+
+
+class StreamStats:
+    def __init__(self, decode_fps: float, processing_fps: float, dropped_frames: int):
+        self.decode_fps = decode_fps
+        self.processing_fps = processing_fps
+        self.dropped_frames = dropped_frames
+
+    def __str__(self):
+        return (f'Decoding {self.decode_fps:.1f} fps | Processing {self.processing_fps:.1f} fps | '
+                f'Dropped {self.dropped_frames} frames')
+
+
+class FrameGrabber:
+    """ Reads a media source on its own thread, into a bounded queue
+
+    When the queue is full the oldest frame is dropped, so consumers that fall behind always get the newest frames.
+    """
+    def __init__(self, source: MediaSource, queue_size: int = 2):
+        self.source = source
+        self.dropped_frames = 0
+        self.decode_rate = RateMeter()
+        self._frames = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._read_loop, name='ezcv-frame-grabber', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.source.close()
+
+    @property
+    def finished(self) -> bool:
+        """ Whether the source is exhausted and every frame was consumed
+        """
+        return self._finished.is_set() and self._frames.empty()
+
+    def latest_frame(self) -> Optional[Image]:
+        """ Newest decoded frame, dropping the older ones. None if no new frame was decoded since last call
+        """
+        frame = None
+        with self._lock:
+            while True:
+                try:
+                    newer = self._frames.get_nowait()
+                except queue.Empty:
+                    return frame
+                if frame is not None:
+                    self.dropped_frames += 1
+                frame = newer
+
+    def _read_loop(self):
+        next_frame_time = time.perf_counter()
+        while not self._stop.is_set():
+            frame = self.source.read()
+            if frame is None:
+                break
+            self.decode_rate.tick()
+            with self._lock:
+                if self._frames.full():
+                    self._frames.get_nowait()
+                    self.dropped_frames += 1
+                self._frames.put_nowait(frame)
+            if self.source.fps:
+                next_frame_time += 1 / self.source.fps
+                self._stop.wait(max(next_frame_time - time.perf_counter(), 0))
+        self._finished.set()
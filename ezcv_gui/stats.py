@@ -0,0 +1,118 @@
+import csv
+import json
+import os
+from collections import deque
+from typing import List, Optional, Tuple, TextIO, Deque, Dict
+
+
+class StageTiming:
+    """ Timing of a single stage of a run. Stages resumed from cache weren't run, so they're flagged as cached
+    """
+    def __init__(self, name: str, seconds: float, shape: Tuple[int, ...], dtype: str, nbytes: int,
+                 cached: bool = False):
+        self.name = name
+        self.seconds = seconds
+        self.shape = shape
+        self.dtype = dtype
+        self.nbytes = nbytes
+        self.cached = cached
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'seconds': self.seconds,
+            'shape': list(self.shape),
+            'dtype': self.dtype,
+            'nbytes': self.nbytes,
+            'cached': self.cached,
+        }
+
+
+class RunTiming:
+    def __init__(self, stages: List[StageTiming], total_seconds: float):
+        self.stages = stages
+        self.total_seconds = total_seconds
+
+
+class StageSummary:
+    def __init__(self, name: str, last: StageTiming, seconds: List[float]):
+        self.name = name
+        self.last = last
+        self.runs_count = len(seconds)
+        self.mean_seconds = sum(seconds) / len(seconds) if seconds else 0.0
+        self.max_seconds = max(seconds) if seconds else 0.0
+
+    def __str__(self):
+        shape = 'x'.join(str(d) for d in self.last.shape)
+        return (
+            f'Last: {self.last.seconds * 1000:.1f} ms{" (cached)" if self.last.cached else ""}\n'
+            f'Mean: {self.mean_seconds * 1000:.1f} ms | Max: {self.max_seconds * 1000:.1f} ms '
+            f'over {self.runs_count} run(s)\n'
+            f'Output: {shape} {self.last.dtype}, {self.last.nbytes / (1024 * 1024):.1f} MB'
+        )
+
+
+class PipelineStats:
+    """ Rolling window of the latest runs' timings, along with how many runs were abandoned for newer ones
+    """
+    def __init__(self, window: int = 100):
+        self._runs: Deque[RunTiming] = deque(maxlen=window)
+        self.cancelled_runs = 0
+
+    def add_run(self, run: RunTiming):
+        self._runs.append(run)
+
+    def add_cancelled_run(self):
+        self.cancelled_runs += 1
+
+    def clear(self):
+        self._runs.clear()
+        self.cancelled_runs = 0
+
+    @property
+    def runs(self) -> List[RunTiming]:
+        return list(self._runs)
+
+    @property
+    def last_run(self) -> Optional[RunTiming]:
+        return self._runs[-1] if self._runs else None
+
+    def stage_summaries(self) -> Dict[str, StageSummary]:
+        """ Summaries of every stage's timings, by name, in a single pass over the runs. Runs where a stage came from
+        cache don't count
+        """
+        lasts: Dict[str, StageTiming] = dict()
+        seconds: Dict[str, List[float]] = dict()
+        for run in self._runs:
+            for stage in run.stages:
+                lasts[stage.name] = stage
+                stage_seconds = seconds.setdefault(stage.name, [])
+                if not stage.cached:
+                    stage_seconds.append(stage.seconds)
+        return {name: StageSummary(name, last, seconds[name]) for name, last in lasts.items()}
+
+    def to_json(self, fout: TextIO):
+        runs = [
+            {'total_seconds': run.total_seconds, 'stages': [stage.to_dict() for stage in run.stages]}
+            for run in self._runs
+        ]
+        json.dump({'runs': runs, 'cancelled_runs': self.cancelled_runs}, fout, indent=2)
+
+    def to_csv(self, fout: TextIO):
+        writer = csv.writer(fout)
+        writer.writerow(['run', 'stage_index', 'name', 'seconds', 'shape', 'dtype', 'nbytes', 'cached'])
+        for run_idx, run in enumerate(self._runs):
+            for stage_idx, stage in enumerate(run.stages):
+                shape = 'x'.join(str(d) for d in stage.shape)
+                writer.writerow([run_idx, stage_idx, stage.name, stage.seconds, shape, stage.dtype, stage.nbytes,
+                                 int(stage.cached)])
+
+    def export(self, fname: str):
+        """ Write the stats to a JSON or CSV file, depending on the file extension
+        """
+        writers = {'.json': self.to_json, '.csv': self.to_csv}
+        ext = os.path.splitext(fname)[1].lower()
+        if ext not in writers:
+            raise ValueError(f'Unsupported stats file format "{ext}". Use .json or .csv')
+        with open(fname, 'w', newline='') as fout:
+            writers[ext](fout)
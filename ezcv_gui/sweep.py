@@ -0,0 +1,160 @@
+import copy
+import math
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any, Optional, Sequence, Hashable
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ezcv import CompVizPipeline
+from ezcv.operator import ParameterSpec, IntegerParameter, DoubleParameter, EnumParameter, BooleanParameter
+from ezcv.typing import Image
+from ezcv_gui.cache import LRUCache
+from ezcv_gui.engine import Stage, RunCancelled, run_stages, snapshot_stages, pipeline_context
+from ezcv_gui.preview import make_thumbnail, DEFAULT_THUMBNAIL_PIXELS
+
+
+DEFAULT_MAX_SWEEP_VALUES = 24
+
+
+def is_sweepable(param: ParameterSpec) -> bool:
+    return isinstance(param, (IntegerParameter, DoubleParameter, EnumParameter, BooleanParameter))
+
+
+def sweep_values(param: ParameterSpec, max_values: int = DEFAULT_MAX_SWEEP_VALUES) -> List[Any]:
+    """ Values a parameter can take, from its spec
+
+    Numeric ranges go from `lower` to `upper` in `step_size` steps. Ranges with more than `max_values` values are
+    sampled evenly, always keeping both ends.
+    """
+    if isinstance(param, EnumParameter):
+        return list(param.possible_values)
+    if isinstance(param, BooleanParameter):
+        return [False, True]
+    if not isinstance(param, (IntegerParameter, DoubleParameter)):
+        raise ValueError(f"{type(param).__name__} parameters can't be swept")
+
+    step = param.step_size if param.step_size else 1
+    count = int(math.floor((param.upper - param.lower) / step + 1e-9)) + 1
+    if count <= max_values:
+        indexes = range(count)
+    else:
+        indexes = sorted(set(int(i) for i in np.linspace(0, count - 1, max_values).round()))
+    if isinstance(param, DoubleParameter):
+        return [round(param.lower + i * step, 10) for i in indexes]
+    return [int(param.lower + i * step) for i in indexes]
+
+
+class SweepResult:
+    """ Pipeline output for one of the values of a sweep, or the error it failed with
+    """
+    def __init__(self, generation: int, index: int, value: Any, image: Optional[Image] = None,
+                 thumbnail: Optional[Image] = None, error: Optional[Exception] = None, seconds: float = 0.0):
+        self.generation = generation
+        self.index = index
+        self.value = value
+        self.image = image
+        self.thumbnail = thumbnail
+        self.error = error
+        self.seconds = seconds
+
+
+class ParameterSweep(QObject):
+    """ Runs a pipeline over the same media once per value of one operator parameter, in parallel
+
+    The stages before the swept operator are run once, resuming from `cache` when their output is already there, and
+    their output is shared by every value. Only the swept operator and the ones after it run for each value, each
+    value on its own copy of them. Starting another sweep drops what's left of the previous one.
+    """
+    value_finished = pyqtSignal(object)
+
+    def __init__(self, workers: Optional[int] = None, thumbnail_pixels: int = DEFAULT_THUMBNAIL_PIXELS,
+                 parent=None):
+        super().__init__(parent)
+        self.thumbnail_pixels = thumbnail_pixels
+        self._executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                            thread_name_prefix='ezcv-sweep')
+        self._lock = threading.RLock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def submit(self, pipeline: CompVizPipeline, operator_name: str, param_name: str, values: Sequence[Any],
+               media: Image, cache: Optional[LRUCache] = None, media_key: Optional[Hashable] = None) -> int:
+        stages = snapshot_stages(pipeline)
+        swept_index = next((i for i, (name, _) in enumerate(stages) if name == operator_name), None)
+        if swept_index is None:
+            raise ValueError(f'There is no operator named "{operator_name}"')
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._executor.submit(self._run_upstream, generation, stages, swept_index, param_name, list(values), media,
+                              cache, media_key)
+        return generation
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _run_upstream(self, generation: int, stages: List[Stage], swept_index: int, param_name: str,
+                      values: List[Any], media: Image, cache: Optional[LRUCache], media_key: Optional[Hashable]):
+        if generation != self._generation:
+            return
+        try:
+            # Made for the media, as the operators after the swept one run over the upstream output
+            ctx = pipeline_context(media)
+            upstream_img = run_stages(stages[:swept_index], media, cache, media_key,
+                                      should_cancel=lambda: generation != self._generation, ctx=ctx)
+        except RunCancelled:
+            return
+        except Exception as e:
+            print(traceback.format_exc())
+            for index, value in enumerate(values):
+                self._emit(SweepResult(generation, index, value, error=e))
+            return
+        downstream = stages[swept_index:]
+        for index, value in enumerate(values):
+            self._executor.submit(self._run_value, generation, index, downstream, param_name, value, upstream_img,
+                                  copy.copy(ctx))
+
+    def _run_value(self, generation: int, index: int, downstream: List[Stage], param_name: str, value: Any,
+                   upstream_img: Image, ctx: Any):
+        if generation != self._generation:
+            return
+        start = time.perf_counter()
+        try:
+            stages = copy.deepcopy(downstream)
+            setattr(stages[0][1], param_name, value)
+            # The upstream output is shared by every value, and operators are free to work in place
+            img = run_stages(stages, upstream_img.copy(), should_cancel=lambda: generation != self._generation,
+                             ctx=ctx)
+            result = SweepResult(generation, index, value, image=img,
+                                 thumbnail=make_thumbnail(img, self.thumbnail_pixels),
+                                 seconds=time.perf_counter() - start)
+        except RunCancelled:
+            return
+        except Exception as e:
+            print(traceback.format_exc())
+            result = SweepResult(generation, index, value, error=e, seconds=time.perf_counter() - start)
+        self._emit(result)
+
+    def _emit(self, result: SweepResult):
+        with self._lock:
+            # Checked under the lock, so nothing is emitted once a newer sweep started or `shutdown` returned
+            if result.generation != self._generation:
+                return
+            try:
+                self.value_finished.emit(result)
+            except RuntimeError:
+                # The sweep was deleted while running
+                pass
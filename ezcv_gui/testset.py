@@ -0,0 +1,170 @@
+import copy
+import itertools
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError, TimeoutError
+from typing import List, Optional, Sequence
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ezcv import CompVizPipeline
+from ezcv.typing import Image
+from ezcv_gui.cache import LRUCache
+from ezcv_gui.engine import Stage, RunCancelled, run_stages, snapshot_stages
+from ezcv_gui.preview import make_proxy, make_thumbnail, supports_preview, DEFAULT_THUMBNAIL_PIXELS
+
+
+DEFAULT_TEST_SET_PIXELS = 1024 * 1024
+DEFAULT_TEST_SET_CACHE_BYTES = 512 * 1024 * 1024
+
+
+class TestSetResult:
+    """ Pipeline output over one image of the test set, or the error it failed with
+    """
+    # Not a pytest test class, despite the name
+    __test__ = False
+
+    def __init__(self, generation: int, index: int, image: Optional[Image] = None,
+                 thumbnail: Optional[Image] = None, error: Optional[Exception] = None, seconds: float = 0.0):
+        self.generation = generation
+        self.index = index
+        self.image = image
+        self.thumbnail = thumbnail
+        self.error = error
+        self.seconds = seconds
+
+
+class TestSetRunner(QObject):
+    """ Runs a pipeline over a set of images on a thread pool, handing back each image's result as soon as it's done
+
+    Every submission gets a newer generation. Runs of older generations that haven't started yet are cancelled and
+    those still running are abandoned before their next stage, so only the newest pipeline state keeps the workers
+    busy. Each worker thread runs its own copy of the pipeline, made once per generation, as operators aren't meant to
+    be shared between threads.
+
+    Images bigger than `max_pixels` are run downscaled, unless the pipeline has operators that need the full
+    resolution. Stages outputs are cached per image, so editing a stage only reruns the stages after it.
+    """
+    __test__ = False
+
+    image_finished = pyqtSignal(object)
+
+    def __init__(self, workers: Optional[int] = None, max_pixels: int = DEFAULT_TEST_SET_PIXELS,
+                 cache_bytes: int = DEFAULT_TEST_SET_CACHE_BYTES, thumbnail_pixels: int = DEFAULT_THUMBNAIL_PIXELS,
+                 parent=None):
+        super().__init__(parent)
+        self.max_pixels = max_pixels
+        self.thumbnail_pixels = thumbnail_pixels
+        self.fnames: List[str] = list()
+        self._images: List[Image] = list()
+        self._proxies: List[Optional[Image]] = list()
+        self._cache = LRUCache(cache_bytes)
+        self._set_ids = itertools.count()
+        self._set_id = next(self._set_ids)
+        self._executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                            thread_name_prefix='ezcv-test-set')
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._futures: List[Future] = list()
+        self._local = threading.local()
+
+    def set_images(self, fnames: Sequence[str], images: Sequence[Image]):
+        self.cancel()
+        self.fnames = list(fnames)
+        self._images = list(images)
+        self._proxies = [make_proxy(img, self.max_pixels) for img in self._images]
+        self._cache.clear()
+        self._set_id = next(self._set_ids)
+
+    def clear(self):
+        self.set_images([], [])
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def submit(self, pipeline: CompVizPipeline) -> int:
+        """ Queue a run of `pipeline` over every image, cancelling the runs that are still waiting
+        """
+        stages = snapshot_stages(pipeline)
+        use_proxies = supports_preview(operator for _, operator in stages)
+        with self._lock:
+            self._cancel_pending()
+            self._generation += 1
+            generation = self._generation
+            set_id = self._set_id
+            for index, (img, proxy) in enumerate(zip(self._images, self._proxies)):
+                media = proxy if use_proxies and proxy is not None else img
+                media_key = (set_id, index, media is proxy)
+                future = self._executor.submit(self._run, generation, index, stages, media, media_key)
+                self._futures.append(future)
+        return generation
+
+    def cancel(self):
+        """ Drop every waiting run, along with the results of the running ones
+        """
+        with self._lock:
+            self._cancel_pending()
+            self._generation += 1
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            futures = list(self._futures)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for future in futures:
+            remaining = max(deadline - time.monotonic(), 0) if deadline is not None else None
+            try:
+                future.exception(remaining)
+            except TimeoutError:
+                return False
+            except CancelledError:
+                pass
+        return True
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _cancel_pending(self):
+        for future in self._futures:
+            future.cancel()
+        self._futures = [future for future in self._futures if not future.done()]
+
+    def _run(self, generation: int, index: int, stages: List[Stage], media: Image, media_key) -> None:
+        if generation != self._generation:
+            return
+        start = time.perf_counter()
+        try:
+            img = run_stages(self._worker_stages(generation, stages), media, self._cache, media_key,
+                             should_cancel=lambda: generation != self._generation)
+            thumbnail = make_thumbnail(img, self.thumbnail_pixels)
+            result = TestSetResult(generation, index, image=img, thumbnail=thumbnail,
+                                   seconds=time.perf_counter() - start)
+        except RunCancelled:
+            return
+        except Exception as e:
+            print(traceback.format_exc())
+            result = TestSetResult(generation, index, error=e, seconds=time.perf_counter() - start)
+        with self._lock:
+            # Checked under the lock, so nothing is emitted once a newer run was submitted or `shutdown` returned
+            if generation != self._generation:
+                return
+            try:
+                self.image_finished.emit(result)
+            except RuntimeError:
+                # The runner was deleted while the image was running
+                pass
+
+    def _worker_stages(self, generation: int, stages: List[Stage]) -> List[Stage]:
+        """ This thread's own copy of the pipeline, for the given generation
+        """
+        local = self._local
+        if getattr(local, 'generation', None) != generation:
+            local.stages = copy.deepcopy(stages)
+            local.generation = generation
+        return local.stages
@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Type, Union
+
+import numpy as np
+
+from ezcv.operator import Operator
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv.operator.implementations.color_space import ColorSpaceChange
+from ezcv.typing import Image
+from ezcv_gui.roi import RegionOfInterest
+
+
+DEFAULT_TILE_SIZE = 512
+# Parameters names hinting at how far an operator looks around each pixel, and how to turn their value into a radius
+_FOOTPRINT_PARAMETERS: Dict[str, Callable[[int], int]] = {
+    'kernel_size': lambda value: value // 2,
+    'ksize': lambda value: value // 2,
+    'diameter': lambda value: value // 2,
+    'radius': lambda value: value,
+}
+
+Footprint = Callable[[Operator], int]
+_TILE_SAFE_OPERATORS: Dict[Type[Operator], Optional[Footprint]] = dict()
+
+
+def tile_safe(footprint: Optional[Footprint] = None) -> Callable[[Type[Operator]], Type[Operator]]:
+    """ Decorator for marking operators whose output pixels only depend on the input pixels at most
+    `footprint(operator)` pixels away, and which keep the image geometry. Those operators may run over tiles of the
+    media in parallel
+
+    Without a `footprint`, it's estimated from the operator parameters that look like kernel sizes. Operator libraries
+    that don't depend on ezcv_gui can set a `tile_footprint` class attribute instead, either a number of pixels or a
+    method returning it.
+    """
+    def decorator(operator_cls: Type[Operator]) -> Type[Operator]:
+        _TILE_SAFE_OPERATORS[operator_cls] = footprint
+        return operator_cls
+    return decorator
+
+
+def tile_footprint(operator: Operator) -> Optional[int]:
+    """ How far, in pixels, tiles must reach around what they output for the operator, or None if it isn't tile safe
+    """
+    operator_cls = type(operator)
+    if operator_cls in _TILE_SAFE_OPERATORS:
+        footprint = _TILE_SAFE_OPERATORS[operator_cls]
+        return footprint(operator) if footprint is not None else estimate_footprint(operator)
+    declared: Union[int, Callable[[], int], None] = getattr(operator, 'tile_footprint', None)
+    if declared is None:
+        return None
+    return int(declared()) if callable(declared) else int(declared)
+
+
+def pipeline_footprint(operators: Iterable[Operator]) -> Optional[int]:
+    """ How far, in pixels, the pipeline output depends on the input around each pixel, as every operator looks further
+    around the previous one's output. None if any of them isn't tile safe
+    """
+    footprint = 0
+    for operator in operators:
+        operator_footprint = tile_footprint(operator)
+        if operator_footprint is None:
+            return None
+        footprint += operator_footprint
+    return footprint
+
+
+def estimate_footprint(operator: Operator) -> int:
+    footprint = 0
+    for param_name in operator.get_parameters_specs():
+        to_radius = _FOOTPRINT_PARAMETERS.get(param_name)
+        if to_radius is not None:
+            footprint = max(footprint, to_radius(int(getattr(operator, param_name))))
+    return footprint
+
+
+tile_safe(lambda operator: operator.kernel_size // 2)(GaussianBlur)
+tile_safe(lambda operator: 0)(ColorSpaceChange)
+
+
+class TiledExecutor:
+    """ Runs functions over overlapping tiles of an image on a thread pool, stitching their outputs back together
+
+    Each tile covers a `tile_size` square of the output, grown by a halo so the function sees every input pixel it
+    needs, as long as it doesn't look further than the halo.
+    """
+    def __init__(self, workers: Optional[int] = None, tile_size: int = DEFAULT_TILE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.tile_size = tile_size
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ezcv-tile')
+
+    def is_worth_tiling(self, img: Image) -> bool:
+        height, width = img.shape[:2]
+        return self.workers > 1 and (height > self.tile_size or width > self.tile_size)
+
+    def tiles(self, width: int, height: int, halo: int) -> List[RegionOfInterest]:
+        return [
+            RegionOfInterest.around((x, y, self.tile_size, self.tile_size), halo, width, height)
+            for y in range(0, height, self.tile_size)
+            for x in range(0, width, self.tile_size)
+        ]
+
+    def map_tiles(self, fn: Callable[[Image, RegionOfInterest], Image], img: Image, halo: int) -> Optional[Image]:
+        """ `fn` applied over the whole image, one tile at a time. It's given the tile pixels, halo included, along with
+        where they are. None when `fn` changed the tiles geometry, as they can't be stitched back then
+        """
+        height, width = img.shape[:2]
+        tiles = self.tiles(width, height, halo)
+        results = self._executor.map(lambda tile: tile.extract(fn(tile.crop_media(img), tile)), tiles)
+        output = None
+        for tile, result in zip(tiles, results):
+            if result is None:
+                return None
+            if output is None:
+                output = np.empty((height, width) + result.shape[2:], dtype=result.dtype)
+            elif result.shape[2:] != output.shape[2:] or result.dtype != output.dtype:
+                return None
+            x, y, w, h = tile.region
+            output[y:y + h, x:x + w] = result
+        return output
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,96 @@
+import time
+from contextlib import contextmanager
+from typing import Optional, List, Iterator
+
+
+class TraceEvent:
+    def __init__(self, name: str, start: float, end: float):
+        self.name = name
+        self.start = start
+        self.end = end
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class StartupTrace:
+    """ Timeline of the startup phases, with times relative to `origin`
+    """
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.events: List[TraceEvent] = list()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def add(self, name: str, start: float, end: float):
+        self.events.append(TraceEvent(name, start, end))
+
+    def mark(self, name: str):
+        """ Record an instant, e.g. the first paint
+        """
+        now = time.perf_counter()
+        self.add(name, now, now)
+
+    def find(self, name: str) -> Optional[TraceEvent]:
+        return next((event for event in self.events if event.name == name), None)
+
+    def format(self) -> str:
+        """ One line per event, in start order, with nested phases indented
+        """
+        lines = [f'{"start":>10} {"duration":>10}  phase']
+        open_events: List[TraceEvent] = list()
+        for event in sorted(self.events, key=lambda e: (e.start, -e.end)):
+            while open_events and open_events[-1].end <= event.start:
+                open_events.pop()
+            indent = '  ' * len(open_events)
+            start_ms = (event.start - self.origin) * 1000
+            lines.append(f'{start_ms:7.1f} ms {event.duration * 1000:7.1f} ms  {indent}{event.name}')
+            if event.duration > 0:
+                open_events.append(event)
+        return '\n'.join(lines)
+
+
+_trace: Optional[StartupTrace] = None
+
+
+def start_trace(origin: Optional[float] = None) -> StartupTrace:
+    global _trace
+    _trace = StartupTrace(origin)
+    return _trace
+
+
+def get_trace() -> Optional[StartupTrace]:
+    return _trace
+
+
+def finish_trace() -> Optional[StartupTrace]:
+    """ Stop tracing and print the timeline, if tracing was started
+    """
+    global _trace
+    trace, _trace = _trace, None
+    if trace is not None:
+        print(trace.format())
+    return trace
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """ Record the enclosed code as a phase of the startup trace. Does nothing when not tracing
+    """
+    if _trace is None:
+        yield
+    else:
+        with _trace.phase(name):
+            yield
+
+
+def mark(name: str):
+    if _trace is not None:
+        _trace.mark(name)
@@ -1,20 +1,87 @@
+import sys
+from typing import Tuple
+
 import numpy as np
+from PyQt6 import sip
 from PyQt6.QtGui import QImage
 
 from ezcv.utils import is_image
 
 
+_copies_count = 0
+
+
 def img2QImage(img: np.ndarray) -> QImage:
+    """ Wrap an image in a QImage, without copying its pixels whenever Qt has a matching format
+
+    The QImage keeps a reference to the array for as long as its pixels are in use, so the array must not be
+    modified in the meantime. Arrays are only copied when their pixels aren't laid out the way Qt expects (e.g. a
+    view over every other column) or when Qt has no format for their channels order.
+    """
     if not is_image(img):
         raise ValueError('Invalid image')
 
+    if img.ndim == 3 and img.shape[2] == 1:
+        img = img[..., 0]
+    img, image_format = _to_qt_layout(img)
+
+    height, width = img.shape[:2]
+    pixel_size = img.itemsize * (1 if img.ndim == 2 else img.shape[2])
+    if img.strides[-1] != img.itemsize or (img.ndim == 3 and img.strides[1] != pixel_size) or img.strides[0] < 0:
+        img = _copy(img)
+
+    data = sip.voidptr(img.ctypes.data)
+    bytes_per_line = img.strides[0]
+    return QImage(data, width, height, bytes_per_line, image_format, _release_array, img)
+
+
+def get_copies_count() -> int:
+    """ Number of pixel copies `img2QImage` had to make so far
+    """
+    return _copies_count
+
+
+def reset_copies_count():
+    global _copies_count
+    _copies_count = 0
+
+
+def _to_qt_layout(img: np.ndarray) -> Tuple[np.ndarray, QImage.Format]:
     # Using straight numpy here just so we don't have a direct dependency on opencv
-    if img.ndim == 2:
-        img = np.repeat(img[..., None], 3, axis=2)
-    else:
-        img = img[..., ::-1].copy()  # QImage doesn't accept a memoryview. So we make a copy
-
-    height, width, _ = img.shape
-    bytes_per_line = 3 * width
-    qimg = QImage(img.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-    return qimg
+    channels = 1 if img.ndim == 2 else img.shape[2]
+    if img.dtype == np.uint8:
+        if channels == 1:
+            return img, QImage.Format.Format_Grayscale8
+        if channels == 3:
+            return img, QImage.Format.Format_BGR888
+        if channels == 4:
+            if sys.byteorder == 'little':
+                # 32 bits ARGB words are laid out as BGRA bytes in little endian machines
+                return img, QImage.Format.Format_ARGB32
+            return _copy(img[..., [2, 1, 0, 3]]), QImage.Format.Format_RGBA8888
+    elif img.dtype == np.uint16:
+        if channels == 1:
+            return img, QImage.Format.Format_Grayscale16
+        if channels == 3:
+            rgbx = np.full(img.shape[:2] + (4,), np.iinfo(np.uint16).max, dtype=np.uint16)
+            rgbx[..., :3] = img[..., ::-1]
+            _count_copy()
+            return rgbx, QImage.Format.Format_RGBX64
+        if channels == 4:
+            return _copy(img[..., [2, 1, 0, 3]]), QImage.Format.Format_RGBA64
+    raise ValueError(f'Invalid image: no display format for {channels} channel(s) of type {img.dtype}')
+
+
+def _copy(img: np.ndarray) -> np.ndarray:
+    _count_copy()
+    return np.ascontiguousarray(img)
+
+
+def _count_copy():
+    global _copies_count
+    _copies_count += 1
+
+
+def _release_array(img: np.ndarray):
+    # Qt calls this once it's done with the pixels. Holding `img` until then is all that's needed
+    pass
@@ -0,0 +1,230 @@
+import math
+from typing import Optional, List, Iterator, Tuple
+
+from PyQt6.QtCore import Qt, pyqtSignal, QRectF, QRect
+from PyQt6.QtGui import QImage, QPixmap, QPainter, QResizeEvent, QWheelEvent, QMouseEvent
+from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem, QStyleOptionGraphicsItem, QWidget, \
+    QGraphicsPixmapItem
+
+from ezcv_gui.cache import LRUCache
+
+
+TILE_SIZE = 512
+TILES_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class ImagePyramid:
+    """ Multi-resolution version of an image, split in tiles
+
+    Each level is half the size of the previous one, down to a single tile. Levels and tiles are only built when
+    they're first drawn, and tiles are kept in an LRU cache.
+    """
+    def __init__(self, image: QImage, tile_size: int = TILE_SIZE, cache_bytes: int = TILES_CACHE_BYTES):
+        self.tile_size = tile_size
+        self._levels: List[Optional[QImage]] = [image] + [None] * self._levels_count(image.width(), image.height())
+        self._tiles = LRUCache(cache_bytes, sizeof=lambda pixmap: pixmap.width() * pixmap.height() * 4)
+
+    @property
+    def levels_count(self) -> int:
+        return len(self._levels)
+
+    def width(self) -> int:
+        return self._levels[0].width()
+
+    def height(self) -> int:
+        return self._levels[0].height()
+
+    def base_image(self) -> QImage:
+        return self._levels[0]
+
+    def level_for_scale(self, scale: float) -> int:
+        """ Coarsest level that still has at least one pixel per screen pixel at the given display scale
+        """
+        if scale <= 0:
+            return self.levels_count - 1
+        level = int(math.floor(math.log2(1 / scale))) if scale < 1 else 0
+        return min(max(level, 0), self.levels_count - 1)
+
+    def level(self, level: int) -> QImage:
+        if self._levels[level] is None:
+            previous = self.level(level - 1)
+            self._levels[level] = previous.scaled(
+                max(previous.width() // 2, 1), max(previous.height() // 2, 1),
+                Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation
+            )
+        return self._levels[level]
+
+    def tiles(self, level: int, rect: QRectF) -> Iterator[Tuple[QRectF, QPixmap]]:
+        """ Tiles of a level intersecting `rect`, along with where they go in full resolution coordinates
+        """
+        level_img = self.level(level)
+        scale_x = self.width() / level_img.width()
+        scale_y = self.height() / level_img.height()
+        first_col = max(int(rect.left() / scale_x) // self.tile_size, 0)
+        last_col = min(int(math.ceil(rect.right() / scale_x)) // self.tile_size, (level_img.width() - 1) // self.tile_size)
+        first_row = max(int(rect.top() / scale_y) // self.tile_size, 0)
+        last_row = min(int(math.ceil(rect.bottom() / scale_y)) // self.tile_size,
+                       (level_img.height() - 1) // self.tile_size)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                tile_rect = QRect(col * self.tile_size, row * self.tile_size, self.tile_size, self.tile_size)
+                tile_rect = tile_rect.intersected(level_img.rect())
+                target = QRectF(tile_rect.x() * scale_x, tile_rect.y() * scale_y,
+                                tile_rect.width() * scale_x, tile_rect.height() * scale_y)
+                yield target, self._tile(level, tile_rect)
+
+    def _tile(self, level: int, tile_rect: QRect) -> QPixmap:
+        key = (level, tile_rect.x(), tile_rect.y())
+        pixmap = self._tiles.get(key)
+        if pixmap is None:
+            pixmap = QPixmap.fromImage(self.level(level).copy(tile_rect))
+            self._tiles.put(key, pixmap)
+        return pixmap
+
+    def _levels_count(self, width: int, height: int) -> int:
+        count = 0
+        while max(width, height) > self.tile_size:
+            width, height = max(width // 2, 1), max(height // 2, 1)
+            count += 1
+        return count
+
+
+class _PyramidItem(QGraphicsItem):
+    def __init__(self, pyramid: ImagePyramid):
+        super().__init__()
+        self.pyramid = pyramid
+        self.painted_tiles_count = 0
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self) -> QRectF:
+        return QRectF(0, 0, self.pyramid.width(), self.pyramid.height())
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget: Optional[QWidget] = None):
+        scale = option.levelOfDetailFromTransform(painter.worldTransform())
+        level = self.pyramid.level_for_scale(scale)
+        # Showing actual pixels when zoomed in
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, scale < 1)
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        self.painted_tiles_count = 0
+        for target, pixmap in self.pyramid.tiles(level, exposed):
+            painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+            self.painted_tiles_count += 1
+
+
+class MediaDisplay(QGraphicsView):
+    """ Zoomable and pannable image display
+
+    Images are drawn from a multi-resolution pyramid, so repainting only costs as much as the visible area on screen.
+    The image fits the view until the user zooms in, with the mouse wheel. Double clicking fits it back.
+
+    A patch can be drawn over part of the image, e.g. an up to date output of the visible region, until the next image
+    is set.
+    """
+    resized = pyqtSignal(int, int)
+    # x, y, width and height of the visible part of the image, in image pixels
+    visible_region_changed = pyqtSignal(int, int, int, int)
+
+    ZOOM_STEP = 1.25
+    MAX_SCALE = 64
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setScene(QGraphicsScene(self))
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setBackgroundBrush(self.palette().window())
+
+        self._item: Optional[_PyramidItem] = None
+        self._patch_item: Optional[QGraphicsPixmapItem] = None
+        self._fit = True
+        self._visible_region: Optional[Tuple[int, int, int, int]] = None
+
+    def set_image(self, image: QImage):
+        same_size = self._item is not None and self._item.pyramid.base_image().size() == image.size()
+        if self._item is not None:
+            self.scene().removeItem(self._item)
+        self.clear_patch()
+        self._item = _PyramidItem(ImagePyramid(image))
+        self.scene().addItem(self._item)
+        self.scene().setSceneRect(self._item.boundingRect())
+        # Keeping the user's zoom while tuning the same media
+        if self._fit or not same_size:
+            self.fit_to_view()
+        self._update_visible_region()
+
+    def set_patch(self, image: QImage, x: int, y: int):
+        """ Draw `image` over the shown image, with its top left corner at (x, y)
+        """
+        if self._item is None:
+            return
+        if self._patch_item is None:
+            self._patch_item = QGraphicsPixmapItem()
+            self._patch_item.setZValue(1)
+            self._patch_item.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
+            self.scene().addItem(self._patch_item)
+        self._patch_item.setPixmap(QPixmap.fromImage(image))
+        self._patch_item.setOffset(x, y)
+
+    def clear_patch(self):
+        if self._patch_item is not None:
+            self.scene().removeItem(self._patch_item)
+            self._patch_item = None
+
+    def patch_item(self) -> Optional[QGraphicsPixmapItem]:
+        return self._patch_item
+
+    def visible_region(self) -> Optional[Tuple[int, int, int, int]]:
+        """ Part of the image that's visible, in image pixels
+        """
+        if self._item is None:
+            return None
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        rect = visible.intersected(self._item.boundingRect()).toAlignedRect()
+        return rect.x(), rect.y(), rect.width(), rect.height()
+
+    def image(self) -> Optional[QImage]:
+        return self._item.pyramid.base_image() if self._item is not None else None
+
+    def scale_factor(self) -> float:
+        return self.transform().m11()
+
+    def fit_to_view(self):
+        self._fit = True
+        if self._item is not None:
+            self.fitInView(self._item.boundingRect(), Qt.AspectRatioMode.KeepAspectRatio)
+
+    def zoom(self, factor: float):
+        new_scale = self.scale_factor() * factor
+        if new_scale > self.MAX_SCALE:
+            factor = self.MAX_SCALE / self.scale_factor()
+        self._fit = False
+        self.scale(factor, factor)
+        self._update_visible_region()
+
+    def wheelEvent(self, event: QWheelEvent):
+        steps = event.angleDelta().y() / 120
+        if steps != 0:
+            self.zoom(self.ZOOM_STEP ** steps)
+
+    def mouseDoubleClickEvent(self, event: QMouseEvent):
+        self.fit_to_view()
+        self._update_visible_region()
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        super().scrollContentsBy(dx, dy)
+        self._update_visible_region()
+
+    def resizeEvent(self, event: QResizeEvent):
+        super().resizeEvent(event)
+        if self._fit:
+            self.fit_to_view()
+        ratio = self.devicePixelRatio()
+        self.resized.emit(int(self.width() * ratio), int(self.height() * ratio))
+        self._update_visible_region()
+
+    def _update_visible_region(self):
+        region = self.visible_region()
+        if region is not None and region != self._visible_region:
+            self._visible_region = region
+            self.visible_region_changed.emit(*region)
@@ -0,0 +1,54 @@
+from typing import Optional, Sequence
+
+from PyQt6.QtCore import QSize
+from PyQt6.QtGui import QIcon, QPixmap
+from PyQt6.QtWidgets import QListWidget, QListWidgetItem, QListView, QAbstractItemView, QStyle
+
+from ezcv.typing import Image
+from ezcv_gui.utils import img2QImage
+
+
+GRID_ICON_SIZE = QSize(200, 150)
+
+
+class ImageGridWidget(QListWidget):
+    """ Grid of captioned images, filled in one cell at a time as they become available
+    """
+    def __init__(self, parent=None, icon_size: QSize = GRID_ICON_SIZE):
+        super().__init__(parent)
+        self.init_ui(icon_size)
+
+    def init_ui(self, icon_size: QSize):
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setIconSize(icon_size)
+
+    def set_captions(self, captions: Sequence[str]):
+        """ Start over with one empty cell per caption
+        """
+        self.clear()
+        for caption in captions:
+            QListWidgetItem(QIcon(), caption, self)
+
+    def set_image(self, index: int, img: Image, tooltip: Optional[str] = None):
+        item = self.item(index)
+        if item is None:
+            return
+        try:
+            item.setIcon(QIcon(QPixmap.fromImage(img2QImage(img))))
+        except ValueError:
+            # Not displayable, e.g. a float image
+            item.setIcon(QIcon())
+        item.setToolTip(tooltip or '')
+
+    def set_error(self, index: int, message: str):
+        item = self.item(index)
+        if item is None:
+            return
+        item.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxCritical))
+        item.setToolTip(message)
@@ -1,40 +1,15 @@
 import numpy as np
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPixmap, QResizeEvent
-from PyQt6.QtWidgets import QWidget, QLabel, QPushButton, QFileDialog, QVBoxLayout
+from PyQt6.QtWidgets import QWidget, QPushButton, QFileDialog, QVBoxLayout
 
 from ezcv_gui.controller import EzCVController
+from ezcv_gui.sources import VIDEO_EXTENSIONS
 from ezcv_gui.utils import img2QImage
+from ezcv_gui.widgets.display import MediaDisplay
+from ezcv_gui.widgets.stages import StageStripWidget
 
 
-class MediaDisplay(QWidget):
-    """ Adapted from:
-        https://stackoverflow.com/questions/14107144/how-do-i-make-an-image-resize-to-scale-in-qt
-    """
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self._img_label = QLabel(self)
-        self._img_label.setFixedSize(0, 0)
-        self._img_label.setScaledContents(True)
-
-    def resize_img(self):
-        pixmap = self._img_label.pixmap()
-        if pixmap is None:
-            return
-        pixsize = pixmap.size()
-        pixsize.scale(self.size(), Qt.AspectRatioMode.KeepAspectRatio)
-        self._img_label.setFixedSize(pixsize)
-
-    def setPixmap(self, pixmap: QPixmap):
-        self._img_label.setPixmap(pixmap)
-        self.resize_img()
-
-    def pixmap(self):
-        return self._img_label.pixmap()
-
-    def resizeEvent(self, event: QResizeEvent):
-        super().resizeEvent(event)
-        self.resize_img()
+MEDIA_FILES_FILTER = 'Media Files(*.png *.jpg *.bmp *.jpeg {})'.format(' '.join('*' + ext for ext in VIDEO_EXTENSIONS))
 
 
 class MediaPanelWidget(QWidget):
@@ -43,7 +18,8 @@ class MediaPanelWidget(QWidget):
         self._controller = controller
 
         self.media_display = MediaDisplay(self)
-        self.pick_file_button = QPushButton('Load Image', self)
+        self.stages_strip = StageStripWidget(self._controller, self)
+        self.pick_file_button = QPushButton('Load Media', self)
 
         self.init_ui()
 
@@ -51,18 +27,24 @@ class MediaPanelWidget(QWidget):
         layout = QVBoxLayout(self)
         layout.addWidget(self.pick_file_button, alignment=Qt.AlignmentFlag.AlignHCenter)
         layout.addWidget(self.media_display)
+        layout.addWidget(self.stages_strip)
 
         self._controller.show_media.connect(self.on_show_media)
+        self._controller.show_patch.connect(self.on_show_patch)
+        self.media_display.visible_region_changed.connect(self._controller.set_visible_region)
+        self.media_display.resized.connect(self._controller.set_preview_target_size)
         self.pick_file_button.clicked.connect(self.pick_file_popup)
         self.pick_file_button.setShortcut('L')
 
     def on_show_media(self, img: np.ndarray):
         qimg = img2QImage(img)
-        pix = QPixmap(qimg)
-        self.media_display.setPixmap(pix)
+        self.media_display.set_image(qimg)
+
+    def on_show_patch(self, img: np.ndarray, x: int, y: int):
+        self.media_display.set_patch(img2QImage(img), x, y)
 
     def pick_file_popup(self):
-        fname, _ = QFileDialog.getOpenFileName(self, 'Pick Image File', '~', 'Image Files(*.png *.jpg *.bmp *.jpeg)')
+        fname, _ = QFileDialog.getOpenFileName(self, 'Pick Media File', '~', MEDIA_FILES_FILTER)
         if fname is None or fname.strip() == '':
             return
         self._controller.load_media(fname)
@@ -1,43 +1,74 @@
 from typing import Dict, Callable
 
-from PyQt6.QtCore import pyqtSignal
-from PyQt6.QtWidgets import QGroupBox, QLabel, QSizePolicy, QGridLayout
+from PyQt6.QtCore import pyqtSignal, pyqtBoundSignal, Qt, QPoint
+from PyQt6.QtGui import QShowEvent
+from PyQt6.QtWidgets import QGroupBox, QLabel, QSizePolicy, QGridLayout, QMenu, QWidget
 
 from ezcv.operator import Operator
+from ezcv_gui.sweep import is_sweepable
 from ezcv_gui.widgets.parameter import get_widget_for_parameter, ParameterWidgetMixin
 
 
+OPERATOR_CONFIG_STYLE_SHEET = """
+QGroupBox {
+    font: bold;
+    border: 1px solid silver;
+    border-radius: 6px;
+    margin-top: 10px;
+}
+
+QGroupBox::title {
+    subcontrol-origin: margin;
+    left: 7px;
+    padding: 0px 5px 0px 5px;
+}
+"""
+
+
 class OperatorConfigWidget(QGroupBox):
+    """ Parameters of an operator
+
+    The parameters widgets are only built when the widget is first shown (or `build` is called), so that hidden tabs
+    cost next to nothing. Its style sheet is expected to be set by a parent, see `OPERATOR_CONFIG_STYLE_SHEET`.
+
+    Right clicking a numeric, enum or boolean parameter offers to sweep it, see `sweep_requested`.
+    """
     updated = pyqtSignal(str, object)
+    updating = pyqtSignal(str, object)
+    sweep_requested = pyqtSignal(str)
 
     def __init__(self, operator: Operator, parent=None):
         super().__init__(parent)
         self._operator = operator
 
         self.parameters_widgets: Dict[str, ParameterWidgetMixin] = dict()
+        self._built = False
+
+        self.init_ui()
 
-        self.init_ui(operator)
+    @property
+    def operator(self) -> Operator:
+        return self._operator
 
-    def init_ui(self, operator: Operator):
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def init_ui(self):
         layout = QGridLayout()
         self.setLayout(layout)
 
-        self.setStyleSheet("""
-        QGroupBox {
-            font: bold;
-            border: 1px solid silver;
-            border-radius: 6px;
-            margin-top: 10px;
-        }
-
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            left: 7px;
-            padding: 0px 5px 0px 5px;
-        }
-        """)
+    def build(self):
+        """ Create the parameters widgets, if they weren't created yet
+        """
+        if self._built:
+            return
+        self._built = True
+        self._set_operator(self._operator)
 
-        self._set_operator(operator)
+    def showEvent(self, event: QShowEvent):
+        self.build()
+        super().showEvent(event)
 
     def _set_operator(self, operator: Operator):
         layout: QGridLayout = self.layout()
@@ -49,14 +80,32 @@ class OperatorConfigWidget(QGroupBox):
             self.parameters_widgets[param_name] = param_widget
             param_value = getattr(operator, param_name)
             param_widget.set_value(param_value)
-            param_widget.value_changed.connect(self._create_parameter_updated_callback(param_name))
+            param_widget.value_changed.connect(self._create_parameter_updated_callback(param_name, self.updated))
+            param_widget.value_changing.connect(self._create_parameter_updated_callback(param_name, self.updating))
             label = QLabel(param_name)
             label.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
             layout.addWidget(label, row_nb, 0)
             layout.addWidget(param_widget, row_nb, 1)
+            if is_sweepable(param):
+                for widget in (label, param_widget):
+                    widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+                    widget.customContextMenuRequested.connect(self._create_context_menu_callback(param_name, widget))
+
+    def parameter_menu(self, param_name: str) -> QMenu:
+        menu = QMenu(self)
+        sweep_action = menu.addAction(f'Sweep {param_name}')
+        sweep_action.triggered.connect(lambda: self.sweep_requested.emit(param_name))
+        return menu
+
+    def _create_context_menu_callback(self, param_name: str, widget: QWidget) -> Callable[[QPoint], None]:
+        def callback(pos: QPoint):
+            menu = self.parameter_menu(param_name)
+            menu.exec(widget.mapToGlobal(pos))
+            menu.deleteLater()
+        return callback
 
-    def _create_parameter_updated_callback(self, param_name: str) -> Callable[[], None]:
+    def _create_parameter_updated_callback(self, param_name: str, signal: pyqtBoundSignal) -> Callable[[], None]:
         def callback():
             param_value = self.parameters_widgets[param_name].get_value()
-            self.updated.emit(param_name, param_value)
+            signal.emit(param_name, param_value)
         return callback
@@ -1,18 +1,37 @@
 from enum import Enum
 from typing import Dict, Type, Callable, Union, TypeVar, Generic
 
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtWidgets import QWidget, QSlider, QHBoxLayout, QComboBox, QVBoxLayout, QLabel, QSpinBox, \
     QDoubleSpinBox, QSizePolicy, QCheckBox
 
 from ezcv.operator import ParameterSpec, IntegerParameter, DoubleParameter, EnumParameter, BooleanParameter
 
 
+DEFAULT_MAX_UPDATE_RATE = 30
+
+
 class ParameterWidgetMixin:
+    """ Base for parameter widgets
+
+    Widgets notify changes in two phases. `value_changing` is emitted while the user is still interacting with the
+    widget (e.g. dragging a slider), at most `max_update_rate` times per second. `value_changed` is emitted once the
+    value is final. Widgets without an interactive phase simply emit `value_changed`.
+    """
     value_changed = pyqtSignal()
+    value_changing = pyqtSignal()
+
+    max_update_rate: float = DEFAULT_MAX_UPDATE_RATE
 
     def __init__(self, param: ParameterSpec, parent=None):
         super().__init__(parent)
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.timeout.connect(self._on_update_timer_timeout)
+        self._update_pending = False
+        self._uncommitted_changes = False
+        self._committed_value = None
+        self.set_max_update_rate(self.max_update_rate)
         self.init_ui(param)
 
     def init_ui(self, param: ParameterSpec):
@@ -24,6 +43,41 @@ class ParameterWidgetMixin:
     def get_value(self):
         raise NotImplementedError()
 
+    def set_max_update_rate(self, rate: float):
+        """ Max number of `value_changing` emissions per second. Zero disables the interactive updates altogether
+        """
+        self.max_update_rate = rate
+        if rate > 0:
+            self._update_timer.setInterval(int(1000 / rate))
+
+    def notify_value_changing(self):
+        self._uncommitted_changes = True
+        if self.max_update_rate <= 0:
+            return
+        if self._update_timer.isActive():
+            self._update_pending = True
+        else:
+            self.value_changing.emit()
+            self._update_timer.start()
+
+    def commit_value(self):
+        """ Emit `value_changed`, unless the current value was already committed
+        """
+        self._update_timer.stop()
+        self._update_pending = False
+        value = self.get_value()
+        if not self._uncommitted_changes and value == self._committed_value:
+            return
+        self._uncommitted_changes = False
+        self._committed_value = value
+        self.value_changed.emit()
+
+    def _on_update_timer_timeout(self):
+        if self._update_pending:
+            self._update_pending = False
+            self.value_changing.emit()
+            self._update_timer.start()
+
 
 _PARAM2WIDGET: Dict[Type[ParameterSpec], Type[ParameterWidgetMixin]] = dict()
 
@@ -85,11 +139,13 @@ class _SliderWithIntervalSize(QSlider):
 
 class _SliderWithMinMaxDisplay(QWidget):
     valueChanged = pyqtSignal()
+    sliderReleased = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._slider = _SliderWithIntervalSize(Qt.Orientation.Horizontal, self)
         self._slider.valueChanged.connect(self.valueChanged.emit)
+        self._slider.sliderReleased.connect(self.sliderReleased.emit)
         self._label_minimum = QLabel(str(self._slider.minimum()), parent=parent)
         self._label_minimum.setAlignment(Qt.AlignmentFlag.AlignLeft)
         self._label_maximum = QLabel(str(self._slider.maximum()), parent=parent)
@@ -132,6 +188,9 @@ class _SliderWithMinMaxDisplay(QWidget):
     def value(self):
         return self._slider.value()
 
+    def isSliderDown(self) -> bool:
+        return self._slider.isSliderDown()
+
 
 class _DoubleSliderWithMinMaxDisplay(_SliderWithMinMaxDisplay):
     def value(self):
@@ -181,6 +240,7 @@ class NumberParamWidgetBase(Generic[_T], ParameterWidgetMixin, QWidget):
         self.slider.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
 
         self.slider.valueChanged.connect(self.on_slider_value_changed)
+        self.slider.sliderReleased.connect(self.commit_value)
 
     def init_number_display(self, param: _T):
         self.number_display = self.get_number_display()
@@ -189,19 +249,36 @@ class NumberParamWidgetBase(Generic[_T], ParameterWidgetMixin, QWidget):
         self.number_display.setSingleStep(param.step_size)
 
         self.number_display.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
+        # Typing a number is a single change, not one per keystroke
+        self.number_display.setKeyboardTracking(False)
 
         self.number_display.valueChanged.connect(self.on_number_display_changed)
+        self.number_display.editingFinished.connect(self.commit_value)
 
     def on_slider_value_changed(self):
+        self.number_display.blockSignals(True)
         self.number_display.setValue(self.slider.value())
-        self.value_changed.emit()
+        self.number_display.blockSignals(False)
+        if self.slider.isSliderDown():
+            self.notify_value_changing()
+        else:
+            self.commit_value()
 
     def on_number_display_changed(self, value):
+        self.slider.blockSignals(True)
         self.slider.setValue(value)
+        self.slider.blockSignals(False)
+        self.commit_value()
 
     def set_value(self, value):
+        self.slider.blockSignals(True)
+        self.number_display.blockSignals(True)
         self.slider.setValue(value)
         self.number_display.setValue(value)
+        self.slider.blockSignals(False)
+        self.number_display.blockSignals(False)
+        self._committed_value = self.get_value()
+        self._uncommitted_changes = False
 
     def get_value(self):
         return self.slider.value()
@@ -1,13 +1,17 @@
-from typing import List, Callable, Any
+import bisect
+from typing import List, Callable, Any, Set, Dict, Optional, Tuple
 
 from PyQt6.QtCore import Qt, QEvent
 from PyQt6.QtGui import QKeySequence
 from PyQt6.QtWidgets import QWidget, QListWidget, QPushButton, QVBoxLayout, QDialogButtonBox, QTabWidget, QStyle, \
-    QHBoxLayout, QInputDialog
+    QHBoxLayout, QInputDialog, QTabBar, QToolButton, QListWidgetItem
 
-from ezcv.operator import get_available_operators
+from ezcv.operator import Operator
+from ezcv_gui import tracing
+from ezcv_gui.catalog import OperatorEntry
 from ezcv_gui.controller import EzCVController
-from ezcv_gui.widgets.operator import OperatorConfigWidget
+from ezcv_gui.stats import PipelineStats
+from ezcv_gui.widgets.operator import OperatorConfigWidget, OPERATOR_CONFIG_STYLE_SHEET
 
 
 class PipelineWidget(QWidget):
@@ -19,13 +23,14 @@ class PipelineWidget(QWidget):
         self.add_operator_button = QPushButton('Add Operator', parent=self)
         self.move_operator_right_button = QPushButton(parent=self)
         self.move_operator_left_button = QPushButton(parent=self)
-        self.add_operator_popup = AddOperatorWidget(self._controller)
+        self._add_operator_popup: Optional[AddOperatorWidget] = None
 
         self.add_operator_button.clicked.connect(self.on_add_operator_button_click)
         self.add_operator_button.setShortcut("A")
         self.move_operator_left_button.clicked.connect(self.on_move_operator_left)
         self.move_operator_right_button.clicked.connect(self.on_move_operator_right)
         self._controller.operators_list_updated.connect(self.operators_tabs.refresh)
+        self._controller.stats_updated.connect(self.operators_tabs.on_stats_updated)
 
         self.init_ui()
 
@@ -48,6 +53,23 @@ class PipelineWidget(QWidget):
 
         self.setLayout(layout)
 
+    @property
+    def add_operator_popup(self) -> 'AddOperatorWidget':
+        """ Built on first use, as it isn't needed to show the main window
+        """
+        if self._add_operator_popup is None:
+            self.init_add_operator_popup()
+        return self._add_operator_popup
+
+    def init_add_operator_popup(self):
+        """ Build the add operator popup ahead of its first use, or refresh its operators if it's already built
+        """
+        if self._add_operator_popup is not None:
+            self._add_operator_popup.refresh()
+            return
+        with tracing.phase('add operator popup'):
+            self._add_operator_popup = AddOperatorWidget(self._controller)
+
     def on_add_operator_button_click(self):
         self.add_operator_popup.show()
 
@@ -72,11 +94,15 @@ class OperatorsTabsWidget(QTabWidget):
     def __init__(self, controller: EzCVController, parent=None):
         super().__init__(parent=parent)
         self._controller = controller
-        self.setTabsClosable(True)
+        # Shared by every tab, instead of being set (and polished) on each one of them
+        self.setStyleSheet(OPERATOR_CONFIG_STYLE_SHEET)
         self.tabCloseRequested.connect(self.on_tab_close_requested)
         self.tabBarDoubleClicked.connect(self.on_tab_bar_double_clicked)
+        self.currentChanged.connect(self._move_close_button)
 
         self.operators_config_widgets: List[OperatorConfigWidget] = list()
+        self._close_button_widget: Optional[QWidget] = None
+        self._reconciling = False
 
     def on_tab_close_requested(self, index: int):
         self._controller.remove_operator(index)
@@ -89,39 +115,155 @@ class OperatorsTabsWidget(QTabWidget):
         if ok:
             self._controller.rename_operator(index, new_name)
 
+    def on_stats_updated(self, stats: PipelineStats):
+        summaries = stats.stage_summaries()
+        for i in range(self.count()):
+            summary = summaries.get(self.tabText(i))
+            self.setTabToolTip(i, str(summary) if summary is not None else '')
+
     def refresh(self):
+        """ Reconcile the tabs with the controller's operators
+
+        Tabs are matched to operators by identity, so only tabs of added or removed operators are created or destroyed.
+        Moved and renamed operators keep their widgets, along with their state.
+        """
+        curr_widget = self.currentWidget()
         curr_idx = self.currentIndex()
-        self._clear_tabs()
-        self._create_tabs()
-        select_index = max(min(curr_idx, len(self._controller.operators) - 1), 0)
-        self.setCurrentIndex(select_index)
-
-    def _clear_tabs(self):
-        for i, operator_config_widget in enumerate(self.operators_config_widgets):
-            operator_config_widget.setParent(None)
-        self.operators_config_widgets = list()
-        self.clear()
-
-    def _create_tabs(self):
-        operators = self._controller.operators
-        for operator_name, operator in operators.items():
-            op_config_widget = OperatorConfigWidget(operator)
-            self.addTab(op_config_widget, operator_name)
-            op_config_widget.updated.connect(self._create_operator_updated_callback(operator_name))
-            self.operators_config_widgets.append(op_config_widget)
-
-    def _create_operator_updated_callback(self, operator_name: str) -> Callable[[], None]:
+        operators = list(self._controller.operators.items())
+
+        # While hidden, the tabs aren't laid out again on every change, and tabs that are current only for a moment
+        # aren't shown (and built). Top level tabs can't be hidden without closing their window, so they're left as is
+        hide = not self.isWindow() and not self.isHidden()
+        if hide:
+            self.hide()
+        self._reconciling = True
+        try:
+            self._reconcile_tabs(operators)
+            if curr_widget is not None and curr_widget in self.operators_config_widgets:
+                self.setCurrentWidget(curr_widget)
+            else:
+                self.setCurrentIndex(max(min(curr_idx, len(operators) - 1), 0))
+        finally:
+            self._reconciling = False
+            if hide:
+                self.show()
+        self._move_close_button(self.currentIndex())
+
+    def _reconcile_tabs(self, operators: List[Tuple[str, Operator]]):
+        widgets_by_operator = {id(w.operator): w for w in self.operators_config_widgets}
+        operators_ids = {id(operator) for _, operator in operators}
+        removed_ids = [operator_id for operator_id in widgets_by_operator if operator_id not in operators_ids]
+        # Last tabs first, so no tab has to be shifted
+        removed_ids.sort(key=lambda operator_id: self.indexOf(widgets_by_operator[operator_id]), reverse=True)
+        for operator_id in removed_ids:
+            self._remove_tab(widgets_by_operator.pop(operator_id))
+
+        # Widgets already in the right relative order stay put, everything else is moved (or created) in place
+        target_widgets = [widgets_by_operator.get(id(operator)) for _, operator in operators]
+        tab_indexes = {w: self.indexOf(w) for w in target_widgets if w is not None}
+        kept_indexes = _longest_increasing_subsequence([tab_indexes[w] for w in target_widgets if w is not None])
+        stay_put = {w for w, i in tab_indexes.items() if i in kept_indexes}
+
+        next_widget = None
+        for index in reversed(range(len(operators))):
+            operator_name, operator = operators[index]
+            op_config_widget = target_widgets[index]
+            next_index = self.indexOf(next_widget) if next_widget is not None else self.count()
+            if op_config_widget is None:
+                op_config_widget = self._create_tab(next_index, operator_name, operator)
+                target_widgets[index] = op_config_widget
+            elif op_config_widget not in stay_put:
+                curr_index = self.indexOf(op_config_widget)
+                self.tabBar().moveTab(curr_index, next_index - 1 if curr_index < next_index else next_index)
+            tab_index = self.indexOf(op_config_widget)
+            if self.tabText(tab_index) != operator_name:
+                self.setTabText(tab_index, operator_name)
+            next_widget = op_config_widget
+        self.operators_config_widgets = target_widgets
+
+    def _move_close_button(self, index: int):
+        """ Only the current tab gets a close button
+
+        Qt's closable tabs lay the whole tab bar out again for every tab inserted, which makes loading big configs
+        quadratic.
+        """
+        if self._reconciling:
+            return
+        side = QTabBar.ButtonPosition(
+            self.style().styleHint(QStyle.StyleHint.SH_TabBar_CloseButtonPosition, None, self.tabBar())
+        )
+        prev_index = self.indexOf(self._close_button_widget) if self._close_button_widget is not None else -1
+        if prev_index != -1 and prev_index == index:
+            return
+        if prev_index != -1:
+            prev_button = self.tabBar().tabButton(prev_index, side)
+            self.tabBar().setTabButton(prev_index, side, None)
+            if prev_button is not None:
+                prev_button.deleteLater()
+        self._close_button_widget = self.widget(index)
+        if index == -1:
+            return
+        close_button = QToolButton(self.tabBar())
+        close_button.setAutoRaise(True)
+        close_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_TabCloseButton))
+        close_button.setToolTip('Remove operator')
+        close_button.clicked.connect(lambda: self.tabCloseRequested.emit(self.currentIndex()))
+        self.tabBar().setTabButton(index, side, close_button)
+
+    def _remove_tab(self, op_config_widget: OperatorConfigWidget):
+        self.removeTab(self.indexOf(op_config_widget))
+        op_config_widget.setParent(None)
+        op_config_widget.deleteLater()
+
+    def _create_tab(self, index: int, operator_name: str, operator: Operator) -> OperatorConfigWidget:
+        op_config_widget = OperatorConfigWidget(operator)
+        self.insertTab(index, op_config_widget, operator_name)
+        op_config_widget.updated.connect(self._create_operator_updated_callback(op_config_widget))
+        op_config_widget.updating.connect(self._create_operator_updated_callback(op_config_widget, interactive=True))
+        op_config_widget.sweep_requested.connect(self._create_sweep_requested_callback(op_config_widget))
+        return op_config_widget
+
+    def _create_operator_updated_callback(self, op_config_widget: OperatorConfigWidget,
+                                          interactive: bool = False) -> Callable[[str, Any], None]:
         def callback(param_name: str, param_value: Any):
-            self._controller.update_operator_parameter(operator_name, param_name, param_value)
+            # Operators can be renamed after the tab was created, so look up the current name
+            operator_name = self.tabText(self.indexOf(op_config_widget))
+            self._controller.update_operator_parameter(operator_name, param_name, param_value, interactive=interactive)
+        return callback
+
+    def _create_sweep_requested_callback(self, op_config_widget: OperatorConfigWidget) -> Callable[[str], None]:
+        def callback(param_name: str):
+            operator_name = self.tabText(self.indexOf(op_config_widget))
+            self._controller.sweep_parameter(operator_name, param_name)
         return callback
 
 
+def _longest_increasing_subsequence(values: List[int]) -> Set[int]:
+    """ Values of a longest strictly increasing subsequence of distinct `values`, in O(n log n)
+    """
+    tails: List[int] = list()
+    predecessors: Dict[int, Optional[int]] = dict()
+    for value in values:
+        pos = bisect.bisect_left(tails, value)
+        predecessors[value] = tails[pos - 1] if pos > 0 else None
+        if pos == len(tails):
+            tails.append(value)
+        else:
+            tails[pos] = value
+    subsequence = set()
+    value = tails[-1] if tails else None
+    while value is not None:
+        subsequence.add(value)
+        value = predecessors[value]
+    return subsequence
+
+
 class AddOperatorWidget(QWidget):
     def __init__(self, controller: EzCVController, parent=None):
         super().__init__(parent)
         self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
         self._controller = controller
-        self.operators = {cls.__name__: cls for cls in get_available_operators()}
+        self.operators: Dict[str, OperatorEntry] = dict()
 
         self.available_operators_list = QListWidget(self)
         self.available_operators_list.doubleClicked.connect(self.accept_operator)
@@ -142,13 +284,22 @@ class AddOperatorWidget(QWidget):
         main_layout.addWidget(self.available_operators_list, stretch=5)
         main_layout.addWidget(self.button_box, stretch=1)
 
-        self.available_operators_list.addItems(self.operators.keys())
+        self.refresh()
+
+    def refresh(self):
+        """ List the operators of the controller's catalog
+        """
+        self.operators = self._controller.catalog.available_operators()
+        self.available_operators_list.clear()
+        for name, entry in self.operators.items():
+            item = QListWidgetItem(name, self.available_operators_list)
+            item.setToolTip(_describe_operator(entry))
         self.available_operators_list.setCurrentRow(0)
 
     def accept_operator(self):
         selected_item = self.available_operators_list.currentItem().text()
         selected_operator = self.operators[selected_item]
-        self._controller.add_operator(selected_operator)
+        self._controller.add_catalog_operator(selected_operator)
         self.hide()
 
     def eventFilter(self, watched, event):
@@ -160,3 +311,12 @@ class AddOperatorWidget(QWidget):
             elif event.matches(QKeySequence.StandardKey.Cancel):
                 self.hide()
         return False
+
+
+def _describe_operator(entry: OperatorEntry) -> str:
+    lines = [entry.implementation]
+    if entry.entry_point is not None:
+        lines.append(f'Library: {entry.entry_point}')
+    for param_name, param in entry.parameters.items():
+        lines.append(f'{param_name}: {param["type"]}')
+    return '\n'.join(lines)
@@ -0,0 +1,71 @@
+from typing import List, Optional
+
+from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtGui import QIcon, QPixmap
+from PyQt6.QtWidgets import QListWidget, QListWidgetItem, QListView, QAbstractItemView
+
+from ezcv_gui.controller import EzCVController
+from ezcv_gui.engine import StageOutput
+from ezcv_gui.utils import img2QImage
+
+
+THUMBNAIL_ICON_SIZE = QSize(96, 72)
+OUTPUT_ITEM_TEXT = 'Output'
+
+
+class StageStripWidget(QListWidget):
+    """ Thumbnails of every stage output of the latest run. Clicking one shows that stage's output
+
+    The last item stands for the pipeline output.
+    """
+    def __init__(self, controller: EzCVController, parent=None):
+        super().__init__(parent)
+        self._controller = controller
+
+        self.init_ui()
+
+        self._controller.stages_captured.connect(self.on_stages_captured)
+        self.itemClicked.connect(self.on_item_clicked)
+
+    def init_ui(self):
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(False)
+        self.setMovement(QListView.Movement.Static)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setIconSize(THUMBNAIL_ICON_SIZE)
+        self.setFixedHeight(THUMBNAIL_ICON_SIZE.height() + 2 * self.fontMetrics().height() + 16)
+
+    def on_stages_captured(self, stages: List[StageOutput]):
+        self.clear()
+        for stage in stages:
+            self._add_item(stage.name, stage, stage.name)
+        if stages:
+            self._add_item(OUTPUT_ITEM_TEXT, stages[-1], None)
+        self._select(self._controller.selected_stage)
+
+    def on_item_clicked(self, item: QListWidgetItem):
+        self._controller.select_stage(item.data(Qt.ItemDataRole.UserRole))
+
+    def _add_item(self, text: str, stage: StageOutput, stage_name: Optional[str]):
+        try:
+            icon = QIcon(QPixmap.fromImage(img2QImage(stage.thumbnail)))
+        except ValueError:
+            # Not displayable, e.g. a float image
+            icon = QIcon()
+        item = QListWidgetItem(icon, text, self)
+        item.setData(Qt.ItemDataRole.UserRole, stage_name)
+        if stage.image is not None:
+            shape = 'x'.join(str(d) for d in stage.image.shape)
+            item.setToolTip(f'{stage.name}: {shape} {stage.image.dtype}')
+        else:
+            item.setToolTip(f'{stage.name}: thumbnail only, over the capture memory budget')
+
+    def _select(self, stage_name: Optional[str]):
+        for i in range(self.count()):
+            item = self.item(i)
+            if item.data(Qt.ItemDataRole.UserRole) == stage_name:
+                self.setCurrentItem(item)
+                return
@@ -0,0 +1,54 @@
+from typing import List, Any
+
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel
+
+from ezcv_gui.controller import EzCVController
+from ezcv_gui.sweep import SweepResult
+from ezcv_gui.widgets.grid import ImageGridWidget
+
+
+class SweepWidget(QWidget):
+    """ Contact sheet of the latest parameter sweep, one tile per value
+    """
+    def __init__(self, controller: EzCVController, parent=None):
+        super().__init__(parent=parent)
+        self._controller = controller
+        self._total = 0
+        self._finished = 0
+
+        self.title_label = QLabel(self)
+        self.progress_label = QLabel(self)
+        self.grid = ImageGridWidget(self)
+
+        self.init_ui()
+
+    def init_ui(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.title_label)
+        header_layout.addStretch()
+        header_layout.addWidget(self.progress_label)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(header_layout)
+        layout.addWidget(self.grid)
+
+        self._controller.sweep_started.connect(self.on_sweep_started)
+        self._controller.sweep_result.connect(self.on_sweep_result)
+
+    def on_sweep_started(self, operator_name: str, param_name: str, values: List[Any]):
+        self.title_label.setText(f'{operator_name}.{param_name}')
+        self.grid.set_captions([f'{param_name} = {value}' for value in values])
+        self._total = len(values)
+        self._finished = 0
+        self._update_progress()
+
+    def on_sweep_result(self, result: SweepResult):
+        if result.error is None:
+            self.grid.set_image(result.index, result.thumbnail, f'{result.value}: {result.seconds * 1000:.1f} ms')
+        else:
+            self.grid.set_error(result.index, str(result.error))
+        self._finished += 1
+        self._update_progress()
+
+    def _update_progress(self):
+        self.progress_label.setText(f'{self._finished}/{self._total} done')
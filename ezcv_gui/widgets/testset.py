@@ -0,0 +1,80 @@
+import os
+from typing import List
+
+from PyQt6.QtWidgets import QWidget, QPushButton, QFileDialog, QVBoxLayout, QHBoxLayout, QLabel, QListWidgetItem
+
+from ezcv_gui.controller import EzCVController
+from ezcv_gui.testset import TestSetResult
+from ezcv_gui.widgets.grid import ImageGridWidget
+
+
+IMAGE_FILES_FILTER = 'Image Files(*.png *.jpg *.bmp *.jpeg *.tif *.tiff)'
+
+
+class TestSetWidget(QWidget):
+    """ Pipeline output over every image of the test set. Double clicking an image makes it the current media
+    """
+    # Not a pytest test class, despite the name
+    __test__ = False
+
+    def __init__(self, controller: EzCVController, parent=None):
+        super().__init__(parent=parent)
+        self._controller = controller
+        self._generation = 0
+        self._finished = 0
+
+        self.load_button = QPushButton('Load Test Set', self)
+        self.clear_button = QPushButton('Clear', self)
+        self.progress_label = QLabel(self)
+        self.grid = ImageGridWidget(self)
+
+        self.init_ui()
+
+    def init_ui(self):
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addWidget(self.load_button)
+        buttons_layout.addWidget(self.clear_button)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(self.progress_label)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(buttons_layout)
+        layout.addWidget(self.grid)
+
+        self._controller.test_set_loaded.connect(self.on_test_set_loaded)
+        self._controller.test_set_result.connect(self.on_test_set_result)
+        self.load_button.clicked.connect(self.pick_files_popup)
+        self.clear_button.clicked.connect(self._controller.clear_test_set)
+        self.grid.itemDoubleClicked.connect(self.on_item_double_clicked)
+
+    def on_test_set_loaded(self, fnames: List[str]):
+        self.grid.set_captions([os.path.basename(fname) for fname in fnames])
+        self._finished = 0
+        self._update_progress()
+
+    def on_test_set_result(self, result: TestSetResult):
+        if result.generation != self._generation:
+            # A run of a newer pipeline state
+            self._generation = result.generation
+            self._finished = 0
+        if result.error is None:
+            shape = 'x'.join(str(d) for d in result.image.shape)
+            self.grid.set_image(result.index, result.thumbnail, f'{shape} {result.image.dtype}, '
+                                                                f'{result.seconds * 1000:.1f} ms')
+        else:
+            self.grid.set_error(result.index, str(result.error))
+        self._finished += 1
+        self._update_progress()
+
+    def on_item_double_clicked(self, item: QListWidgetItem):
+        fname = self._controller.test_set.fnames[self.grid.row(item)]
+        self._controller.load_media(fname)
+
+    def pick_files_popup(self):
+        fnames, _ = QFileDialog.getOpenFileNames(self, 'Pick Test Set Images', '~', IMAGE_FILES_FILTER)
+        if fnames:
+            self._controller.load_test_set(fnames)
+
+    def _update_progress(self):
+        total = len(self._controller.test_set)
+        self.progress_label.setText(f'{self._finished}/{total} done' if total else '')
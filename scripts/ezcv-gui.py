@@ -1,36 +1,108 @@
-import importlib
+import time
+# Taken before any other import, so that --trace-startup can time them
+_STARTED_AT = time.perf_counter()
+
+import functools
+import io
 import sys
-from typing import List
 
 import click
-import importlib_metadata
 
 from PyQt6.QtWidgets import QApplication
 
+from ezcv import CompVizPipeline
+from ezcv.exceptions import ConfigParsingError
+from ezcv_gui import tracing
+from ezcv_gui.batch import run_batch
+from ezcv_gui.cache import DiskCache, default_disk_cache_dir
+from ezcv_gui.catalog import OperatorCatalog
 from ezcv_gui.main import EzCV
+from ezcv_gui.plugins import load_operators, load_includes
+from ezcv_gui.server import PipelineServer, default_server_address
+
 
+_IMPORTED_AT = time.perf_counter()
 
-@click.command(name='ezCV-GUI')
+
+@click.group(name='ezCV-GUI', invoke_without_command=True)
 @click.option('--include', '-i', multiple=True)
-def ezcv_gui(include):
+@click.option('--rebuild-catalog', is_flag=True, help='Import every operators library again to refresh their catalog')
+@click.option('--trace-startup', is_flag=True, help='Print a timeline of the startup phases')
+@click.option('--disk-cache-dir', type=click.Path(file_okay=False), default=default_disk_cache_dir,
+              help='Where stages outputs are kept across sessions')
+@click.option('--no-disk-cache', is_flag=True, help="Don't keep stages outputs across sessions")
+@click.pass_context
+def ezcv_gui(ctx, include, rebuild_catalog, trace_startup, disk_cache_dir, no_disk_cache):
+    if ctx.invoked_subcommand is not None:
+        return
+    if trace_startup:
+        tracing.start_trace(origin=_STARTED_AT).add('imports', _STARTED_AT, _IMPORTED_AT)
+    with tracing.phase('includes'):
+        load_includes(include)
+    with tracing.phase('QApplication'):
+        app = QApplication([])
+    disk_cache = DiskCache(disk_cache_dir) if not no_disk_cache else None
+    main_widget = EzCV(catalog_loader=functools.partial(OperatorCatalog.load, rebuild=rebuild_catalog),
+                       disk_cache=disk_cache)
+    exit_code = app.exec()
+    if disk_cache is not None:
+        disk_cache.close()
+    sys.exit(exit_code)
+
+
+@ezcv_gui.command()
+@click.argument('config', type=click.Path(exists=True, dir_okay=False))
+@click.argument('inputs', nargs=-1, required=True)
+@click.option('--output', '-o', required=True, type=click.Path(file_okay=False), help='Output directory')
+@click.option('--workers', '-w', type=int, default=None, help='Number of worker processes. Defaults to CPU count')
+@click.option('--no-resume', is_flag=True, help='Process every image, even those with an up to date output')
+@click.option('--disk-cache', is_flag=True, help='Go through the stages outputs kept by the GUI and previous batches')
+@click.pass_context
+def batch(ctx, config, inputs, output, workers, no_resume, disk_cache):
+    """ Run CONFIG over INPUTS, which can be image files, directories or glob patterns
+    """
+    include = ctx.parent.params['include']
+    disk_cache_dir = ctx.parent.params['disk_cache_dir'] if disk_cache else None
     load_operators()
     load_includes(include)
-    app = QApplication([])
-    main_widget = EzCV()
-    sys.exit(app.exec())
-
+    with open(config, 'r') as fin:
+        try:
+            CompVizPipeline.load(io.StringIO(fin.read()))
+        except ConfigParsingError as e:
+            raise click.ClickException('\n'.join(str(a) for a in e.args))
 
-def load_operators():
-    entry_points = importlib_metadata.entry_points(group='ezcv_operators')
-    for entry_point in entry_points:
-        print(f'Loading operators library "{entry_point.name}"')
-        entry_point.load()
+    summary = run_batch(config, inputs, output, workers=workers, includes=include, resume=not no_resume,
+                        disk_cache_dir=disk_cache_dir)
+    click.echo(summary)
 
 
-def load_includes(includes: List[str]):
-    for include in includes:
-        print(f'Loading module "{include}"')
-        importlib.import_module(include)
+@ezcv_gui.command()
+@click.argument('config', type=click.Path(exists=True, dir_okay=False), required=False)
+@click.option('--listen', '-l', default=default_server_address,
+              help='host:port on a loopback address, or unix:PATH. Defaults to a Unix socket in the runtime directory')
+@click.option('--workers', '-w', type=int, default=None, help='Number of worker threads. Defaults to CPU count')
+@click.pass_context
+def serve(ctx, config, listen, workers):
+    """ Keep CONFIG loaded and run it over the images sent by other processes, until interrupted
+    """
+    load_operators()
+    load_includes(ctx.parent.params['include'])
+    if config is not None:
+        with open(config, 'r') as fin:
+            config = fin.read()
+    try:
+        server = PipelineServer(listen, config=config, workers=workers)
+    except ConfigParsingError as e:
+        raise click.ClickException('\n'.join(str(a) for a in e.args))
+    except (OSError, ValueError) as e:
+        raise click.ClickException(f"Couldn't listen on {listen}: {e}")
+    click.echo(f'Serving on {server.address}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
 
 
 if __name__ == '__main__':
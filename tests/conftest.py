@@ -24,4 +24,7 @@ def test_img(test_img_fname):
 
 @pytest.fixture
 def controller():
-    return EzCVController()
+    controller = EzCVController()
+    yield controller
+    # Leftover runs would otherwise keep going while the next test runs
+    controller.shutdown()
@@ -0,0 +1,121 @@
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from ezcv import CompVizPipeline
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv_gui.batch import run_batch, iter_inputs, MANIFEST_NAME
+
+
+@pytest.fixture
+def config_fname(tmp_path):
+    pipeline = CompVizPipeline()
+    pipeline.add_operator('blur', GaussianBlur())
+    fname = str(tmp_path / 'config.yaml')
+    with open(fname, 'w') as fout:
+        pipeline.save(fout)
+    return fname
+
+
+@pytest.fixture
+def input_dir(tmp_path, test_img_fname):
+    path = tmp_path / 'inputs'
+    path.mkdir()
+    for i in range(5):
+        shutil.copy(test_img_fname, str(path / f'img_{i}.png'))
+    (path / 'notes.txt').write_text('not an image')
+    return str(path)
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    return str(tmp_path / 'outputs')
+
+
+def test_process_directory(config_fname, input_dir, output_dir, test_img):
+    summary = run_batch(config_fname, [input_dir], output_dir, workers=2)
+    assert summary.processed == 5
+    assert summary.failed == 0
+    assert sorted(os.listdir(output_dir)) == [MANIFEST_NAME] + [f'img_{i}.png' for i in range(5)]
+
+    with open(config_fname) as fin:
+        pipeline = CompVizPipeline.load(fin)
+    expected, _ = pipeline.run(test_img)
+    result = cv2.imread(os.path.join(output_dir, 'img_0.png'))
+    assert np.array_equal(result, expected)
+
+
+def test_resume(config_fname, input_dir, output_dir):
+    run_batch(config_fname, [input_dir], output_dir, workers=2)
+    summary = run_batch(config_fname, [input_dir], output_dir, workers=2)
+    assert summary.processed == 0
+    assert summary.skipped == 5
+
+
+def test_disk_cache(config_fname, input_dir, output_dir, tmp_path, test_img):
+    disk_cache_dir = str(tmp_path / 'cache')
+    run_batch(config_fname, [input_dir], output_dir, workers=2, disk_cache_dir=disk_cache_dir)
+    # Every input is the same image
+    assert len([fname for fname in os.listdir(disk_cache_dir) if fname.endswith('.npy')]) == 1
+    shutil.rmtree(output_dir)
+    summary = run_batch(config_fname, [input_dir], output_dir, workers=2, disk_cache_dir=disk_cache_dir)
+    assert summary.processed == 5
+
+    with open(config_fname) as fin:
+        pipeline = CompVizPipeline.load(fin)
+    expected, _ = pipeline.run(test_img)
+    assert np.array_equal(cv2.imread(os.path.join(output_dir, 'img_0.png')), expected)
+
+
+def test_resume_after_config_change(config_fname, input_dir, output_dir, test_img):
+    run_batch(config_fname, [input_dir], output_dir, workers=2)
+    pipeline = CompVizPipeline()
+    blur = GaussianBlur()
+    blur.kernel_size = 9
+    pipeline.add_operator('blur', blur)
+    with open(config_fname, 'w') as fout:
+        pipeline.save(fout)
+
+    summary = run_batch(config_fname, [input_dir], output_dir, workers=2)
+    assert summary.processed == 5
+    assert summary.skipped == 0
+    expected, _ = pipeline.run(test_img.copy())
+    assert np.array_equal(cv2.imread(os.path.join(output_dir, 'img_0.png')), expected)
+
+    summary = run_batch(config_fname, [input_dir], output_dir, workers=2)
+    assert summary.skipped == 5
+
+
+def test_no_resume(config_fname, input_dir, output_dir):
+    run_batch(config_fname, [input_dir], output_dir, workers=2)
+    summary = run_batch(config_fname, [input_dir], output_dir, workers=2, resume=False)
+    assert summary.processed == 5
+
+
+def test_glob_keeps_relative_paths(config_fname, input_dir, output_dir):
+    pattern = os.path.join(os.path.dirname(input_dir), '**', 'img_[01].png')
+    summary = run_batch(config_fname, [pattern], output_dir, workers=1)
+    assert summary.processed == 2
+    assert sorted(os.listdir(os.path.join(output_dir, 'inputs'))) == ['img_0.png', 'img_1.png']
+
+
+def test_report_failures(config_fname, tmp_path, output_dir):
+    missing = str(tmp_path / 'missing.png')
+    summary = run_batch(config_fname, [missing], output_dir, workers=1)
+    assert summary.failed == 1
+    assert summary.processed == 0
+
+
+def test_summary(config_fname, input_dir, output_dir):
+    summary = run_batch(config_fname, [input_dir], output_dir, workers=2)
+    assert summary.images_per_second > 0
+    assert 0 < summary.latency_percentile(50) <= summary.latency_percentile(99)
+    assert 'images/s' in str(summary)
+
+
+def test_iter_inputs_skips_non_images(input_dir):
+    names = sorted(relative for _, relative in iter_inputs([input_dir]))
+    assert names == [f'img_{i}.png' for i in range(5)]
@@ -0,0 +1,150 @@
+import os
+from typing import List
+
+import numpy as np
+import pytest
+
+from ezcv_gui.cache import LRUCache, DiskCache, content_digest
+
+
+def _array(nbytes: int) -> np.ndarray:
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+def test_get_and_put():
+    cache = LRUCache(100)
+    value = _array(10)
+    cache.put('a', value)
+    assert cache.get('a') is value
+    assert cache.get('b') is None
+    assert cache.nbytes == 10
+
+
+def test_evict_least_recently_used():
+    cache = LRUCache(30)
+    cache.put('a', _array(10))
+    cache.put('b', _array(10))
+    cache.put('c', _array(10))
+    cache.get('a')
+    cache.put('d', _array(10))
+    assert 'a' in cache and 'c' in cache and 'd' in cache
+    assert 'b' not in cache
+    assert cache.nbytes == 30
+
+
+def test_dont_store_values_bigger_than_budget():
+    cache = LRUCache(10)
+    cache.put('a', _array(5))
+    cache.put('b', _array(11))
+    assert 'b' not in cache
+    assert 'a' in cache
+
+
+def test_replace_value():
+    cache = LRUCache(100)
+    cache.put('a', _array(10))
+    cache.put('a', _array(20))
+    assert cache.nbytes == 20
+    assert len(cache) == 1
+
+
+def test_shrink_budget():
+    cache = LRUCache(100)
+    cache.put('a', _array(40))
+    cache.put('b', _array(40))
+    cache.max_bytes = 50
+    assert 'a' not in cache and 'b' in cache
+    assert cache.nbytes == 40
+
+
+@pytest.fixture
+def disk_cache_dir(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+def test_disk_cache_round_trip(disk_cache_dir):
+    cache = DiskCache(disk_cache_dir, 1000)
+    value = np.arange(12, dtype=np.float32).reshape(3, 4)
+    cache.put('a', value)
+    cached = cache.get('a')
+    np.testing.assert_array_equal(cached, value)
+    assert cached.dtype == value.dtype
+    assert not cached.flags.writeable
+    assert cache.get('b') is None
+
+
+def test_disk_cache_outlives_instances(disk_cache_dir):
+    _stored(disk_cache_dir, 'a')
+    cache = DiskCache(disk_cache_dir, 1000)
+    assert 'a' in cache
+    np.testing.assert_array_equal(cache.get('a'), _array(10))
+
+
+def test_disk_cache_evicts_least_recently_used(disk_cache_dir):
+    entry_bytes = os.path.getsize(_stored(disk_cache_dir, 'a'))
+    cache = DiskCache(disk_cache_dir, 3 * entry_bytes)
+    cache.put('b', _array(10))
+    cache.put('c', _array(10))
+    cache.get('a')
+    cache.put('d', _array(10))
+    cache.flush()
+    assert 'a' in cache and 'c' in cache and 'd' in cache
+    assert 'b' not in cache
+    assert len(_entries_files(disk_cache_dir)) == 3
+
+
+def test_disk_cache_copies_writeable_arrays(disk_cache_dir):
+    cache = DiskCache(disk_cache_dir, 1000)
+    value = _array(10)
+    cache.put('a', value)
+    value[:] = 1
+    cache.close()
+    np.testing.assert_array_equal(DiskCache(disk_cache_dir, 1000).get('a'), _array(10))
+
+
+def test_disk_cache_drops_writes_that_cant_keep_up(disk_cache_dir):
+    cache = DiskCache(disk_cache_dir, 1000, max_pending_bytes=0)
+    cache.put('a', _array(10))
+    cache.close()
+    assert 'a' not in cache
+    assert _entries_files(disk_cache_dir) == []
+
+
+def test_disk_cache_budget_shared_between_instances(disk_cache_dir):
+    entry_bytes = os.path.getsize(_stored(disk_cache_dir, 'a'))
+    caches = [DiskCache(disk_cache_dir, 3 * entry_bytes) for _ in range(2)]
+    for i, cache in enumerate(caches):
+        cache.put(f'b{i}', _array(10))
+        cache.put(f'c{i}', _array(10))
+        cache.flush()
+    assert len(_entries_files(disk_cache_dir)) == 3
+
+
+def test_disk_cache_drops_corrupted_entries(disk_cache_dir):
+    fname = _stored(disk_cache_dir, 'a')
+    with open(fname, 'r+b') as fout:
+        fout.seek(-1, os.SEEK_END)
+        fout.write(b'\xff')
+    cache = DiskCache(disk_cache_dir, 1000)
+    assert cache.get('a') is None
+    assert 'a' not in cache
+    assert not os.path.exists(fname)
+
+
+def test_content_digest():
+    img = _array(10)
+    assert content_digest(img, 'config') == content_digest(img.copy(), 'config')
+    assert content_digest(img, 'config') != content_digest(img, 'other config')
+    assert content_digest(img) != content_digest(img.reshape(2, 5))
+
+
+def _stored(disk_cache_dir: str, key: str) -> str:
+    cache = DiskCache(disk_cache_dir, 1000)
+    cache.put(key, _array(10))
+    cache.close()
+    fname, = [fname for fname in _entries_files(disk_cache_dir) if fname.startswith(key)]
+    return os.path.join(disk_cache_dir, fname)
+
+
+def _entries_files(disk_cache_dir: str) -> List[str]:
+    return [fname for fname in os.listdir(disk_cache_dir) if fname.endswith('.npy')]
@@ -0,0 +1,112 @@
+import sys
+from unittest import mock
+
+import importlib_metadata
+import pytest
+
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv_gui.catalog import OperatorCatalog, OperatorEntry, _load_entry_point
+
+
+LIBRARY_CODE = '''
+from ezcv.operator import Operator
+
+
+class {name}(Operator):
+    def run(self, img, ctx):
+        return img
+'''
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch, request):
+    """ An operators library that isn't imported yet, exposed through an entry point
+    """
+    module_name = f'catalog_test_lib_{request.node.name}'.replace('[', '_').replace(']', '_')
+    operator_name = 'CatalogTestOperator_' + request.node.name.replace('[', '_').replace(']', '_')
+    (tmp_path / f'{module_name}.py').write_text(LIBRARY_CODE.format(name=operator_name))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    entry_point = importlib_metadata.EntryPoint(name='test_lib', value=module_name, group='ezcv_operators')
+
+    def entry_points(group, name=None):
+        return [entry_point] if name in (None, entry_point.name) else []
+
+    with mock.patch('ezcv_gui.catalog.importlib_metadata.entry_points', side_effect=entry_points):
+        yield module_name, operator_name
+
+
+@pytest.fixture
+def cache_fname(tmp_path):
+    return str(tmp_path / 'cache' / 'operators_catalog.json')
+
+
+@pytest.fixture
+def library_loads():
+    with mock.patch('ezcv_gui.catalog._load_entry_point', wraps=_load_entry_point) as m:
+        yield m
+
+
+def test_build_imports_libraries(library, cache_fname, library_loads):
+    module_name, operator_name = library
+    catalog = OperatorCatalog.load(cache_fname)
+    assert library_loads.call_count == 1
+    assert module_name in sys.modules
+    entry = catalog.available_operators()[operator_name]
+    assert entry.entry_point == 'test_lib'
+    assert entry.module == module_name
+
+
+def test_cached_catalog_defers_imports(library, cache_fname, library_loads):
+    module_name, operator_name = library
+    OperatorCatalog.load(cache_fname)
+    library_loads.reset_mock()
+
+    catalog = OperatorCatalog.load(cache_fname)
+    library_loads.assert_not_called()
+    entry = catalog.entries[0]
+    assert entry.name == operator_name
+    assert not entry.is_loaded
+
+    operator_cls = entry.load()
+    library_loads.assert_called_once()
+    assert operator_cls.__name__ == operator_name
+
+
+def test_rebuild_when_libraries_change(library, cache_fname, library_loads):
+    OperatorCatalog.load(cache_fname)
+    library_loads.reset_mock()
+    with mock.patch('ezcv_gui.catalog._distribution_version', return_value='99.0'):
+        OperatorCatalog.load(cache_fname)
+    library_loads.assert_called_once()
+
+
+def test_rebuild_corrupted_cache(library, cache_fname, library_loads):
+    module_name, operator_name = library
+    OperatorCatalog.load(cache_fname)
+    library_loads.reset_mock()
+    with open(cache_fname, 'w') as fout:
+        fout.write('{not json')
+
+    catalog = OperatorCatalog.load(cache_fname)
+    library_loads.assert_called_once()
+    assert operator_name in catalog.available_operators()
+
+
+def test_load_config_operators(library, cache_fname, library_loads):
+    module_name, operator_name = library
+    OperatorCatalog.load(cache_fname)
+    catalog = OperatorCatalog.load(cache_fname)
+    library_loads.reset_mock()
+
+    catalog.load_config_operators('operators:\n- name: blur\n  implementation: some.other.Operator\n')
+    library_loads.assert_not_called()
+    catalog.load_config_operators(f'operators:\n- name: op\n  implementation: {module_name}.{operator_name}\n')
+    library_loads.assert_called_once()
+
+
+def test_entry_from_class():
+    entry = OperatorEntry.from_class(GaussianBlur)
+    assert entry.is_loaded
+    assert entry.load() is GaussianBlur
+    assert 'kernel_size' in entry.parameters
+    assert OperatorEntry.from_dict(entry.to_dict()).implementation == entry.implementation
@@ -1,9 +1,29 @@
+import threading
 from unittest import mock
 
+import cv2
 import numpy as np
+import pytest
 
+from ezcv.operator import Operator
 from ezcv.operator.implementations.blur import GaussianBlur
 from ezcv.operator.implementations.color_space import ColorSpaceChange
+from ezcv_gui.cache import DiskCache
+from ezcv_gui.controller import EzCVController
+from ezcv_gui.engine import RunResult, run_operator
+from ezcv_gui.preview import full_resolution_only, make_thumbnail, _FULL_RESOLUTION_OPERATORS, \
+    DEFAULT_THUMBNAIL_PIXELS
+from ezcv_gui.sources import SyntheticSource
+
+
+BLUR_RUN = 'ezcv.operator.implementations.blur.GaussianBlur.run'
+
+
+class _StretchContrast(Operator):
+    """ Depends on the whole image, so it isn't tile safe
+    """
+    def run(self, img, ctx):
+        return cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX)
 
 
 class TestAddOperator:
@@ -47,12 +67,15 @@ class TestAddOperator:
 
 
 class TestProcessCurrMedia:
-    def test_call_pipeline_run(self, controller, test_img):
+    def test_call_pipeline_run(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
         controller.curr_media = test_img
-        with mock.patch.object(controller.cvpipeline, 'run') as m:
-            m.return_value = (test_img, None)
-            controller.process_curr_media()
-        m.assert_called_with(test_img)
+        with mock.patch(BLUR_RUN) as m:
+            m.return_value = test_img
+            with qtbot.waitSignal(controller.show_media, timeout=1000):
+                controller.process_curr_media()
+        m.assert_called_once()
+        assert m.call_args[0][0] is test_img
 
     def test_emit_show_media_signal(self, qtbot, controller, test_img):
         controller.curr_media = test_img
@@ -61,12 +84,95 @@ class TestProcessCurrMedia:
             assert img is test_img
 
         controller.show_media.connect(on_media_show)
-        with qtbot.waitSignal(controller.show_media, timeout=100):
+        with qtbot.waitSignal(controller.show_media, timeout=1000):
+            controller.process_curr_media()
+
+    def test_dont_run_on_gui_thread(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        gui_thread = threading.current_thread()
+        run_threads = []
+
+        def run(img, ctx):
+            run_threads.append(threading.current_thread())
+            return img
+
+        with mock.patch(BLUR_RUN, side_effect=run):
+            with qtbot.waitSignal(controller.show_media, timeout=1000):
+                controller.process_curr_media()
+        assert run_threads and gui_thread not in run_threads
+
+    def test_drop_superseded_runs(self, qtbot, test_img):
+        controller = EzCVController(stage_cache_bytes=0)
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        started = threading.Event()
+        release = threading.Event()
+        run_calls = []
+
+        def run(img, ctx):
+            run_calls.append(img)
+            started.set()
+            release.wait(1)
+            return img
+
+        shown = []
+        controller.show_media.connect(shown.append)
+        with mock.patch(BLUR_RUN, side_effect=run):
+            controller.process_curr_media()
+            assert started.wait(1)
+            for _ in range(4):
+                controller.process_curr_media()
+            release.set()
+            assert controller.wait_for_processing(timeout=2)
+            qtbot.wait(50)
+        # The first run was already in flight, the 3 intermediate ones got replaced by the last one
+        assert len(run_calls) == 2
+        assert len(shown) == 2
+
+    def test_abandon_superseded_runs_between_stages(self, qtbot, test_img):
+        controller = EzCVController(stage_cache_bytes=0)
+        for _ in range(3):
+            controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        started = threading.Event()
+        release = threading.Event()
+        run_calls = []
+
+        def run(img, ctx):
+            run_calls.append(img)
+            started.set()
+            release.wait(1)
+            return img
+
+        shown = []
+        controller.show_media.connect(shown.append)
+        with mock.patch(BLUR_RUN, side_effect=run):
+            controller.process_curr_media()
+            assert started.wait(1)
+            controller.process_curr_media()
+            release.set()
+            assert controller.wait_for_processing(timeout=2)
+            qtbot.wait(50)
+        # The first run stopped after its first stage, the second one ran all of them
+        assert len(run_calls) == 1 + 3
+        assert len(shown) == 1
+        assert controller.stats.cancelled_runs == 1
+        controller.shutdown()
+
+    def test_ignore_stale_results(self, qtbot, controller, test_img):
+        controller.curr_media = test_img
+        shown = []
+        controller.show_media.connect(shown.append)
+        with qtbot.waitSignal(controller.show_media, timeout=1000):
             controller.process_curr_media()
+        stale = RunResult(generation=0, media=test_img, image=np.zeros_like(test_img))
+        controller._on_run_finished(stale)
+        assert len(shown) == 1
 
     def test_dont_process_media_if_not_available(self, controller):
         controller.curr_media = None
-        with mock.patch.object(controller.cvpipeline, 'run') as m:
+        with mock.patch.object(controller._engine, 'submit') as m:
             controller.process_curr_media()
             m.assert_not_called()
 
@@ -86,22 +192,457 @@ class TestProcessCurrMedia:
         assert not called
 
 
+class TestStageCache:
+    @pytest.fixture
+    def operator_calls(self):
+        calls = []
+
+        def record(operator_name, operator, img, ctx=None):
+            calls.append(operator_name)
+            return run_operator(operator_name, operator, img, ctx)
+
+        with mock.patch('ezcv_gui.engine.run_operator', side_effect=record):
+            yield calls
+
+    @staticmethod
+    def run_and_wait(qtbot, controller):
+        with qtbot.waitSignal(controller.show_media, timeout=1000):
+            controller.process_curr_media()
+
+    @pytest.fixture
+    def three_stages_controller(self, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.add_operator(GaussianBlur)
+        controller.add_operator(ColorSpaceChange)
+        controller.curr_media = test_img
+        return controller
+
+    def test_resume_from_updated_operator(self, qtbot, three_stages_controller, operator_calls):
+        controller = three_stages_controller
+        self.run_and_wait(qtbot, controller)
+        assert operator_calls == ['GaussianBlur', 'GaussianBlur_1', 'ColorSpaceChange']
+
+        operator_calls.clear()
+        controller.operators['GaussianBlur_1'].kernel_size = 5
+        self.run_and_wait(qtbot, controller)
+        assert operator_calls == ['GaussianBlur_1', 'ColorSpaceChange']
+
+    def test_same_result_as_full_run(self, qtbot, three_stages_controller, test_img):
+        controller = three_stages_controller
+        self.run_and_wait(qtbot, controller)
+        controller.operators['GaussianBlur_1'].kernel_size = 5
+        with qtbot.waitSignal(controller.show_media, timeout=1000) as blocker:
+            controller.process_curr_media()
+        expected, _ = controller.cvpipeline.run(test_img)
+        assert np.array_equal(blocker.args[0], expected)
+
+    def test_resume_after_move(self, qtbot, three_stages_controller, operator_calls):
+        controller = three_stages_controller
+        self.run_and_wait(qtbot, controller)
+        operator_calls.clear()
+        controller.operators['GaussianBlur_1'].kernel_size = 5
+        controller.move_operator(2, 1)
+        controller.wait_for_processing(timeout=1)
+        assert operator_calls == ['ColorSpaceChange', 'GaussianBlur_1']
+
+    def test_nothing_to_run_when_unchanged(self, qtbot, three_stages_controller, operator_calls):
+        controller = three_stages_controller
+        self.run_and_wait(qtbot, controller)
+        operator_calls.clear()
+        self.run_and_wait(qtbot, controller)
+        assert operator_calls == []
+
+    def test_invalidate_on_new_media(self, qtbot, three_stages_controller, operator_calls, test_img):
+        controller = three_stages_controller
+        self.run_and_wait(qtbot, controller)
+        operator_calls.clear()
+        controller.curr_media = test_img.copy()
+        self.run_and_wait(qtbot, controller)
+        assert len(operator_calls) == 3
+
+
+class TestStageInspector:
+    @pytest.fixture
+    def two_stages_controller(self, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.add_operator(ColorSpaceChange)
+        controller.curr_media = test_img
+        return controller
+
+    @staticmethod
+    def run_and_wait(qtbot, controller):
+        with qtbot.waitSignal(controller.stages_captured, timeout=1000) as blocker:
+            controller.process_curr_media()
+        return blocker.args[0]
+
+    def test_capture_stages(self, qtbot, two_stages_controller, test_img):
+        stages = self.run_and_wait(qtbot, two_stages_controller)
+        assert [stage.name for stage in stages] == ['GaussianBlur', 'ColorSpaceChange']
+        blurred = run_operator('GaussianBlur', two_stages_controller.operators['GaussianBlur'], test_img)
+        assert np.array_equal(stages[0].image, blurred)
+        for stage in stages:
+            height, width = stage.thumbnail.shape[:2]
+            assert height * width <= DEFAULT_THUMBNAIL_PIXELS
+            assert not stage.image.flags.writeable
+
+    def test_capture_budget(self, qtbot, two_stages_controller, test_img):
+        two_stages_controller.stage_capture_bytes = test_img.nbytes
+        stages = self.run_and_wait(qtbot, two_stages_controller)
+        assert stages[0].image is not None
+        assert stages[1].image is None
+        assert stages[1].thumbnail is not None
+
+    def test_thumbnails_on_worker(self, qtbot, two_stages_controller):
+        threads = []
+
+        def record(img, max_pixels):
+            threads.append(threading.current_thread())
+            return make_thumbnail(img, max_pixels)
+
+        with mock.patch('ezcv_gui.engine.make_thumbnail', side_effect=record):
+            self.run_and_wait(qtbot, two_stages_controller)
+        assert threads and threading.current_thread() not in threads
+
+    def test_select_stage_without_rerun(self, qtbot, two_stages_controller):
+        controller = two_stages_controller
+        stages = self.run_and_wait(qtbot, controller)
+        with mock.patch('ezcv_gui.engine.run_operator') as m:
+            with qtbot.waitSignal(controller.show_media, timeout=1000) as blocker:
+                controller.select_stage('GaussianBlur')
+            assert blocker.args[0] is stages[0].image
+            with qtbot.waitSignal(controller.show_media, timeout=1000) as blocker:
+                controller.select_stage(None)
+            assert np.array_equal(blocker.args[0], stages[1].image)
+        m.assert_not_called()
+
+    def test_selected_stage_kept_through_runs(self, qtbot, two_stages_controller):
+        controller = two_stages_controller
+        self.run_and_wait(qtbot, controller)
+        controller.select_stage('GaussianBlur')
+        controller.operators['GaussianBlur'].kernel_size = 5
+        with qtbot.waitSignal(controller.show_media, timeout=1000) as blocker:
+            controller.process_curr_media()
+        assert blocker.args[0] is controller.stage_outputs[0].image
+
+        controller.remove_operator(0)
+        assert controller.selected_stage is None
+
+
+class TestPreview:
+    @pytest.fixture
+    def preview_controller(self, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        height, width = test_img.shape[:2]
+        controller.preview_pixels = (height // 2) * (width // 2)
+        return controller
+
+    def test_interactive_update_uses_proxy(self, qtbot, preview_controller, test_img):
+        with qtbot.waitSignal(preview_controller.shown_resolution, timeout=1000) as blocker:
+            preview_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5, interactive=True)
+        width, height, preview = blocker.args
+        assert preview
+        assert width * height <= preview_controller.preview_pixels
+        assert height < test_img.shape[0]
+
+    def test_final_update_uses_full_resolution(self, qtbot, preview_controller, test_img):
+        with qtbot.waitSignal(preview_controller.show_media, timeout=1000) as blocker:
+            preview_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5)
+        assert blocker.args[0].shape == test_img.shape
+
+    def test_full_resolution_once_settled(self, qtbot, preview_controller, test_img):
+        preview_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5, interactive=True)
+
+        def full_resolution_shown(width, height, preview):
+            return not preview
+
+        with qtbot.waitSignal(preview_controller.shown_resolution, timeout=2000, check_params_cb=full_resolution_shown):
+            pass
+
+    def test_full_resolution_only_operators(self, qtbot, preview_controller):
+        full_resolution_only(GaussianBlur)
+        try:
+            with qtbot.waitSignal(preview_controller.shown_resolution, timeout=1000) as blocker:
+                preview_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5, interactive=True)
+        finally:
+            _FULL_RESOLUTION_OPERATORS.discard(GaussianBlur)
+        assert not blocker.args[2]
+
+    def test_small_media_isnt_downscaled(self, qtbot, preview_controller, test_img):
+        preview_controller.preview_pixels = test_img.shape[0] * test_img.shape[1]
+        with qtbot.waitSignal(preview_controller.shown_resolution, timeout=1000) as blocker:
+            preview_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5, interactive=True)
+        assert not blocker.args[2]
+
+
+class TestStats:
+    def test_emit_stage_timings(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.add_operator(ColorSpaceChange)
+        controller.curr_media = test_img
+        with qtbot.waitSignal(controller.stats_updated, timeout=1000) as blocker:
+            controller.process_curr_media()
+        run = blocker.args[0].last_run
+        assert [stage.name for stage in run.stages] == ['GaussianBlur', 'ColorSpaceChange']
+        assert run.stages[0].shape == test_img.shape
+        assert run.stages[0].nbytes == test_img.nbytes
+        assert run.total_seconds >= sum(stage.seconds for stage in run.stages)
+
+    def test_flag_cached_stages(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        with qtbot.waitSignal(controller.stats_updated, timeout=1000):
+            controller.process_curr_media()
+        with qtbot.waitSignal(controller.stats_updated, timeout=1000) as blocker:
+            controller.update_operator_parameter('GaussianBlur_1', 'kernel_size', 5)
+        stages = blocker.args[0].last_run.stages
+        assert stages[0].cached and not stages[1].cached
+
+
+class TestDiskCache:
+    def test_outlives_controllers(self, qtbot, test_img, tmp_path):
+        disk_cache_dir = str(tmp_path / 'cache')
+        for _ in range(2):
+            disk_cache = DiskCache(disk_cache_dir)
+            controller = EzCVController(disk_cache=disk_cache)
+            controller.add_operator(GaussianBlur)
+            controller.curr_media = test_img
+            with qtbot.waitSignal(controller.stats_updated, timeout=1000) as blocker:
+                controller.process_curr_media()
+            controller.shutdown()
+            disk_cache.close()
+        stage, = blocker.args[0].last_run.stages
+        assert stage.cached
+
+
+class TestStreaming:
+    def test_show_frames(self, qtbot, controller):
+        controller.add_operator(GaussianBlur)
+        with qtbot.waitSignal(controller.show_media, timeout=1000) as blocker:
+            controller.open_source(SyntheticSource(64, 48, fps=100))
+        assert blocker.args[0].shape == (48, 64, 3)
+        controller.close_source()
+
+    def test_process_newest_frame(self, qtbot, controller):
+        controller.open_source(SyntheticSource(64, 48, frames_count=20))
+        qtbot.waitUntil(lambda: controller._grabber.finished, timeout=2000)
+        controller.wait_for_processing(timeout=1)
+        qtbot.wait(50)
+        assert controller.curr_media[0, 0, 0] == 19
+        controller.close_source()
+
+    def test_emit_stats(self, qtbot, controller):
+        controller.open_source(SyntheticSource(64, 48, fps=100))
+        with qtbot.waitSignal(controller.stream_stats, timeout=2000) as blocker:
+            pass
+        assert blocker.args[0].decode_fps > 0
+        controller.close_source()
+
+    def test_load_image_stops_stream(self, qtbot, controller, test_img_fname):
+        controller.open_source(SyntheticSource(64, 48, fps=100))
+        controller.load_media(test_img_fname)
+        assert not controller.is_streaming
+        controller.wait_for_loading(1)
+
+
 class TestLoadMedia:
-    def test_run_cvpipeline_on_loaded_media(self, controller, test_img_fname):
-        with mock.patch.object(controller.cvpipeline, 'run') as m:
-            m.side_effect = lambda i: (i, None)
-            controller.load_media(test_img_fname)
+    def test_run_cvpipeline_on_loaded_media(self, qtbot, controller, test_img_fname):
+        controller.add_operator(GaussianBlur)
+        with mock.patch(BLUR_RUN) as m:
+            m.side_effect = lambda img, ctx: img
+            with qtbot.waitSignal(controller.show_media, timeout=1000):
+                controller.load_media(test_img_fname)
         m.assert_called_once()
 
-    def test_set_curr_media(self, controller, test_img_fname, test_img):
-        controller.load_media(test_img_fname)
+    def test_set_curr_media(self, qtbot, controller, test_img_fname, test_img):
+        with qtbot.waitSignal(controller.loading_finished, timeout=1000):
+            controller.load_media(test_img_fname)
         assert np.all(np.isclose(controller.curr_media, test_img))
 
-    def test_process_media(self, controller, test_img_fname):
+    def test_process_media(self, qtbot, controller, test_img_fname):
         with mock.patch.object(controller, 'process_curr_media') as m:
-            controller.load_media(test_img_fname)
+            with qtbot.waitSignal(controller.loading_finished, timeout=1000):
+                controller.load_media(test_img_fname)
         m.assert_called_once()
 
+    def test_doesnt_block(self, controller, test_img_fname):
+        controller.load_media(test_img_fname)
+        assert controller.curr_media is None
+
+    def test_unreadable_media(self, qtbot, controller, tmp_path):
+        fname = str(tmp_path / 'broken.png')
+        with open(fname, 'wb') as fout:
+            fout.write(b'not an image')
+        with qtbot.waitSignal(controller.error, timeout=1000):
+            controller.load_media(fname)
+        assert controller.curr_media is None
+
+    def test_unreadable_video(self, qtbot, controller, tmp_path):
+        fname = str(tmp_path / 'broken.mp4')
+        with open(fname, 'wb') as fout:
+            fout.write(b'not a video')
+        with qtbot.waitSignal(controller.error, timeout=1000):
+            controller.load_media(fname)
+        assert not controller.is_streaming
+
+    def test_cancel(self, qtbot, controller, test_img_fname):
+        controller.load_media(test_img_fname)
+        controller.cancel_loading()
+        assert controller.wait_for_loading(1)
+        qtbot.wait(50)
+        assert controller.curr_media is None
+
+
+class TestBrowseFolder:
+    @pytest.fixture
+    def folder(self, tmp_path, test_img):
+        for i in range(5):
+            cv2.imwrite(str(tmp_path / f'img{i}.png'), test_img)
+        (tmp_path / 'notes.txt').write_text('not an image')
+        return tmp_path
+
+    def test_open_folder_loads_first_image(self, qtbot, controller, folder):
+        with qtbot.waitSignal(controller.media_loaded, timeout=1000) as blocker:
+            controller.open_folder(str(folder))
+        assert blocker.args == [str(folder / 'img0.png')]
+        assert len(controller.folder_files) == 5
+
+    def test_next_and_previous(self, qtbot, controller, folder):
+        with qtbot.waitSignal(controller.media_loaded, timeout=1000):
+            controller.open_folder(str(folder))
+        with qtbot.waitSignal(controller.media_loaded, timeout=1000) as blocker:
+            controller.next_media()
+        assert blocker.args == [str(folder / 'img1.png')]
+        with qtbot.waitSignal(controller.media_loaded, timeout=1000) as blocker:
+            controller.previous_media()
+        assert blocker.args == [str(folder / 'img0.png')]
+
+    def test_neighbours_prefetched(self, qtbot, controller, folder):
+        controller.open_folder(str(folder))
+        qtbot.waitUntil(lambda: all(controller.media_cache.key(str(folder / f'img{i}.png')) in controller.media_cache
+                                    for i in range(3)), timeout=2000)
+        stats = controller.media_cache.stats()
+        with qtbot.waitSignal(controller.media_loaded, timeout=1000):
+            controller.next_media()
+        assert controller.media_cache.stats().hits == stats.hits + 1
+
+    def test_empty_folder(self, qtbot, controller, tmp_path):
+        with qtbot.waitSignal(controller.error, timeout=1000):
+            controller.open_folder(str(tmp_path))
+
+
+class TestTiledExecution:
+    def test_same_output_as_whole_frame(self, qtbot, controller):
+        controller.add_operator(GaussianBlur)
+        controller.add_operator(ColorSpaceChange)
+        controller.curr_media = np.random.RandomState(0).randint(0, 255, (600, 1100, 3), dtype=np.uint8)
+        with qtbot.waitSignal(controller.show_media, timeout=2000) as blocker:
+            controller.process_curr_media()
+        whole_frame = blocker.args[0]
+
+        controller.tiled_execution = True
+        controller.curr_media = controller.curr_media
+        with qtbot.waitSignal(controller.show_media, timeout=2000) as blocker:
+            controller.process_curr_media()
+        np.testing.assert_array_equal(blocker.args[0], whole_frame)
+
+    def test_off_by_default(self, controller):
+        assert not controller.tiled_execution
+
+
+class TestPipelineChanges:
+    @pytest.fixture
+    def processed_controller(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.add_operator(ColorSpaceChange)
+        controller.curr_media = test_img
+        with qtbot.waitSignal(controller.stages_captured, timeout=1000):
+            controller.process_curr_media()
+        return controller
+
+    def test_rename_doesnt_run(self, qtbot, processed_controller):
+        run_count = processed_controller.run_count
+        with qtbot.waitSignal(processed_controller.stages_captured, timeout=1000) as blocker:
+            processed_controller.rename_operator(0, 'blur')
+        assert processed_controller.run_count == run_count
+        assert [stage.name for stage in blocker.args[0]] == ['blur', 'ColorSpaceChange']
+
+    def test_no_op_move_doesnt_run(self, processed_controller):
+        run_count = processed_controller.run_count
+        processed_controller.move_operator(1, 1)
+        assert processed_controller.run_count == run_count
+
+    def test_move_runs_once(self, processed_controller):
+        run_count = processed_controller.run_count
+        processed_controller.move_operator(0, 1)
+        assert processed_controller.run_count == run_count + 1
+
+    def test_classify_changes(self, processed_controller):
+        assert processed_controller.pipeline_change() is None
+        color_space = processed_controller.operators['ColorSpaceChange']
+        param_name, spec = next(iter(color_space.get_parameters_specs().items()))
+        setattr(color_space, param_name, next(v for v in spec.possible_values if v != getattr(color_space, param_name)))
+        assert processed_controller.pipeline_change() == 1
+        processed_controller.operators['GaussianBlur'].kernel_size = 5
+        assert processed_controller.pipeline_change() == 0
+
+    def test_classify_removed_stage(self, processed_controller):
+        processed_controller.cvpipeline.remove_operator(1)
+        assert processed_controller.pipeline_change() == 1
+
+    def test_new_media_changes_everything(self, processed_controller, test_img):
+        processed_controller.curr_media = test_img
+        assert processed_controller.pipeline_change() == 0
+
+    def test_loading_same_config_doesnt_run(self, qtbot, processed_controller, tmp_path):
+        config_fname = str(tmp_path / 'config.yaml')
+        processed_controller.save_config(config_fname)
+        run_count = processed_controller.run_count
+        with qtbot.waitSignal(processed_controller.operators_list_updated, timeout=1000):
+            processed_controller.load_config(config_fname)
+        assert processed_controller.run_count == run_count
+
+    def test_batch_runs_once(self, processed_controller):
+        run_count = processed_controller.run_count
+        with processed_controller.batch_changes():
+            processed_controller.add_operator(GaussianBlur)
+            processed_controller.update_operator_parameter('GaussianBlur_1', 'kernel_size', 5)
+            with processed_controller.batch_changes():
+                processed_controller.move_operator(2, 0)
+            assert processed_controller.run_count == run_count
+        assert processed_controller.run_count == run_count + 1
+
+    def test_batch_cancelling_out_doesnt_run(self, processed_controller):
+        run_count = processed_controller.run_count
+        with processed_controller.batch_changes():
+            processed_controller.add_operator(GaussianBlur)
+            processed_controller.remove_operator(2)
+        assert processed_controller.run_count == run_count
+
+
+class TestLoadConfig:
+    def test_load_config(self, qtbot, controller, tmp_path):
+        controller.add_operator(GaussianBlur)
+        config_fname = str(tmp_path / 'config.yaml')
+        controller.save_config(config_fname)
+        controller.remove_operator(0)
+
+        with qtbot.waitSignal(controller.operators_list_updated, timeout=1000):
+            controller.load_config(config_fname)
+        assert list(controller.operators) == ['GaussianBlur']
+
+    def test_parsing_error(self, qtbot, controller, tmp_path):
+        config_fname = str(tmp_path / 'config.yaml')
+        with open(config_fname, 'w') as fout:
+            fout.write('operators: 3\n')
+        with qtbot.waitSignal(controller.loading_failed, timeout=1000):
+            controller.load_config(config_fname)
+
+    def test_missing_file(self, qtbot, controller, tmp_path):
+        with qtbot.waitSignal(controller.error, timeout=1000):
+            controller.load_config(str(tmp_path / 'missing.yaml'))
+
 
 class TestUpdateOperator:
     def test_happy_path(self, controller):
@@ -116,3 +657,149 @@ class TestUpdateOperator:
         controller.add_operator(GaussianBlur)
         with qtbot.waitSignal(controller.operator_parameter_updated, timeout=100):
             controller.update_operator_parameter('GaussianBlur', 'kernel_size', 123)
+
+
+class TestTestSet:
+    def test_load_runs_every_image(self, qtbot, controller, test_img_fname):
+        controller.add_operator(GaussianBlur)
+        results = list()
+        controller.test_set_result.connect(results.append)
+        with qtbot.waitSignal(controller.test_set_loaded, timeout=1000) as blocker:
+            controller.load_test_set([test_img_fname, test_img_fname])
+        assert blocker.args[0] == [test_img_fname, test_img_fname]
+        qtbot.waitUntil(lambda: len(results) == 2, timeout=5000)
+        assert sorted(result.index for result in results) == [0, 1]
+
+    def test_parameter_update_reruns(self, qtbot, controller, test_img_fname):
+        controller.add_operator(GaussianBlur)
+        with qtbot.waitSignal(controller.test_set_loaded, timeout=1000):
+            controller.load_test_set([test_img_fname])
+        with qtbot.waitSignal(controller.test_set_result, timeout=5000):
+            controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5)
+        qtbot.waitUntil(lambda: controller.test_set.wait_idle(0), timeout=5000)
+        with qtbot.waitSignal(controller.test_set_result, timeout=5000) as blocker:
+            controller.update_operator_parameter('GaussianBlur', 'kernel_size', 7)
+        assert blocker.args[0].generation == controller.test_set.generation
+
+    def test_unreadable_images(self, qtbot, controller, test_img_fname, tmp_path):
+        missing = str(tmp_path / 'missing.png')
+        with qtbot.waitSignal(controller.error, timeout=1000):
+            controller.load_test_set([test_img_fname, missing])
+        assert controller.test_set.fnames == [test_img_fname]
+
+    def test_doesnt_block(self, controller, test_img_fname):
+        controller.load_test_set([test_img_fname])
+        assert len(controller.test_set) == 0
+
+    def test_clear(self, qtbot, controller, test_img_fname):
+        with qtbot.waitSignal(controller.test_set_loaded, timeout=1000):
+            controller.load_test_set([test_img_fname])
+        with qtbot.waitSignal(controller.test_set_loaded, timeout=1000) as blocker:
+            controller.clear_test_set()
+        assert blocker.args[0] == []
+        assert len(controller.test_set) == 0
+
+
+class TestParameterSweep:
+    def test_sweep_parameter(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        results = list()
+        controller.sweep_result.connect(results.append)
+        with qtbot.waitSignal(controller.sweep_started, timeout=1000) as blocker:
+            controller.sweep_parameter('GaussianBlur', 'kernel_size', [3, 5])
+        assert blocker.args == ['GaussianBlur', 'kernel_size', [3, 5]]
+        qtbot.waitUntil(lambda: len(results) == 2, timeout=5000)
+
+    def test_default_values_from_spec(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        with qtbot.waitSignal(controller.sweep_started, timeout=1000) as blocker:
+            controller.sweep_parameter('GaussianBlur', 'kernel_size')
+        spec = GaussianBlur.get_parameters_specs()['kernel_size']
+        assert blocker.args[2][0] == spec.lower
+
+    def test_unknown_parameter(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        with qtbot.waitSignal(controller.error, timeout=1000):
+            controller.sweep_parameter('GaussianBlur', 'missing')
+
+
+class TestRegionOfInterest:
+    @pytest.fixture
+    def roi_controller(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        with qtbot.waitSignal(controller.show_media, timeout=1000):
+            controller.process_curr_media()
+        controller.roi_enabled = True
+        height, width = test_img.shape[:2]
+        controller.set_visible_region(width // 4, height // 4, width // 4, height // 4)
+        return controller
+
+    def test_update_runs_visible_region(self, qtbot, roi_controller, test_img):
+        with qtbot.waitSignal(roi_controller.show_patch, timeout=1000) as blocker:
+            roi_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5)
+        patch, x, y = blocker.args
+        height, width = test_img.shape[:2]
+        assert (x, y) == (width // 4, height // 4)
+        assert patch.shape[:2] == (height // 4, width // 4)
+
+        full_result, _ = roi_controller.cvpipeline.run(test_img)
+        np.testing.assert_array_equal(patch, full_result[y:y + patch.shape[0], x:x + patch.shape[1]])
+
+    def test_full_frame_when_idle(self, qtbot, roi_controller, test_img):
+        roi_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5)
+        with qtbot.waitSignal(roi_controller.show_media, timeout=3000) as blocker:
+            pass
+        assert blocker.args[0].shape == test_img.shape
+
+    def test_panning_runs_new_region(self, qtbot, roi_controller, test_img):
+        with qtbot.waitSignal(roi_controller.show_patch, timeout=1000):
+            roi_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5)
+        with qtbot.waitSignal(roi_controller.show_patch, timeout=1000) as blocker:
+            roi_controller.set_visible_region(0, 0, 10, 10)
+        assert blocker.args[1:] == [0, 0]
+
+    def test_halo_covers_the_pipeline_footprint(self, qtbot, roi_controller, test_img):
+        with qtbot.waitSignal(roi_controller.show_patch, timeout=1000):
+            roi_controller.add_operator(GaussianBlur)
+        with qtbot.waitSignal(roi_controller.show_patch, timeout=1000) as blocker:
+            roi_controller.update_operator_parameter('GaussianBlur_1', 'kernel_size', 31)
+        patch, x, y = blocker.args
+        full_result, _ = roi_controller.cvpipeline.run(test_img)
+        np.testing.assert_array_equal(patch, full_result[y:y + patch.shape[0], x:x + patch.shape[1]])
+
+    def test_whole_media_for_operators_that_arent_tile_safe(self, qtbot, roi_controller, test_img):
+        roi_controller.add_operator(_StretchContrast)
+        with qtbot.assertNotEmitted(roi_controller.show_patch, wait=100):
+            with qtbot.waitSignal(roi_controller.show_media, timeout=1000) as blocker:
+                roi_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5)
+        assert blocker.args[0].shape == test_img.shape
+
+    def test_scrolling_runs_where_it_settles(self, qtbot, roi_controller):
+        with qtbot.waitSignal(roi_controller.show_patch, timeout=1000):
+            roi_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5)
+        patches = []
+        roi_controller.show_patch.connect(lambda patch, x, y: patches.append((x, y)))
+        for x in range(10):
+            roi_controller.set_visible_region(x, 0, 10, 10)
+        qtbot.waitUntil(lambda: len(patches) > 0, timeout=1000)
+        qtbot.wait(200)
+        assert patches == [(9, 0)]
+
+    def test_regions_dont_evict_whole_media_stages(self, qtbot, roi_controller):
+        stage_cache_size = len(roi_controller._stage_cache)
+        with qtbot.waitSignal(roi_controller.show_patch, timeout=1000):
+            roi_controller.update_operator_parameter('GaussianBlur', 'kernel_size', 5)
+        assert len(roi_controller._stage_cache) == stage_cache_size
+        assert len(roi_controller._roi_cache) > 0
+
+    def test_disabled_by_default(self, qtbot, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        controller.set_visible_region(0, 0, 10, 10)
+        with qtbot.waitSignal(controller.show_media, timeout=1000) as blocker:
+            controller.process_curr_media()
+        assert blocker.args[0].shape == test_img.shape
@@ -0,0 +1,161 @@
+import cv2
+import numpy as np
+import pytest
+
+from ezcv import CompVizPipeline
+from ezcv_gui import loading
+from ezcv_gui.catalog import OperatorCatalog
+from ezcv_gui.loading import BackgroundLoader, MediaCache, MEDIA, TEST_SET
+
+
+@pytest.fixture
+def loader():
+    loader = BackgroundLoader()
+    yield loader
+    loader.shutdown()
+
+
+@pytest.fixture
+def jpeg_fname(tmp_path):
+    img = np.random.RandomState(0).randint(0, 255, (400, 600, 3), dtype=np.uint8)
+    fname = str(tmp_path / 'img.jpg')
+    cv2.imwrite(fname, img)
+    return fname
+
+
+def load(qtbot, loader, count, fn, *args):
+    results = list()
+    loader.loaded.connect(results.append)
+    fn(*args)
+    qtbot.waitUntil(lambda: len(results) >= count, timeout=2000)
+    return results
+
+
+def test_load_media(qtbot, loader, test_img_fname, test_img):
+    result, = load(qtbot, loader, 1, loader.load_media, test_img_fname)
+    assert result.kind == MEDIA and not result.reduced
+    np.testing.assert_array_equal(result.value, test_img)
+
+
+def test_reduced_first_look(qtbot, loader, jpeg_fname, monkeypatch):
+    monkeypatch.setattr(loading, 'REDUCED_DECODE_MIN_BYTES', 0)
+    reduced, full = load(qtbot, loader, 2, loader.load_media, jpeg_fname)
+    assert reduced.reduced and not full.reduced
+    assert reduced.value.shape[:2] == (400 // loading.REDUCED_DECODE_FACTOR, 600 // loading.REDUCED_DECODE_FACTOR)
+    assert full.value.shape[:2] == (400, 600)
+
+
+def test_small_files_decoded_once(qtbot, loader, jpeg_fname):
+    results = load(qtbot, loader, 1, loader.load_media, jpeg_fname)
+    qtbot.wait(50)
+    assert len(results) == 1
+
+
+def test_progress(qtbot, loader, jpeg_fname, monkeypatch):
+    monkeypatch.setattr(loading, 'READ_CHUNK_BYTES', 1024)
+    progress = list()
+    loader.progress.connect(lambda message, percent: progress.append(percent))
+    load(qtbot, loader, 1, loader.load_media, jpeg_fname)
+    read_progress = [percent for percent in progress if percent >= 0]
+    assert len(read_progress) > 1
+    assert read_progress == sorted(read_progress) and read_progress[-1] == 100
+
+
+def test_superseded_load_never_emitted(qtbot, loader, jpeg_fname, test_img_fname, monkeypatch):
+    monkeypatch.setattr(loading, 'READ_CHUNK_BYTES', 16)
+    results = list()
+    loader.loaded.connect(results.append)
+    loader.load_media(jpeg_fname)
+    loader.load_media(test_img_fname)
+    assert loader.wait_idle(5)
+    qtbot.waitUntil(lambda: len(results) >= 1, timeout=2000)
+    qtbot.wait(50)
+    assert [result.fname for result in results] == [test_img_fname]
+
+
+def test_cancel(qtbot, loader, jpeg_fname, monkeypatch):
+    monkeypatch.setattr(loading, 'READ_CHUNK_BYTES', 16)
+    results = list()
+    loader.loaded.connect(results.append)
+    loader.load_media(jpeg_fname)
+    loader.cancel()
+    assert loader.wait_idle(5)
+    qtbot.wait(50)
+    assert results == []
+
+
+def test_unreadable_media(qtbot, loader, tmp_path):
+    fname = str(tmp_path / 'broken.png')
+    with open(fname, 'wb') as fout:
+        fout.write(b'not an image')
+    result, = load(qtbot, loader, 1, loader.load_media, fname)
+    assert isinstance(result.error, ValueError)
+
+
+def test_load_config(qtbot, loader, tmp_path):
+    fname = str(tmp_path / 'config.yaml')
+    with open(fname, 'w') as fout:
+        CompVizPipeline().save(fout)
+    result, = load(qtbot, loader, 1, loader.load_config, fname, OperatorCatalog())
+    assert result.error is None
+    assert len(result.value.operators) == 0
+
+
+def test_load_test_set(qtbot, loader, test_img_fname, test_img, tmp_path):
+    missing = str(tmp_path / 'missing.png')
+    result, = load(qtbot, loader, 1, loader.load_test_set, [test_img_fname, missing, test_img_fname])
+    assert result.kind == TEST_SET
+    assert result.value.fnames == [test_img_fname, test_img_fname]
+    assert result.value.failed == [missing]
+    for img in result.value.images:
+        np.testing.assert_array_equal(img, test_img)
+        assert img.flags.writeable
+
+
+def test_cached_media_isnt_read_again(qtbot, loader, test_img_fname, test_img, monkeypatch):
+    load(qtbot, loader, 1, loader.load_media, test_img_fname)
+    monkeypatch.setattr(loader, '_read', mock_unreachable)
+    result, = load(qtbot, loader, 1, loader.load_media, test_img_fname)
+    np.testing.assert_array_equal(result.value, test_img)
+    stats = loader.media_cache.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+
+
+def test_loaded_media_is_a_writable_copy(qtbot, loader, test_img_fname):
+    load(qtbot, loader, 1, loader.load_media, test_img_fname)
+    result, = load(qtbot, loader, 1, loader.load_media, test_img_fname)
+    result.value[:] = 0
+    result, = load(qtbot, loader, 1, loader.load_media, test_img_fname)
+    assert result.value.any()
+
+
+def test_modified_file_decoded_again(tmp_path, test_img):
+    fname = str(tmp_path / 'img.png')
+    cv2.imwrite(fname, test_img)
+    cache = MediaCache()
+    cache.put(cache.key(fname), test_img)
+    cv2.imwrite(fname, test_img[:16])
+    assert cache.key(fname) not in cache
+
+
+def test_media_cache_evicts_least_recently_used(test_img):
+    cache = MediaCache(max_bytes=2 * test_img.nbytes)
+    for key in 'abc':
+        cache.put(key, test_img)
+    assert 'a' not in cache and 'b' in cache and 'c' in cache
+    assert cache.stats().nbytes == 2 * test_img.nbytes
+
+
+def test_prefetch(qtbot, loader, test_img_fname):
+    with qtbot.waitSignal(loader.prefetched, timeout=2000):
+        loader.prefetch([test_img_fname])
+    assert loader.media_cache.key(test_img_fname) in loader.media_cache
+
+
+def test_prefetch_errors_are_ignored(qtbot, loader, tmp_path, test_img_fname):
+    with qtbot.waitSignal(loader.prefetched, timeout=2000):
+        loader.prefetch([str(tmp_path / 'missing.png'), test_img_fname])
+
+
+def mock_unreachable(*args):
+    raise AssertionError('Should have been cached')
@@ -0,0 +1,120 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from ezcv import CompVizPipeline
+from ezcv.operator import Operator
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv.operator.implementations.color_space import ColorSpaceChange
+from ezcv_gui.cache import LRUCache
+from ezcv_gui.sweep import ParameterSweep, sweep_values
+
+
+class _Context:
+    def __init__(self, media):
+        self.original_img = media
+
+
+class _Original(Operator):
+    """ Outputs the run's media, from the pipeline context
+    """
+    def run(self, img, ctx):
+        return ctx.original_img.copy()
+
+
+@pytest.fixture
+def kernel_size_spec():
+    return GaussianBlur().get_parameters_specs()['kernel_size']
+
+
+@pytest.fixture
+def sweep():
+    sweep = ParameterSweep(workers=4)
+    yield sweep
+    sweep.shutdown()
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = CompVizPipeline()
+    pipeline.add_operator('upstream', ColorSpaceChange())
+    pipeline.add_operator('blur', GaussianBlur())
+    return pipeline
+
+
+def run(qtbot, sweep, count, *args, **kwargs):
+    results = list()
+    sweep.value_finished.connect(results.append)
+    sweep.submit(*args, **kwargs)
+    qtbot.waitUntil(lambda: len(results) >= count, timeout=5000)
+    return results
+
+
+class TestSweepValues:
+    def test_numeric_range(self, kernel_size_spec):
+        values = sweep_values(kernel_size_spec, max_values=1000)
+        assert values[0] == kernel_size_spec.lower
+        assert values[1] - values[0] == kernel_size_spec.step_size
+        assert values[-1] <= kernel_size_spec.upper
+
+    def test_sampled_range_keeps_both_ends(self, kernel_size_spec):
+        all_values = sweep_values(kernel_size_spec, max_values=1000)
+        values = sweep_values(kernel_size_spec, max_values=3)
+        assert values == [all_values[0], values[1], all_values[-1]]
+        assert values[1] in all_values
+
+    def test_enum(self):
+        spec = ColorSpaceChange().get_parameters_specs()
+        enum_spec = next(param for param in spec.values() if hasattr(param, 'possible_values'))
+        assert sweep_values(enum_spec) == list(enum_spec.possible_values)
+
+
+def test_one_result_per_value(qtbot, sweep, pipeline, test_img):
+    values = [1, 3, 5, 7]
+    results = run(qtbot, sweep, len(values), pipeline, 'blur', 'kernel_size', values, test_img)
+
+    assert sorted(result.index for result in results) == list(range(len(values)))
+    for result in results:
+        assert result.value == values[result.index]
+        pipeline.operators['blur'].kernel_size = result.value
+        expected, _ = pipeline.run(test_img)
+        np.testing.assert_array_equal(result.image, expected)
+
+
+def test_upstream_runs_once(qtbot, sweep, pipeline, test_img):
+    values = [1, 3, 5, 7]
+    with mock.patch.object(ColorSpaceChange, 'run', autospec=True, side_effect=ColorSpaceChange.run) as m:
+        run(qtbot, sweep, len(values), pipeline, 'blur', 'kernel_size', values, test_img)
+    assert m.call_count == 1
+
+
+def test_upstream_resumes_from_cache(qtbot, sweep, pipeline, test_img):
+    cache = LRUCache(1024 * 1024 * 1024)
+    run(qtbot, sweep, 2, pipeline, 'blur', 'kernel_size', [1, 3], test_img, cache=cache, media_key=0)
+    with mock.patch.object(ColorSpaceChange, 'run', autospec=True, side_effect=ColorSpaceChange.run) as m:
+        run(qtbot, sweep, 2, pipeline, 'blur', 'kernel_size', [5, 7], test_img, cache=cache, media_key=0)
+    m.assert_not_called()
+
+
+def test_swept_operator_left_untouched(qtbot, sweep, pipeline, test_img):
+    run(qtbot, sweep, 2, pipeline, 'blur', 'kernel_size', [5, 7], test_img)
+    assert pipeline.operators['blur'].kernel_size == GaussianBlur().kernel_size
+
+
+def test_unknown_operator(sweep, pipeline, test_img):
+    with pytest.raises(ValueError):
+        sweep.submit(pipeline, 'missing', 'kernel_size', [1], test_img)
+
+
+def test_downstream_runs_within_the_media_context(qtbot, sweep, test_img):
+    pipeline = CompVizPipeline()
+    pipeline.add_operator('upstream', GaussianBlur())
+    pipeline.add_operator('blur', GaussianBlur())
+    pipeline.add_operator('original', _Original())
+    with mock.patch('ezcv_gui.sweep.pipeline_context', _Context), \
+            mock.patch('ezcv_gui.engine.pipeline_context', _Context):
+        results = run(qtbot, sweep, 2, pipeline, 'blur', 'kernel_size', [3, 5], test_img)
+    for result in results:
+        assert result.error is None
+        np.testing.assert_array_equal(result.image, test_img)
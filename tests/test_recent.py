@@ -0,0 +1,41 @@
+import pytest
+from PyQt6.QtCore import QSettings
+
+from ezcv_gui.recent import RecentFiles
+
+
+@pytest.fixture
+def recent_files(tmp_path):
+    settings = QSettings(str(tmp_path / 'settings.ini'), QSettings.Format.IniFormat)
+    return RecentFiles(settings, max_files=3)
+
+
+def test_most_recent_first(recent_files):
+    recent_files.add('a.png')
+    recent_files.add('b.png')
+    assert recent_files.files() == ['b.png', 'a.png']
+
+
+def test_no_duplicates(recent_files):
+    recent_files.add('a.png')
+    recent_files.add('b.png')
+    recent_files.add('a.png')
+    assert recent_files.files() == ['a.png', 'b.png']
+
+
+def test_bounded(recent_files):
+    for fname in ['a.png', 'b.png', 'c.png', 'd.png']:
+        recent_files.add(fname)
+    assert recent_files.files() == ['d.png', 'c.png', 'b.png']
+
+
+def test_persisted(tmp_path):
+    fname = str(tmp_path / 'settings.ini')
+    RecentFiles(QSettings(fname, QSettings.Format.IniFormat)).add('a.png')
+    assert RecentFiles(QSettings(fname, QSettings.Format.IniFormat)).files() == ['a.png']
+
+
+def test_clear(recent_files):
+    recent_files.add('a.png')
+    recent_files.clear()
+    assert recent_files.files() == []
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from ezcv import CompVizPipeline
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv_gui.roi import RegionOfInterest, is_worth_a_roi
+
+
+def test_halo_around_region():
+    roi = RegionOfInterest.around((100, 100, 50, 40), 10, 1000, 1000)
+    assert roi.region == (100, 100, 50, 40)
+    assert roi.crop == (90, 90, 70, 60)
+
+
+def test_clamped_to_media():
+    roi = RegionOfInterest.around((-20, 990, 100, 100), 10, 1000, 1000)
+    assert roi.region == (0, 990, 80, 10)
+    assert roi.crop == (0, 980, 90, 20)
+
+
+@pytest.mark.parametrize('region', [(0, 0, 60, 40), (50, 30, 60, 40), (100, 80, 60, 40)])
+def test_region_matches_full_run(region):
+    test_img = np.random.RandomState(0).randint(0, 255, (120, 160, 3), dtype=np.uint8)
+    pipeline = CompVizPipeline()
+    blur = GaussianBlur()
+    blur.kernel_size = 7
+    pipeline.add_operator('blur', blur)
+    height, width = test_img.shape[:2]
+    roi = RegionOfInterest.around(region, 8, width, height)
+
+    patch = roi.extract(pipeline.run(roi.crop_media(test_img))[0])
+    full_result, _ = pipeline.run(test_img)
+    x, y, w, h = roi.region
+    np.testing.assert_array_equal(patch, full_result[y:y + h, x:x + w])
+
+
+def test_geometry_changes_cant_be_extracted():
+    roi = RegionOfInterest.around((10, 10, 20, 20), 5, 100, 100)
+    assert roi.extract(np.zeros((10, 10), dtype=np.uint8)) is None
+
+
+def test_worth_a_roi():
+    assert is_worth_a_roi((0, 0, 100, 100), 1000, 1000)
+    assert not is_worth_a_roi((0, 0, 1000, 1000), 1000, 1000)
+    assert not is_worth_a_roi((2000, 2000, 100, 100), 1000, 1000)
@@ -0,0 +1,191 @@
+import io
+import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from ezcv import CompVizPipeline
+from ezcv.exceptions import ConfigParsingError
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv_gui.server import PipelineServer, PipelineClient, ServerError, parse_address, shared_memory, \
+    check_imported_operators
+
+
+def make_config(kernel_size: int = 3) -> str:
+    pipeline = CompVizPipeline()
+    blur = GaussianBlur()
+    blur.kernel_size = kernel_size
+    pipeline.add_operator('blur', blur)
+    with io.StringIO() as fout:
+        pipeline.save(fout)
+        return fout.getvalue()
+
+
+def expected_output(config: str, img):
+    result, _ = CompVizPipeline.load(io.StringIO(config)).run(img.copy())
+    return result
+
+
+def start_server(address: str, config: str, workers: int = 4) -> PipelineServer:
+    server = PipelineServer(address, config=config, workers=workers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def server():
+    server = start_server('127.0.0.1:0', make_config())
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def client(server):
+    client = PipelineClient(server.address, timeout=10)
+    yield client
+    client.close()
+
+
+def test_parse_address():
+    assert parse_address('localhost:8765') == ('localhost', 8765)
+    assert parse_address(':8765') == ('localhost', 8765)
+    assert parse_address('unix:/tmp/ezcv.sock') == '/tmp/ezcv.sock'
+
+
+def test_process(client, test_img):
+    result, timing = client.process(test_img)
+    np.testing.assert_array_equal(result, expected_output(make_config(), test_img))
+    assert timing['total_seconds'] > 0
+    assert [stage['name'] for stage in timing['stages']] == ['blur']
+
+
+@pytest.mark.skipif(shared_memory is None, reason='Shared memory needs Python 3.8 or newer')
+def test_process_through_shared_memory(server, test_img):
+    client = PipelineClient(server.address, use_shared_memory=True, timeout=10)
+    try:
+        for _ in range(2):
+            result, _ = client.process(test_img)
+            np.testing.assert_array_equal(result, expected_output(make_config(), test_img))
+    finally:
+        client.close()
+
+
+def test_unix_socket(tmp_path, test_img):
+    server = start_server(f'unix:{tmp_path / "ezcv.sock"}', make_config())
+    client = PipelineClient(server.address, timeout=10)
+    try:
+        assert stat.S_IMODE(os.stat(tmp_path / 'ezcv.sock').st_mode) == 0o600
+        result, _ = client.process(test_img)
+        np.testing.assert_array_equal(result, expected_output(make_config(), test_img))
+    finally:
+        client.close()
+        server.shutdown()
+    assert not os.path.exists(tmp_path / 'ezcv.sock')
+
+
+def test_stale_socket_replaced(tmp_path):
+    server = PipelineServer(f'unix:{tmp_path / "ezcv.sock"}')
+    # Not closed, as if the server died
+    server._server.socket.close()
+    server._executor.shutdown()
+    server = PipelineServer(f'unix:{tmp_path / "ezcv.sock"}')
+    server.close()
+
+
+def test_dont_remove_other_files(tmp_path):
+    fname = tmp_path / 'notes.txt'
+    fname.write_text('not a socket')
+    with pytest.raises(FileExistsError):
+        PipelineServer(f'unix:{fname}')
+    assert fname.read_text() == 'not a socket'
+
+
+def test_dont_listen_on_other_interfaces():
+    with pytest.raises(ValueError):
+        PipelineServer('0.0.0.0:0')
+
+
+def test_push_config(client, test_img):
+    config = make_config(kernel_size=9)
+    client.push_config(config)
+    assert client.get_config() == config
+    result, _ = client.process(test_img)
+    np.testing.assert_array_equal(result, expected_output(config, test_img))
+
+
+def test_push_bad_config(client):
+    config = client.get_config()
+    with pytest.raises(ServerError) as e:
+        client.push_config('operators: [')
+    assert e.value.status == 400
+    assert client.get_config() == config
+
+
+def test_push_config_from_unloaded_library(client):
+    config = client.get_config()
+    with pytest.raises(ServerError) as e:
+        client.push_config('operators:\n- name: x\n  implementation: not_imported_module.Operator\n  params: {}\n')
+    assert e.value.status == 400
+    assert client.get_config() == config
+
+
+def test_check_imported_operators():
+    check_imported_operators(make_config())
+    with pytest.raises(ConfigParsingError):
+        check_imported_operators('operators:\n- implementation: os.system\n')
+
+
+def test_foreign_shared_memory_rejected(client, test_img):
+    with pytest.raises(ServerError) as e:
+        client._request('POST', '/process', b'', {'X-Shape': '32,32,3', 'X-Dtype': '|u1', 'X-Input-Shm': 'other_app'})
+    assert e.value.status == 400
+    with pytest.raises(ServerError) as e:
+        client._request('POST', '/process', test_img.tobytes(),
+                        {'X-Shape': ','.join(str(d) for d in test_img.shape), 'X-Dtype': '|u1',
+                         'X-Output-Shm': 'other_app'})
+    assert e.value.status == 400
+
+
+def test_bad_image(client):
+    with pytest.raises(ServerError) as e:
+        client._request('POST', '/process', b'123', {'X-Shape': '10,10', 'X-Dtype': '|u1'})
+    assert e.value.status == 400
+
+
+def test_concurrent_requests(server, test_img):
+    expected = expected_output(make_config(), test_img)
+
+    def process(i):
+        client = PipelineClient(server.address, timeout=10)
+        try:
+            return client.process(test_img)[0]
+        finally:
+            client.close()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(process, range(16)))
+    for result in results:
+        np.testing.assert_array_equal(result, expected)
+
+
+def test_controller_pushes_config(qtbot, controller, server):
+    with qtbot.waitSignal(controller.config_pushed, timeout=2000) as blocker:
+        controller.server_address = server.address
+    assert blocker.args[0] is None
+
+    controller.add_operator(GaussianBlur)
+    controller.update_operator_parameter('GaussianBlur', 'kernel_size', 7)
+
+    def pushed():
+        operator = CompVizPipeline.load(io.StringIO(server.config)).operators.get('GaussianBlur')
+        assert operator is not None and operator.kernel_size == 7
+    qtbot.waitUntil(pushed, timeout=2000)
+
+
+def test_controller_push_failure(qtbot, controller, tmp_path):
+    with qtbot.waitSignal(controller.config_pushed, timeout=2000) as blocker:
+        controller.server_address = f'unix:{tmp_path / "nobody.sock"}'
+    assert isinstance(blocker.args[0], OSError)
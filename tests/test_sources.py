@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+
+from ezcv_gui.sources import SyntheticSource, FrameGrabber
+
+
+def _wait_finished(grabber: FrameGrabber, timeout: float = 2):
+    deadline = time.perf_counter() + timeout
+    while not grabber._finished.is_set() and time.perf_counter() < deadline:
+        time.sleep(0.001)
+
+
+class TestSyntheticSource:
+    def test_frames_count(self):
+        source = SyntheticSource(32, 24, frames_count=3)
+        frames = [source.read() for _ in range(4)]
+        assert all(f is not None for f in frames[:3])
+        assert frames[3] is None
+
+    def test_frames_shape(self):
+        frame = SyntheticSource(32, 24).read()
+        assert frame.shape == (24, 32, 3)
+        assert frame.dtype == np.uint8
+
+    def test_frames_index(self):
+        source = SyntheticSource(32, 24)
+        assert [source.read()[0, 0, 0] for _ in range(3)] == [0, 1, 2]
+
+
+class TestFrameGrabber:
+    def test_latest_frame_drops_older_frames(self):
+        grabber = FrameGrabber(SyntheticSource(32, 24, frames_count=10), queue_size=2)
+        grabber.start()
+        _wait_finished(grabber)
+        frame = grabber.latest_frame()
+        assert frame[0, 0, 0] == 9
+        assert grabber.dropped_frames == 9
+        assert grabber.finished
+        grabber.stop()
+
+    def test_no_new_frame(self):
+        grabber = FrameGrabber(SyntheticSource(32, 24, frames_count=1))
+        grabber.start()
+        _wait_finished(grabber)
+        assert grabber.latest_frame() is not None
+        assert grabber.latest_frame() is None
+        grabber.stop()
+
+    def test_pace_at_source_fps(self):
+        grabber = FrameGrabber(SyntheticSource(32, 24, frames_count=5, fps=50))
+        start = time.perf_counter()
+        grabber.start()
+        _wait_finished(grabber)
+        assert time.perf_counter() - start >= 4 / 50
+        grabber.stop()
+
+    def test_stop_endless_source(self):
+        grabber = FrameGrabber(SyntheticSource(32, 24, fps=1000))
+        grabber.start()
+        grabber.stop()
+        assert not grabber._thread.is_alive()
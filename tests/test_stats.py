@@ -0,0 +1,81 @@
+import csv
+import json
+
+import pytest
+
+from ezcv_gui.stats import PipelineStats, RunTiming, StageTiming
+
+
+def _run(*seconds, cached=()):
+    stages = [
+        StageTiming(f'op_{i}', s, (10, 20, 3), 'uint8', 600, cached=i in cached)
+        for i, s in enumerate(seconds)
+    ]
+    return RunTiming(stages, sum(seconds))
+
+
+@pytest.fixture
+def stats():
+    s = PipelineStats(window=3)
+    s.add_run(_run(0.1, 0.2))
+    s.add_run(_run(0.0, 0.4, cached=(0,)))
+    return s
+
+
+def test_stage_summaries(stats):
+    summaries = stats.stage_summaries()
+    assert list(summaries) == ['op_0', 'op_1']
+    summary = summaries['op_1']
+    assert summary.runs_count == 2
+    assert summary.mean_seconds == pytest.approx(0.3)
+    assert summary.max_seconds == pytest.approx(0.4)
+
+
+def test_cached_stages_dont_count(stats):
+    summary = stats.stage_summaries()['op_0']
+    assert summary.runs_count == 1
+    assert summary.mean_seconds == pytest.approx(0.1)
+    assert summary.last.cached
+
+
+def test_unknown_stage(stats):
+    assert 'missing' not in stats.stage_summaries()
+
+
+def test_rolling_window(stats):
+    stats.add_run(_run(1.0, 1.0))
+    stats.add_run(_run(1.0, 1.0))
+    assert len(stats.runs) == 3
+    assert stats.stage_summaries()['op_0'].mean_seconds == pytest.approx(1.0)
+
+
+def test_cancelled_runs(stats):
+    stats.add_cancelled_run()
+    assert stats.cancelled_runs == 1
+    stats.clear()
+    assert stats.cancelled_runs == 0
+
+
+def test_export_json(stats, tmp_path):
+    fname = str(tmp_path / 'stats.json')
+    stats.export(fname)
+    with open(fname) as fin:
+        data = json.load(fin)
+    assert len(data['runs']) == 2
+    assert data['runs'][0]['stages'][1]['seconds'] == pytest.approx(0.2)
+    assert data['runs'][0]['stages'][1]['shape'] == [10, 20, 3]
+    assert data['cancelled_runs'] == 0
+
+
+def test_export_csv(stats, tmp_path):
+    fname = str(tmp_path / 'stats.csv')
+    stats.export(fname)
+    with open(fname) as fin:
+        rows = list(csv.DictReader(fin))
+    assert len(rows) == 4
+    assert rows[2]['name'] == 'op_0' and rows[2]['cached'] == '1'
+
+
+def test_export_unknown_format(stats, tmp_path):
+    with pytest.raises(ValueError):
+        stats.export(str(tmp_path / 'stats.txt'))
@@ -0,0 +1,116 @@
+import threading
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from ezcv import CompVizPipeline
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv_gui.testset import TestSetRunner
+
+
+@pytest.fixture
+def runner():
+    runner = TestSetRunner(workers=4)
+    yield runner
+    runner.shutdown()
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = CompVizPipeline()
+    pipeline.add_operator('blur', GaussianBlur())
+    return pipeline
+
+
+@pytest.fixture
+def images(test_img):
+    return [np.roll(test_img, i, axis=1) for i in range(8)]
+
+
+def run(qtbot, runner, pipeline, count):
+    results = list()
+    runner.image_finished.connect(results.append)
+    runner.submit(pipeline)
+    qtbot.waitUntil(lambda: len(results) >= count, timeout=5000)
+    runner.image_finished.disconnect(results.append)
+    return results
+
+
+def test_results_for_every_image(qtbot, runner, pipeline, images):
+    runner.set_images([f'{i}.png' for i in range(len(images))], images)
+    results = run(qtbot, runner, pipeline, len(images))
+
+    assert sorted(result.index for result in results) == list(range(len(images)))
+    for result in results:
+        assert result.generation == runner.generation
+        assert result.error is None
+        expected, _ = pipeline.run(images[result.index])
+        np.testing.assert_array_equal(result.image, expected)
+
+
+def test_workers_run_their_own_pipeline_copy(qtbot, runner, pipeline, images):
+    runner.set_images([f'{i}.png' for i in range(len(images))], images)
+    seen = set()
+    lock = threading.Lock()
+    original_run = GaussianBlur.run
+
+    def blur_run(self, img, ctx):
+        with lock:
+            seen.add((id(self), threading.get_ident()))
+        return original_run(self, img, ctx)
+
+    with mock.patch.object(GaussianBlur, 'run', blur_run):
+        run(qtbot, runner, pipeline, len(images))
+    operator_ids = {operator_id for operator_id, _ in seen}
+    assert id(pipeline.operators['blur']) not in operator_ids
+    # Never the same copy on two threads
+    assert len(operator_ids) == len(seen)
+
+
+def test_newer_submission_cancels_waiting_runs(qtbot, pipeline, images):
+    runner = TestSetRunner(workers=1)
+    runner.set_images([f'{i}.png' for i in range(len(images))], images)
+    started = threading.Event()
+    release = threading.Event()
+    original_run = GaussianBlur.run
+
+    def blur_run(self, img, ctx):
+        started.set()
+        release.wait(5)
+        return original_run(self, img, ctx)
+
+    results = list()
+    runner.image_finished.connect(results.append)
+    with mock.patch.object(GaussianBlur, 'run', blur_run):
+        runner.submit(pipeline)
+        assert started.wait(5)
+        generation = runner.submit(pipeline)
+        release.set()
+        assert runner.wait_idle(5)
+    qtbot.waitUntil(lambda: len(results) >= len(images), timeout=5000)
+    runner.shutdown()
+
+    # The run that was going on when the pipeline changed is dropped too
+    assert len(results) == len(images)
+    assert all(result.generation == generation for result in results)
+
+
+def test_parameter_change_resumes_from_cache(qtbot, runner, pipeline, images):
+    pipeline.add_operator('blur_2', GaussianBlur())
+    runner.set_images([f'{i}.png' for i in range(len(images))], images)
+    run(qtbot, runner, pipeline, len(images))
+
+    pipeline.operators['blur_2'].kernel_size = 5
+    with mock.patch.object(GaussianBlur, 'run', autospec=True, side_effect=GaussianBlur.run) as m:
+        run(qtbot, runner, pipeline, len(images))
+    # Only the second blur runs again
+    assert m.call_count == len(images)
+
+
+def test_big_images_run_downscaled(qtbot, pipeline, test_img):
+    runner = TestSetRunner(workers=2, max_pixels=test_img.shape[0] * test_img.shape[1] // 4)
+    runner.set_images(['img.png'], [test_img])
+    result, = run(qtbot, runner, pipeline, 1)
+    runner.shutdown()
+    assert result.image.shape[0] < test_img.shape[0]
@@ -0,0 +1,123 @@
+import cv2
+import numpy as np
+import pytest
+
+from ezcv.operator import Operator, IntegerParameter
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv.operator.implementations.color_space import ColorSpaceChange
+from ezcv_gui import engine
+from ezcv_gui.engine import run_stages, run_operator
+from ezcv_gui.tiling import TiledExecutor, tile_safe, tile_footprint, estimate_footprint, pipeline_footprint
+
+
+class _Normalize(Operator):
+    """ Depends on the whole image, so it isn't tile safe
+    """
+    def run(self, img, ctx):
+        return cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX)
+
+
+class _Context:
+    def __init__(self, media):
+        self.original_img = media
+
+
+class _BlendOriginal(Operator):
+    """ Reads the run's media from the pipeline context, as overlays do
+    """
+    tile_footprint = 0
+
+    def run(self, img, ctx):
+        return img // 2 + ctx.original_img // 2
+
+
+@pytest.fixture
+def tiler():
+    tiler = TiledExecutor(workers=4, tile_size=64)
+    yield tiler
+    tiler.shutdown()
+
+
+@pytest.fixture
+def img():
+    return np.random.RandomState(0).randint(0, 200, (150, 230, 3), dtype=np.uint8)
+
+
+def test_tiles_cover_the_image_once(tiler):
+    coverage = np.zeros((150, 230), dtype=np.int32)
+    for tile in tiler.tiles(230, 150, halo=5):
+        x, y, w, h = tile.region
+        coverage[y:y + h, x:x + w] += 1
+    assert np.all(coverage == 1)
+
+
+def test_map_tiles_identity(tiler, img):
+    np.testing.assert_array_equal(tiler.map_tiles(lambda tile_img, tile: tile_img, img, halo=3), img)
+
+
+def test_map_tiles_geometry_change(tiler, img):
+    assert tiler.map_tiles(lambda tile_img, tile: tile_img[::2, ::2], img, halo=0) is None
+
+
+@pytest.mark.parametrize('kernel_size', [1, 3, 7, 15])
+def test_blur_matches_whole_image(tiler, img, kernel_size):
+    blur = GaussianBlur()
+    blur.kernel_size = kernel_size
+    stages = [('blur', blur)]
+    np.testing.assert_array_equal(run_stages(stages, img.copy(), tiler=tiler), run_stages(stages, img.copy()))
+
+
+def test_pipeline_matches_whole_image(tiler, img):
+    blur = GaussianBlur()
+    blur.kernel_size = 9
+    stages = [('blur', blur), ('color', ColorSpaceChange()), ('blur_2', GaussianBlur())]
+    tiled = run_stages(stages, img.copy(), tiler=tiler)
+    whole = run_stages(stages, img.copy())
+    assert tiled.shape == whole.shape
+    np.testing.assert_array_equal(tiled, whole)
+
+
+def test_falls_back_for_operators_that_arent_tile_safe(tiler, img):
+    stages = [('normalize', _Normalize()), ('blur', GaussianBlur())]
+    assert tile_footprint(_Normalize()) is None
+    np.testing.assert_array_equal(run_stages(stages, img.copy(), tiler=tiler), run_stages(stages, img.copy()))
+
+
+def test_declared_footprint():
+    class _Dilate(Operator):
+        tile_footprint = 2
+
+        def run(self, img, ctx):
+            return cv2.dilate(img, np.ones((5, 5), np.uint8))
+
+    assert tile_footprint(_Dilate()) == 2
+
+
+def test_estimated_footprint():
+    class _Box(Operator):
+        kernel_size = IntegerParameter(default=3, lower=1, upper=31, step_size=2)
+
+        def run(self, img, ctx):
+            return cv2.blur(img, (self.kernel_size, self.kernel_size))
+
+    box = tile_safe()(_Box)()
+    box.kernel_size = 7
+    assert estimate_footprint(box) == 3
+    assert tile_footprint(box) == 3
+
+
+def test_pipeline_footprint():
+    blur = GaussianBlur()
+    blur.kernel_size = 9
+    assert pipeline_footprint([blur, ColorSpaceChange(), GaussianBlur()]) == 4 + GaussianBlur().kernel_size // 2
+    assert pipeline_footprint([]) == 0
+    assert pipeline_footprint([blur, _Normalize()]) is None
+
+
+@pytest.mark.parametrize('tiled', [False, True])
+def test_stages_share_the_run_context(tiler, img, monkeypatch, tiled):
+    monkeypatch.setattr(engine, 'pipeline_context', _Context)
+    stages = [('blur', GaussianBlur()), ('blend', _BlendOriginal())]
+    expected = run_operator('blur', GaussianBlur(), img.copy(), _Context(img)) // 2 + img // 2
+    result = run_stages(stages, img.copy(), tiler=tiler if tiled else None)
+    np.testing.assert_array_equal(result, expected)
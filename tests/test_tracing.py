@@ -0,0 +1,34 @@
+from ezcv_gui import tracing
+from ezcv_gui.tracing import StartupTrace
+
+
+def test_phases_timeline():
+    trace = StartupTrace(origin=0.0)
+    trace.add('outer', 1.0, 2.0)
+    trace.add('inner', 1.2, 1.5)
+    trace.add('after', 2.0, 2.5)
+    trace.add('first paint', 2.5, 2.5)
+
+    lines = trace.format().splitlines()[1:]
+    assert [line.split('ms', 2)[2] for line in lines] == ['  outer', '    inner', '  after', '  first paint']
+    assert lines[1].split()[:2] == ['1200.0', 'ms']
+    assert abs(trace.find('inner').duration - 0.3) < 1e-9
+
+
+def test_phase_records_events():
+    trace = tracing.start_trace()
+    try:
+        with tracing.phase('loading'):
+            tracing.mark('halfway')
+    finally:
+        assert tracing.finish_trace() is trace
+    assert [event.name for event in trace.events] == ['halfway', 'loading']
+    assert trace.find('loading').duration >= 0
+    assert tracing.get_trace() is None
+
+
+def test_phase_without_trace():
+    with tracing.phase('nothing'):
+        tracing.mark('nothing either')
+    assert tracing.get_trace() is None
+    assert tracing.finish_trace() is None
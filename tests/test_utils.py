@@ -1,9 +1,12 @@
+import gc
+import weakref
+
 import numpy as np
 import pytest
 from PyQt6.QtGui import QImage
 
 from ezcv.test_utils import parametrize_img, assert_terms_in_exception
-from ezcv_gui.utils import img2QImage
+from ezcv_gui.utils import img2QImage, get_copies_count, reset_copies_count
 
 
 @parametrize_img
@@ -25,15 +28,63 @@ def test_img2qimg_shape(img):
     assert qimg.height() == img.shape[0] and qimg.width() == img.shape[1]
 
 
+def _qimage_to_rgb(qimg: QImage) -> np.ndarray:
+    qimg = qimg.convertToFormat(QImage.Format.Format_RGB888)
+    channels_count = 3
+    b = qimg.constBits()
+    b.setsize(qimg.height() * qimg.bytesPerLine())
+    arr = np.frombuffer(b, np.uint8).reshape((qimg.height(), qimg.bytesPerLine()))
+    # Copying since the converted image is gone once this function returns
+    return arr[:, :qimg.width() * channels_count].reshape((qimg.height(), qimg.width(), channels_count)).copy()
+
+
+def _expected_rgb(img: np.ndarray) -> np.ndarray:
+    if img.ndim == 2:
+        return np.repeat(img[..., None], 3, axis=2)
+    return img[..., ::-1]
+
+
 @parametrize_img
 def test_img2qimg_content(img):
     qimg = img2QImage(img)
-    if img.ndim == 2:
-        img = np.repeat(img[..., None], 3, axis=2)
-    else:
-        img = img[..., ::-1].copy()
-    channels_count = 3
-    b = qimg.bits()
-    b.setsize(qimg.height() * qimg.width() * channels_count)
-    arr = np.frombuffer(b, np.uint8).reshape((qimg.height(), qimg.width(), channels_count))
-    assert np.all(np.isclose(img, arr))
+    assert np.all(np.isclose(_expected_rgb(img), _qimage_to_rgb(qimg)))
+
+
+@parametrize_img
+def test_img2qimg_doesnt_copy_contiguous_images(img):
+    reset_copies_count()
+    img2QImage(np.ascontiguousarray(img))
+    assert get_copies_count() == 0
+
+
+@parametrize_img
+def test_img2qimg_doesnt_copy_crops(img):
+    crop = img[1:-1, 1:-1]
+    reset_copies_count()
+    qimg = img2QImage(crop)
+    assert get_copies_count() == 0
+    assert np.all(np.isclose(_expected_rgb(crop), _qimage_to_rgb(qimg)))
+
+
+@parametrize_img
+def test_img2qimg_copy_non_contiguous_views(img):
+    view = img[:, ::2]
+    reset_copies_count()
+    qimg = img2QImage(view)
+    assert get_copies_count() == 1
+    assert np.all(np.isclose(_expected_rgb(view), _qimage_to_rgb(qimg)))
+
+
+@parametrize_img
+def test_img2qimg_keeps_array_alive(img):
+    img = img.copy()
+    expected = _expected_rgb(img).copy()
+    img_ref = weakref.ref(img)
+    qimg = img2QImage(img)
+    del img
+    gc.collect()
+    assert img_ref() is not None
+    assert np.all(np.isclose(expected, _qimage_to_rgb(qimg)))
+    del qimg
+    gc.collect()
+    assert img_ref() is None
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from PyQt6.QtCore import QRectF
+from PyQt6.QtGui import QImage
+
+from ezcv_gui.utils import img2QImage
+from ezcv_gui.widgets.display import MediaDisplay, ImagePyramid
+
+
+@pytest.fixture
+def big_image():
+    img = np.random.randint(0, 255, (3000, 4000, 3), dtype=np.uint8)
+    return img2QImage(img)
+
+
+@pytest.fixture
+def display(qtbot):
+    d = MediaDisplay()
+    qtbot.addWidget(d)
+    d.resize(400, 300)
+    d.show()
+    qtbot.waitExposed(d)
+    return d
+
+
+class TestImagePyramid:
+    def test_levels_down_to_a_single_tile(self, big_image):
+        pyramid = ImagePyramid(big_image, tile_size=512)
+        last_level = pyramid.level(pyramid.levels_count - 1)
+        assert max(last_level.width(), last_level.height()) <= 512
+        assert pyramid.level(1).width() == big_image.width() // 2
+
+    @pytest.mark.parametrize('scale, expected_level', [(2, 0), (1, 0), (0.6, 0), (0.5, 1), (0.3, 1), (0.2, 2)])
+    def test_level_for_scale(self, big_image, scale, expected_level):
+        pyramid = ImagePyramid(big_image, tile_size=512)
+        assert pyramid.level_for_scale(scale) == expected_level
+
+    def test_level_for_tiny_scale(self, big_image):
+        pyramid = ImagePyramid(big_image, tile_size=512)
+        assert pyramid.level_for_scale(0.0001) == pyramid.levels_count - 1
+
+    def test_only_visible_tiles(self, big_image):
+        pyramid = ImagePyramid(big_image, tile_size=512)
+        tiles = list(pyramid.tiles(0, QRectF(0, 0, 600, 100)))
+        assert len(tiles) == 2
+        assert tiles[1][0] == QRectF(512, 0, 512, 512)
+
+    def test_tiles_cover_the_image(self, big_image):
+        pyramid = ImagePyramid(big_image, tile_size=512)
+        tiles = list(pyramid.tiles(1, QRectF(0, 0, big_image.width(), big_image.height())))
+        covered = sum(target.width() * target.height() for target, _ in tiles)
+        assert covered == big_image.width() * big_image.height()
+
+
+class TestMediaDisplay:
+    def test_fit_new_image(self, display, big_image):
+        display.set_image(big_image)
+        assert display.scale_factor() < 0.2
+        assert display.image().size() == big_image.size()
+
+    def test_paint_coarse_level_when_fitted(self, qtbot, display, big_image):
+        display.set_image(big_image)
+        display.viewport().repaint()
+        assert display._item.painted_tiles_count == 1
+
+    def test_keep_zoom_for_same_size_images(self, display, big_image):
+        display.set_image(big_image)
+        display.zoom(4)
+        scale = display.scale_factor()
+        display.set_image(big_image.copy())
+        assert display.scale_factor() == pytest.approx(scale)
+
+    def test_fit_images_of_another_size(self, display, big_image):
+        display.set_image(big_image)
+        display.zoom(4)
+        small = QImage(100, 100, QImage.Format.Format_RGB32)
+        display.set_image(small)
+        assert display.scale_factor() > 1
+
+    def test_max_zoom(self, display, big_image):
+        display.set_image(big_image)
+        for _ in range(100):
+            display.zoom(MediaDisplay.ZOOM_STEP)
+        assert display.scale_factor() == pytest.approx(MediaDisplay.MAX_SCALE)
+
+    def test_visible_region_when_zoomed(self, qtbot, display, big_image):
+        display.set_image(big_image)
+        assert display.visible_region() == (0, 0, big_image.width(), big_image.height())
+        with qtbot.waitSignal(display.visible_region_changed, timeout=100) as blocker:
+            display.zoom(8)
+        x, y, width, height = blocker.args
+        assert width < big_image.width() / 2 and height < big_image.height() / 2
+        assert display.visible_region() == (x, y, width, height)
+
+    def test_patch_until_next_image(self, display, big_image):
+        display.set_image(big_image)
+        display.set_patch(QImage(100, 50, QImage.Format.Format_RGB32), 10, 20)
+        patch = display.patch_item()
+        assert patch.boundingRect() == QRectF(10, 20, 100, 50)
+        display.set_image(big_image)
+        assert display.patch_item() is None
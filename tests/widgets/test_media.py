@@ -3,6 +3,7 @@ from unittest import mock
 import numpy as np
 import pytest
 from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage
 
 from ezcv.test_utils import parametrize_img
 from ezcv_gui.widgets.media import MediaPanelWidget
@@ -20,8 +21,7 @@ def media_widget(qtbot, controller):
 @parametrize_img
 def test_show_media(controller, media_widget, img):
     controller.show_media.emit(img)
-    pix = media_widget.media_display.pixmap()
-    qimg = pix.toImage()
+    qimg = media_widget.media_display.image().convertToFormat(QImage.Format.Format_RGB32)
     if img.ndim == 2:
         img = np.repeat(img[..., None], 3, axis=2)
     channels_count = 4
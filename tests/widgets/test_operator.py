@@ -1,5 +1,6 @@
 import pytest
 
+from ezcv.operator.implementations.blur import GaussianBlur
 from ezcv_gui.widgets.operator import OperatorConfigWidget
 
 
@@ -10,3 +11,25 @@ def operator_config_widget(qtbot, controller):
     o.resize(800, 600)
     o.show()
     return o
+
+
+def test_build_on_show(qtbot, controller):
+    controller.add_operator(GaussianBlur)
+    operator = next(iter(controller.operators.values()))
+    o = OperatorConfigWidget(operator)
+    qtbot.addWidget(o)
+    assert not o.is_built and o.parameters_widgets == {}
+
+    o.show()
+    assert o.is_built
+    assert set(o.parameters_widgets) == set(operator.get_parameters_specs())
+
+
+def test_sweep_menu(qtbot):
+    o = OperatorConfigWidget(GaussianBlur())
+    qtbot.addWidget(o)
+    o.show()
+    menu = o.parameter_menu('kernel_size')
+    with qtbot.waitSignal(o.sweep_requested, timeout=100) as blocker:
+        menu.actions()[0].trigger()
+    assert blocker.args == ['kernel_size']
@@ -0,0 +1,84 @@
+import pytest
+
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv_gui.widgets.parameter import get_widget_for_parameter
+
+
+@pytest.fixture
+def kernel_size_spec():
+    return GaussianBlur().get_parameters_specs()['kernel_size']
+
+
+@pytest.fixture
+def number_widget(qtbot, kernel_size_spec):
+    w = get_widget_for_parameter(kernel_size_spec)
+    qtbot.addWidget(w)
+    w.set_value(kernel_size_spec.lower)
+    w.show()
+    return w
+
+
+class SignalCounter:
+    def __init__(self, signal):
+        self.count = 0
+        signal.connect(self._on_signal)
+
+    def _on_signal(self):
+        self.count += 1
+
+
+def _drag(widget, values):
+    slider = widget.slider._slider
+    slider.setSliderDown(True)
+    for value in values:
+        widget.slider.setValue(value)
+    slider.setSliderDown(False)
+
+
+class TestNumberParamWidget:
+    def test_set_value_doesnt_notify(self, number_widget, kernel_size_spec):
+        changed = SignalCounter(number_widget.value_changed)
+        number_widget.set_value(kernel_size_spec.lower + kernel_size_spec.step_size)
+        assert changed.count == 0
+
+    def test_rate_limit_while_dragging(self, qtbot, number_widget, kernel_size_spec):
+        number_widget.set_max_update_rate(1)
+        changing = SignalCounter(number_widget.value_changing)
+        changed = SignalCounter(number_widget.value_changed)
+
+        slider = number_widget.slider._slider
+        slider.setSliderDown(True)
+        for i in range(1, 5):
+            number_widget.slider.setValue(kernel_size_spec.lower + i * kernel_size_spec.step_size)
+
+        assert changing.count == 1
+        assert changed.count == 0
+
+    def test_commit_on_release(self, number_widget, kernel_size_spec):
+        changed = SignalCounter(number_widget.value_changed)
+        final_value = kernel_size_spec.lower + 3 * kernel_size_spec.step_size
+        _drag(number_widget, [kernel_size_spec.lower + kernel_size_spec.step_size, final_value])
+        assert changed.count == 1
+        assert number_widget.get_value() == final_value
+        assert number_widget.number_display.value() == final_value
+
+    def test_commit_after_dragging_back_to_same_value(self, number_widget, kernel_size_spec):
+        changed = SignalCounter(number_widget.value_changed)
+        _drag(number_widget, [kernel_size_spec.lower + kernel_size_spec.step_size, kernel_size_spec.lower])
+        assert changed.count == 1
+
+    def test_no_interactive_updates_when_disabled(self, number_widget, kernel_size_spec):
+        number_widget.set_max_update_rate(0)
+        changing = SignalCounter(number_widget.value_changing)
+        changed = SignalCounter(number_widget.value_changed)
+        _drag(number_widget, [kernel_size_spec.lower + kernel_size_spec.step_size])
+        assert changing.count == 0
+        assert changed.count == 1
+
+    def test_commit_number_display_change(self, number_widget, kernel_size_spec):
+        changed = SignalCounter(number_widget.value_changed)
+        new_value = kernel_size_spec.lower + kernel_size_spec.step_size
+        number_widget.number_display.setValue(new_value)
+        number_widget.number_display.editingFinished.emit()
+        assert changed.count == 1
+        assert number_widget.get_value() == new_value
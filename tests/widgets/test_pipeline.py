@@ -2,7 +2,7 @@ from unittest import mock
 
 import pytest
 from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QTabWidget
+from PyQt6.QtWidgets import QTabWidget, QTabBar
 
 from ezcv.operator import get_available_operators
 from ezcv.operator.implementations.blur import GaussianBlur
@@ -37,6 +37,119 @@ class TestOperatorsTabs:
         name_in_list = operators_tab_widget.tabText(0)
         assert name_in_list == operator_name
 
+    def test_add_keeps_existing_widgets(self, operators_tab_widget, controller):
+        controller.add_operator(GaussianBlur)
+        first_widget = operators_tab_widget.widget(0)
+        controller.add_operator(GaussianBlur)
+        assert operators_tab_widget.count() == 2
+        assert operators_tab_widget.widget(0) is first_widget
+
+    def test_move_keeps_widgets(self, operators_tab_widget, controller):
+        controller.add_operator(GaussianBlur)
+        controller.add_operator(GaussianBlur)
+        widgets = [operators_tab_widget.widget(i) for i in range(2)]
+        names = [operators_tab_widget.tabText(i) for i in range(2)]
+        controller.move_operator(0, 1)
+        assert [operators_tab_widget.widget(i) for i in range(2)] == widgets[::-1]
+        assert [operators_tab_widget.tabText(i) for i in range(2)] == names[::-1]
+        assert [w.operator for w in widgets[::-1]] == list(controller.operators.values())
+
+    @pytest.mark.parametrize('src,target', [(0, 3), (3, 0), (1, 2)])
+    def test_move_follows_operators_order(self, operators_tab_widget, controller, src, target):
+        for _ in range(4):
+            controller.add_operator(GaussianBlur)
+        controller.move_operator(src, target)
+        tabs_operators = [operators_tab_widget.widget(i).operator for i in range(4)]
+        tabs_names = [operators_tab_widget.tabText(i) for i in range(4)]
+        assert tabs_operators == list(controller.operators.values())
+        assert tabs_names == list(controller.operators.keys())
+
+    def test_remove_keeps_other_widgets(self, operators_tab_widget, controller):
+        for _ in range(3):
+            controller.add_operator(GaussianBlur)
+        widgets = [operators_tab_widget.widget(i) for i in range(3)]
+        controller.remove_operator(1)
+        assert [operators_tab_widget.widget(i) for i in range(2)] == [widgets[0], widgets[2]]
+
+    def test_rename_updates_tab(self, operators_tab_widget, controller):
+        controller.add_operator(GaussianBlur)
+        widget = operators_tab_widget.widget(0)
+        controller.rename_operator(0, 'blur')
+        assert operators_tab_widget.widget(0) is widget
+        assert operators_tab_widget.tabText(0) == 'blur'
+
+        widget.parameters_widgets['kernel_size'].number_display.setValue(7)
+        assert controller.operators['blur'].kernel_size == 7
+
+    @staticmethod
+    def close_buttons(operators_tab_widget):
+        tab_bar = operators_tab_widget.tabBar()
+        buttons = dict()
+        for i in range(tab_bar.count()):
+            for side in (QTabBar.ButtonPosition.LeftSide, QTabBar.ButtonPosition.RightSide):
+                button = tab_bar.tabButton(i, side)
+                if button is not None:
+                    buttons[i] = button
+        return buttons
+
+    @pytest.mark.parametrize('current,removed', [(1, 1), (2, 1), (0, 2), (2, 2)])
+    def test_close_button_on_current_tab(self, operators_tab_widget, controller, current, removed):
+        for _ in range(4):
+            controller.add_operator(GaussianBlur)
+        operators_tab_widget.setCurrentIndex(current)
+        assert list(self.close_buttons(operators_tab_widget)) == [current]
+
+        controller.remove_operator(removed)
+        assert list(self.close_buttons(operators_tab_widget)) == [operators_tab_widget.currentIndex()]
+
+    def test_close_button_removes_operator(self, qtbot, operators_tab_widget, controller):
+        for _ in range(3):
+            controller.add_operator(GaussianBlur)
+        operators_tab_widget.setCurrentIndex(1)
+        removed_operator = operators_tab_widget.widget(1).operator
+        qtbot.mouseClick(self.close_buttons(operators_tab_widget)[1], Qt.MouseButton.LeftButton)
+        assert len(controller.operators) == 2
+        assert removed_operator not in controller.operators.values()
+
+    def test_tabs_built_when_shown(self, operators_tab_widget, controller):
+        for _ in range(5):
+            controller.add_operator(GaussianBlur)
+        built = [operators_tab_widget.widget(i).is_built for i in range(5)]
+        assert built == [True, False, False, False, False]
+
+        operators_tab_widget.setCurrentIndex(3)
+        assert operators_tab_widget.widget(3).is_built
+        assert 'kernel_size' in operators_tab_widget.widget(3).parameters_widgets
+
+    def test_load_config_builds_current_tab_only(self, qtbot, operators_tab_widget, controller, tmp_path):
+        for _ in range(50):
+            controller.add_operator(GaussianBlur)
+        config_fname = str(tmp_path / 'config.yaml')
+        controller.save_config(config_fname)
+
+        with qtbot.waitSignal(controller.operators_list_updated, timeout=1000):
+            controller.load_config(config_fname)
+        assert operators_tab_widget.count() == 50
+        built = [i for i in range(50) if operators_tab_widget.widget(i).is_built]
+        assert built == [operators_tab_widget.currentIndex()]
+
+    def test_stage_timings_tooltip(self, qtbot, operators_tab_widget, controller, test_img):
+        controller.add_operator(GaussianBlur)
+        controller.curr_media = test_img
+        with qtbot.waitSignal(controller.stats_updated, timeout=1000):
+            controller.process_curr_media()
+        assert 'ms' in operators_tab_widget.tabToolTip(0)
+
+
+def test_add_operator_popup_built_on_demand(qtbot, controller):
+    with mock.patch('ezcv_gui.widgets.pipeline.AddOperatorWidget') as m:
+        p = PipelineWidget(controller)
+        qtbot.addWidget(p)
+        m.assert_not_called()
+        qtbot.mouseClick(p.add_operator_button, Qt.MouseButton.LeftButton)
+        m.assert_called_once_with(controller)
+        m.return_value.show.assert_called_once()
+
 
 def test_add_operator_button(qtbot, pipeline_widget):
     with qtbot.waitExposed(pipeline_widget.add_operator_popup, timeout=100):
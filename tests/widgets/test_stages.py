@@ -0,0 +1,35 @@
+import pytest
+from PyQt6.QtCore import Qt
+
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv.operator.implementations.color_space import ColorSpaceChange
+from ezcv_gui.widgets.stages import StageStripWidget, OUTPUT_ITEM_TEXT
+
+
+@pytest.fixture
+def stage_strip(qtbot, controller, test_img):
+    s = StageStripWidget(controller)
+    qtbot.addWidget(s)
+    s.resize(800, 150)
+    s.show()
+    controller.add_operator(GaussianBlur)
+    controller.add_operator(ColorSpaceChange)
+    controller.curr_media = test_img
+    with qtbot.waitSignal(controller.stages_captured, timeout=1000):
+        controller.process_curr_media()
+    return s
+
+
+def test_one_item_per_stage(stage_strip):
+    texts = [stage_strip.item(i).text() for i in range(stage_strip.count())]
+    assert texts == ['GaussianBlur', 'ColorSpaceChange', OUTPUT_ITEM_TEXT]
+    assert stage_strip.currentItem().text() == OUTPUT_ITEM_TEXT
+
+
+def test_click_shows_stage(qtbot, stage_strip, controller):
+    item = stage_strip.item(0)
+    with qtbot.waitSignal(controller.show_media, timeout=1000) as blocker:
+        qtbot.mouseClick(stage_strip.viewport(), Qt.MouseButton.LeftButton,
+                         pos=stage_strip.visualItemRect(item).center())
+    assert controller.selected_stage == 'GaussianBlur'
+    assert blocker.args[0] is controller.stage_outputs[0].image
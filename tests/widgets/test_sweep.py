@@ -0,0 +1,20 @@
+import pytest
+
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv_gui.widgets.sweep import SweepWidget
+
+
+@pytest.fixture
+def sweep_widget(qtbot, controller):
+    w = SweepWidget(controller)
+    qtbot.addWidget(w)
+    return w
+
+
+def test_contact_sheet(qtbot, sweep_widget, controller, test_img):
+    controller.add_operator(GaussianBlur)
+    controller.curr_media = test_img
+    controller.sweep_parameter('GaussianBlur', 'kernel_size', [1, 3, 5])
+    assert [sweep_widget.grid.item(i).text() for i in range(3)] == [f'kernel_size = {v}' for v in (1, 3, 5)]
+    qtbot.waitUntil(lambda: sweep_widget.progress_label.text() == '3/3 done', timeout=5000)
+    assert all(not sweep_widget.grid.item(i).icon().isNull() for i in range(3))
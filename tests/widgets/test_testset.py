@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from ezcv.operator.implementations.blur import GaussianBlur
+from ezcv_gui.testset import TestSetResult
+from ezcv_gui.widgets.testset import TestSetWidget
+
+
+@pytest.fixture
+def test_set_widget(qtbot, controller):
+    w = TestSetWidget(controller)
+    qtbot.addWidget(w)
+    return w
+
+
+def test_results_fill_the_grid(qtbot, test_set_widget, controller, test_img_fname):
+    controller.add_operator(GaussianBlur)
+    with qtbot.waitSignal(controller.test_set_loaded, timeout=1000):
+        controller.load_test_set([test_img_fname] * 3)
+    assert test_set_widget.grid.count() == 3
+    qtbot.waitUntil(lambda: test_set_widget.progress_label.text() == '3/3 done', timeout=5000)
+    for i in range(3):
+        assert not test_set_widget.grid.item(i).icon().isNull()
+
+
+def test_error_result(qtbot, test_set_widget, controller, test_img_fname):
+    with qtbot.waitSignal(controller.test_set_loaded, timeout=1000):
+        controller.load_test_set([test_img_fname])
+    generation = controller.test_set.generation
+    test_set_widget.on_test_set_result(TestSetResult(generation, 0, error=ValueError('boom')))
+    assert test_set_widget.grid.item(0).toolTip() == 'boom'
+
+
+def test_double_click_loads_media(qtbot, test_set_widget, controller, test_img_fname, test_img):
+    with qtbot.waitSignal(controller.test_set_loaded, timeout=1000):
+        controller.load_test_set([test_img_fname])
+    with qtbot.waitSignal(controller.loading_finished, timeout=1000):
+        test_set_widget.on_item_double_clicked(test_set_widget.grid.item(0))
+    np.testing.assert_array_equal(controller.curr_media, test_img)